@@ -1,9 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, crimes, vehicles
+from app.database import engine
+from app.routes import auth, crimes, metrics, vehicles
+from app.services.request_metrics import TimedJSONResponse, install_metrics
 from .backend_susep_endpoint import router as susep_router
 
-app = FastAPI(title="SafeDrive RJ", version="1.0.0")
+app = FastAPI(title="SafeDrive RJ", version="1.0.0", default_response_class=TimedJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,8 +18,12 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(crimes.router, prefix="/api/crimes", tags=["crimes"])
 app.include_router(vehicles.router, prefix="/api/vehicles", tags=["vehicles"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
 app.include_router(susep_router)
 
+# Latência/banco/serialização por rota em GET /metrics (+ métricas de ingestão)
+install_metrics(app, engine, include_ingestion=True)
+
 
 @app.get("/")
 async def root():
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.database import get_db
+from app.utils.texto import slug
 
 router = APIRouter()
 
@@ -187,17 +188,27 @@ def analyze_route(
 
 @router.get("/stats")
 def get_stats(city: str = "rio_de_janeiro", db: Session = Depends(get_db)):
-    query = text("""
+    # Lê dos rollups (crime_rollups.sql) em vez de varrer crime_incidents.
+    # city=all soma todas as cidades.
+    city_filter = "" if city == "all" else "AND city_slug = :city"
+    
+    query = text(f"""
         SELECT 
-            COUNT(*) as total,
-            COUNT(*) FILTER (WHERE occurred_at >= NOW() - INTERVAL '24 hours') as last_24h,
-            COUNT(*) FILTER (WHERE occurred_at >= NOW() - INTERVAL '7 days') as last_7d
-        FROM crime_incidents
+            (SELECT COALESCE(SUM(total), 0)
+             FROM crime_rollup_daily
+             WHERE TRUE {city_filter}) as total,
+            (SELECT COALESCE(SUM(total), 0)
+             FROM crime_rollup_hourly
+             WHERE bucket >= date_trunc('hour', NOW() - INTERVAL '24 hours') {city_filter}) as last_24h,
+            (SELECT COALESCE(SUM(total), 0)
+             FROM crime_rollup_hourly
+             WHERE bucket >= date_trunc('hour', NOW() - INTERVAL '7 days') {city_filter}) as last_7d
     """)
     
-    result = db.execute(query).fetchone()
+    result = db.execute(query, {"city": slug(city)}).fetchone()
     
     return {
+        "city": city,
         "total": result.total,
         "last_24h": result.last_24h,
         "last_7d": result.last_7d
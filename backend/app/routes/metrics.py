@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services.metrics import Metrics
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/ingestion")
+def get_ingestion_metrics(format: str = "json"):
+    # Acumulado pelos coletores/importadores em ~/.safedrive_metrics.json
+    metrics = Metrics.load()
+    
+    if format == "prometheus":
+        return PlainTextResponse(metrics.to_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+    
+    return metrics.report()
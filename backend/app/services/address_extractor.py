@@ -0,0 +1,136 @@
+"""
+SafeDrive RJ - Extração de endereço de notícias e tweets
+
+    * Padrões compilados uma vez (no import)
+    * Tipo de logradouro normalizado: "Av." / "R." / "Estr." -> Avenida / Rua / Estrada
+    * Nome cortado no primeiro termo que não faz parte dele ("em", "na altura", ...)
+    * Com gazetteer: cada candidato (e seus prefixos) é validado contra as
+      ruas conhecidas e devolvido na grafia do OSM
+
+Endereços saem sempre na mesma forma, então a mesma rua dá a mesma chave
+no cache de geocodificação, venha de onde vier.
+
+Uso:
+    extrator = AddressExtractor(StreetGazetteer.from_file())
+    extrator.extract("Assalto na Av. N. Sra. de Copacabana, em Copacabana")
+"""
+
+import re
+from typing import List, Optional
+
+from app.services.street_gazetteer import ABREVIACOES, StreetGazetteer
+from app.utils.texto import remover_acentos
+
+TIPOS = {
+    'rua': 'Rua',
+    'avenida': 'Avenida',
+    'travessa': 'Travessa',
+    'praca': 'Praça',
+    'estrada': 'Estrada',
+    'rodovia': 'Rodovia',
+    'alameda': 'Alameda',
+    'largo': 'Largo',
+    'ladeira': 'Ladeira',
+}
+
+# Tipo sem caixa; nome começa com maiúscula ou número ("Rua 24 de Maio"),
+# podendo vir depois de "do/da/dos/das" ("Rua do Ouvidor")
+RE_LOGRADOURO = re.compile(
+    r"\b(?i:(rua|r\.|avenida|av\.?|travessa|trav\.|tv\.|pra[çc]a|p[çc]a?\.|estrada|estr?\.|"
+    r"rodovia|rod\.|alameda|al\.|largo|lgo\.|ladeira|lad\.))"
+    r"\s+((?:d[aeo]s?\s+)?[A-ZÀ-Ý0-9][^,;:!?()\[\]\n\"]{0,80})"
+)
+
+RE_BAIRRO = re.compile(
+    r"\b(?i:bairro)\s+(?:(?:de|do|da)\s+)?"
+    r"([A-ZÀ-Ý][\wÀ-ÿ'-]*(?:\s+(?:(?:d[aeo]s?|e)\s+)?[A-ZÀ-Ý][\wÀ-ÿ'-]*)*)"
+)
+
+# Palavras minúsculas que podem ficar no meio de um nome
+CONECTORES = {'de', 'da', 'do', 'das', 'dos', 'e'}
+
+# Abreviações com ponto dentro de nomes ("N. Sra.", "Pres. Vargas");
+# qualquer outro ponto encerra o nome
+ABREVIACOES_NOME = {
+    'n', 'sra', 'sr', 'sta', 'sto', 's', 'dr', 'dra', 'pres', 'gen', 'mal',
+    'cel', 'prof', 'eng', 'des', 'alm', 'brig', 'cap', 'ten', 'visc', 'min',
+}
+
+MAX_PALAVRAS = 8
+
+
+def limpar_nome(nome: str) -> List[str]:
+    """Palavras do nome até o primeiro termo que não faz parte dele"""
+    palavras = []
+    for palavra in nome.split()[:MAX_PALAVRAS]:
+        if not (palavra[0].isupper() or palavra[0].isdigit() or palavra in CONECTORES):
+            break
+        if palavra.endswith('.') and palavra.rstrip('.').lower() not in ABREVIACOES_NOME:
+            # Fim da frase
+            palavras.append(palavra.rstrip('.'))
+            break
+        palavras.append(palavra)
+    while palavras and palavras[-1] in CONECTORES:
+        palavras.pop()
+    return palavras
+
+
+def tipo_canonico(tipo: str) -> str:
+    """'Av.' -> 'Avenida', 'pça.' -> 'Praça'"""
+    chave = re.sub(r'[^a-z]', '', remover_acentos(tipo.lower()))
+    chave = ABREVIACOES.get(chave, chave)
+    return TIPOS.get(chave, tipo.title())
+
+
+class AddressExtractor:
+    """Endereço mais provável de um texto (validado pelo gazetteer, se houver)"""
+
+    def __init__(self, gazetteer: Optional[StreetGazetteer] = None):
+        self.gazetteer = gazetteer
+
+    def candidates(self, text: str) -> List[str]:
+        """Logradouros do texto, na forma 'Tipo Nome', na ordem em que aparecem"""
+        resultado = []
+        for match in RE_LOGRADOURO.finditer(text or ''):
+            palavras = limpar_nome(match.group(2))
+            if palavras:
+                endereco = f"{tipo_canonico(match.group(1))} {' '.join(palavras)}"
+                if endereco not in resultado:
+                    resultado.append(endereco)
+        return resultado
+
+    def validate(self, address: str) -> Optional[str]:
+        """
+        Grafia do OSM do endereço ou do seu maior prefixo conhecido
+        ("Rua Barata Ribeiro Copacabana" -> "Rua Barata Ribeiro")
+        """
+        palavras = address.split()
+        # Tipo + pelo menos uma palavra do nome
+        for fim in range(len(palavras), 1, -1):
+            if palavras[fim - 1] in CONECTORES:
+                continue
+            nome = self.gazetteer.canonical(' '.join(palavras[:fim]))
+            if nome:
+                return nome
+        return None
+
+    def extract(self, text: str) -> Optional[str]:
+        candidatos = self.candidates(text)
+
+        if self.gazetteer:
+            for candidato in candidatos:
+                validado = self.validate(candidato)
+                if validado:
+                    return validado
+
+        if candidatos:
+            return candidatos[0]
+
+        match = RE_BAIRRO.search(text or '')
+        if match:
+            bairro = match.group(1).strip()
+            if self.gazetteer:
+                return self.gazetteer.canonical(bairro) or bairro
+            return bairro
+
+        return None
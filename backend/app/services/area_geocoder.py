@@ -0,0 +1,430 @@
+"""
+SafeDrive RJ - Geocodificador por área (município / CISP)
+
+Distribui incidentes agregados (ISP-RJ) DENTRO da área correta,
+em vez de concentrar tudo no centro do Rio.
+
+Níveis, do mais preciso para o menos preciso:
+    1. Polígono da CISP       (data/rj_cisp.geojson, propriedade "cisp")
+    2. Polígono do município  (data/rj_municipios.geojson, propriedade "nome")
+    3. Centro do município    (MUNICIPIOS_RJ, os 92 do estado, variação de ~3km)
+Município desconhecido não vira ponto no centro do Rio: sai como NaN e
+fica em `unknown` (o importador descarta e avisa).
+
+Os polígonos não vêm no repositório; sem eles AreaGeocoder falha com a
+instrução de como gerá-los (etapa obrigatória antes do import_isp_rj.py):
+    # Malha municipal do IBGE (o import_isp_rj.py baixa sozinho se faltar)
+    python -m app.services.area_geocoder --baixar
+
+    # CISPs: limites publicados pelo ISP-RJ, convertidos para GeoJSON WGS84
+    ogr2ogr -f GeoJSON -t_srs EPSG:4326 cisp_isp.geojson <shapefile do ISP>
+    python -m app.services.area_geocoder --cisp cisp_isp.geojson --campo <coluna da CISP>
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.texto import slug
+
+DATA_DIR = Path(__file__).resolve().parents[2] / 'data'
+MUNICIPIOS_FILE = DATA_DIR / 'rj_municipios.geojson'
+CISP_FILE = DATA_DIR / 'rj_cisp.geojson'
+
+IBGE_MALHA_URL = (
+    "https://servicodados.ibge.gov.br/api/v3/malhas/estados/33"
+    "?formato=application/vnd.geo+json&intrarregiao=municipio"
+)
+IBGE_MUNICIPIOS_URL = "https://servicodados.ibge.gov.br/api/v1/localidades/estados/33/municipios"
+
+# Sede dos 92 municípios do RJ (lat, lng)
+MUNICIPIOS_RJ = {
+    'Angra dos Reis': (-23.0067, -44.3181),
+    'Aperibé': (-21.6252, -42.1017),
+    'Araruama': (-22.8697, -42.3431),
+    'Areal': (-22.2283, -43.1118),
+    'Armação dos Búzios': (-22.7528, -41.8817),
+    'Arraial do Cabo': (-22.9661, -42.0278),
+    'Barra do Piraí': (-22.4714, -43.8269),
+    'Barra Mansa': (-22.5442, -44.1714),
+    'Belford Roxo': (-22.7641, -43.3995),
+    'Bom Jardim': (-22.1545, -42.4190),
+    'Bom Jesus do Itabapoana': (-21.1339, -41.6798),
+    'Cabo Frio': (-22.8789, -42.0189),
+    'Cachoeiras de Macacu': (-22.4658, -42.6523),
+    'Cambuci': (-21.5691, -41.9187),
+    'Campos dos Goytacazes': (-21.7522, -41.3244),
+    'Cantagalo': (-21.9797, -42.3664),
+    'Carapebus': (-22.1821, -41.6630),
+    'Cardoso Moreira': (-21.4846, -41.6165),
+    'Carmo': (-21.9310, -42.6046),
+    'Casimiro de Abreu': (-22.4812, -42.2066),
+    'Comendador Levy Gasparian': (-22.0404, -43.2140),
+    'Conceição de Macabu': (-22.0834, -41.8719),
+    'Cordeiro': (-22.0267, -42.3648),
+    'Duas Barras': (-22.0536, -42.5232),
+    'Duque de Caxias': (-22.7858, -43.3054),
+    'Engenheiro Paulo de Frontin': (-22.5498, -43.6827),
+    'Guapimirim': (-22.5372, -42.9817),
+    'Iguaba Grande': (-22.8495, -42.2299),
+    'Itaboraí': (-22.7475, -42.8594),
+    'Itaguaí': (-22.8522, -43.7753),
+    'Italva': (-21.4296, -41.6970),
+    'Itaocara': (-21.6748, -42.0758),
+    'Itaperuna': (-21.1997, -41.8799),
+    'Itatiaia': (-22.4897, -44.5675),
+    'Japeri': (-22.6431, -43.6533),
+    'Laje do Muriaé': (-21.2091, -42.1271),
+    'Macaé': (-22.3708, -41.7869),
+    'Macuco': (-21.9813, -42.2533),
+    'Magé': (-22.6556, -43.0403),
+    'Mangaratiba': (-22.9594, -44.0409),
+    'Maricá': (-22.9194, -42.8186),
+    'Mendes': (-22.5245, -43.7312),
+    'Mesquita': (-22.7828, -43.4317),
+    'Miguel Pereira': (-22.4572, -43.4803),
+    'Miracema': (-21.4148, -42.1938),
+    'Natividade': (-21.0390, -41.9697),
+    'Nilópolis': (-22.8079, -43.4145),
+    'Niterói': (-22.8833, -43.1036),
+    'Nova Friburgo': (-22.2819, -42.5311),
+    'Nova Iguaçu': (-22.7592, -43.4509),
+    'Paracambi': (-22.6108, -43.7108),
+    'Paraíba do Sul': (-22.1585, -43.2926),
+    'Paraty': (-23.2221, -44.7175),
+    'Paty do Alferes': (-22.4309, -43.4285),
+    'Petrópolis': (-22.5050, -43.1786),
+    'Pinheiral': (-22.5128, -44.0006),
+    'Piraí': (-22.6215, -43.8981),
+    'Porciúncula': (-20.9632, -42.0465),
+    'Porto Real': (-22.4175, -44.2952),
+    'Quatis': (-22.4045, -44.2597),
+    'Queimados': (-22.7161, -43.5553),
+    'Quissamã': (-22.1031, -41.4693),
+    'Resende': (-22.4686, -44.4469),
+    'Rio Bonito': (-22.7181, -42.6276),
+    'Rio Claro': (-22.7200, -44.1419),
+    'Rio das Flores': (-22.1692, -43.5856),
+    'Rio das Ostras': (-22.5174, -41.9475),
+    'Rio de Janeiro': (-22.9068, -43.1729),
+    'Santa Maria Madalena': (-21.9547, -42.0098),
+    'Santo Antônio de Pádua': (-21.5410, -42.1832),
+    'São Fidélis': (-21.6551, -41.7470),
+    'São Francisco de Itabapoana': (-21.4702, -41.1091),
+    'São Gonçalo': (-22.8268, -43.0534),
+    'São João da Barra': (-21.6380, -41.0446),
+    'São João de Meriti': (-22.8041, -43.3722),
+    'São José de Ubá': (-21.3661, -41.9511),
+    'São José do Vale do Rio Preto': (-22.1525, -42.9327),
+    'São Pedro da Aldeia': (-22.8429, -42.1026),
+    'São Sebastião do Alto': (-21.9578, -42.1328),
+    'Sapucaia': (-21.9949, -42.9142),
+    'Saquarema': (-22.9292, -42.5099),
+    'Seropédica': (-22.7444, -43.7075),
+    'Silva Jardim': (-22.6574, -42.3961),
+    'Sumidouro': (-22.0485, -42.6761),
+    'Tanguá': (-22.7423, -42.7202),
+    'Teresópolis': (-22.4125, -42.9664),
+    'Trajano de Moraes': (-22.0638, -42.0643),
+    'Três Rios': (-22.1165, -43.2185),
+    'Valença': (-22.2445, -43.7129),
+    'Varre-Sai': (-20.9276, -41.8701),
+    'Vassouras': (-22.4059, -43.6686),
+    'Volta Redonda': (-22.5231, -44.1042),
+}
+
+# Grafias do ISP-RJ / IBGE que diferem das chaves acima (por slug)
+ALIASES = {
+    'parati': 'paraty',
+    'armacao_de_buzios': 'armacao_dos_buzios',
+    'trajano_de_morais': 'trajano_de_moraes',
+}
+
+CENTROID_JITTER = 0.03  # ~3km
+
+
+class Area:
+    """Polígono (ou multipolígono) com amostragem vetorizada de pontos"""
+
+    def __init__(self, rings: List[np.ndarray]):
+        # rings: arrays (N, 2) de (lng, lat); buracos entram pela regra par-ímpar
+        self.rings = rings
+        pontos = np.vstack(rings)
+        self.min_lng, self.min_lat = pontos.min(axis=0)
+        self.max_lng, self.max_lat = pontos.max(axis=0)
+
+        # Edges de todos os anéis, para o teste ponto-no-polígono. Horizontais
+        # nunca cruzam o raio; as demais ficam ordenadas pelo y mínimo para
+        # cada bloco testar só as que alcançam a sua faixa de latitude
+        x1 = np.concatenate([r[:-1, 0] for r in rings])
+        y1 = np.concatenate([r[:-1, 1] for r in rings])
+        x2 = np.concatenate([r[1:, 0] for r in rings])
+        y2 = np.concatenate([r[1:, 1] for r in rings])
+        keep = y1 != y2
+        x1, y1, x2, y2 = x1[keep], y1[keep], x2[keep], y2[keep]
+
+        ordem = np.argsort(np.minimum(y1, y2), kind='stable')
+        self.x1, self.y1 = x1[ordem], y1[ordem]
+        self.slope = ((x2 - x1) / (y2 - y1))[ordem]
+        self.y_min = np.minimum(y1, y2)[ordem]
+        self.y_max = np.maximum(y1, y2)[ordem]
+
+        bbox_area = (self.max_lng - self.min_lng) * (self.max_lat - self.min_lat)
+        area = abs(sum(_shoelace(r) for r in rings))
+        self.fill_ratio = min(max(area / bbox_area, 0.05), 1.0) if bbox_area > 0 else 1.0
+
+    def contains(self, lng: np.ndarray, lat: np.ndarray, chunk: int = 2048) -> np.ndarray:
+        """Ray casting vetorizado (pontos x edges da faixa), em blocos por latitude"""
+        lng = np.asarray(lng, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        inside = np.zeros(len(lng), dtype=bool)
+
+        # Pontos em ordem de latitude: cada bloco cobre uma faixa estreita e
+        # cruza poucas edges (em vez de todas)
+        ordem = np.argsort(lat, kind='stable')
+        for start in range(0, len(lng), chunk):
+            idx = ordem[start:start + chunk]
+            py = lat[idx]
+            lo, hi = py[0], py[-1]
+
+            # Edges com y_min <= hi (prefixo) e y_max > lo
+            fim = np.searchsorted(self.y_min, hi, side='right')
+            sel = np.flatnonzero(self.y_max[:fim] > lo)
+            if not len(sel):
+                continue
+
+            px = lng[idx, None]
+            py = py[:, None]
+            crosses = (self.y_min[sel] <= py) & (py < self.y_max[sel])
+            x_cross = self.x1[sel] + (py - self.y1[sel]) * self.slope[sel]
+            hits = np.count_nonzero(crosses & (px < x_cross), axis=1)
+
+            inside[idx] = hits % 2 == 1
+
+        return inside
+
+    def sample(self, n: int, rng: np.random.Generator, max_rounds: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorteia n pontos uniformes dentro da área (rejeição + reposição)"""
+        lat = np.empty(n)
+        lng = np.empty(n)
+        filled = 0
+
+        for _ in range(max_rounds):
+            missing = n - filled
+            if missing == 0:
+                break
+
+            # Sorteia o suficiente para completar em ~1 rodada
+            k = int(missing / self.fill_ratio * 1.2) + 16
+            x = rng.uniform(self.min_lng, self.max_lng, k)
+            y = rng.uniform(self.min_lat, self.max_lat, k)
+            ok = self.contains(x, y)
+
+            take = min(int(ok.sum()), missing)
+            lng[filled:filled + take] = x[ok][:take]
+            lat[filled:filled + take] = y[ok][:take]
+            filled += take
+
+        if filled < n:
+            # Polígono degenerado: completa no centro do bbox
+            lat[filled:] = (self.min_lat + self.max_lat) / 2
+            lng[filled:] = (self.min_lng + self.max_lng) / 2
+
+        return lat, lng
+
+
+class AreaGeocoder:
+    """Coordenadas para incidentes agregados por município/CISP"""
+
+    def __init__(self, rng: np.random.Generator,
+                 municipios_file: Path = MUNICIPIOS_FILE,
+                 cisp_file: Path = CISP_FILE,
+                 require_cisp: bool = True):
+        """
+        Raises:
+            FileNotFoundError: Sem a malha municipal, ou sem a de CISPs
+                               quando require_cisp (ver docstring do módulo)
+        """
+        if not Path(municipios_file).exists():
+            raise FileNotFoundError(
+                f"Malha municipal não encontrada: {municipios_file}\n"
+                f"  Gere com: python -m app.services.area_geocoder --baixar"
+            )
+        if require_cisp and not Path(cisp_file).exists():
+            raise FileNotFoundError(
+                f"Malha de CISPs não encontrada: {cisp_file}\n"
+                f"  Gere com: python -m app.services.area_geocoder --cisp <geojson do ISP> --campo <coluna>\n"
+                f"  (ou importe só por município: python import_isp_rj.py --sem-cisp)"
+            )
+
+        self.rng = rng
+        self.municipios = _load_areas(municipios_file, 'nome', key=_municipio_key)
+        self.cisps = _load_areas(cisp_file, 'cisp', key=_cisp_key)
+        self.centroids = {_municipio_key(nome): coords for nome, coords in MUNICIPIOS_RJ.items()}
+        self.unknown = set()
+
+    def sample(self, municipality: np.ndarray, cisp: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sorteia uma coordenada por linha, dentro da área de cada linha
+
+        Args:
+            municipality: Array com o nome do município de cada linha
+            cisp: Array opcional com o código da CISP de cada linha
+
+        Returns:
+            (lat, lng) como arrays do mesmo tamanho (NaN nos municípios
+            desconhecidos, listados em self.unknown)
+        """
+        n = len(municipality)
+        lat = np.empty(n)
+        lng = np.empty(n)
+
+        # Uma amostragem por área (não por linha)
+        keys = np.asarray(municipality, dtype=str)
+        if cisp is not None and self.cisps:
+            keys = np.char.add(np.char.add(keys, '|'), np.asarray(cisp, dtype=str))
+
+        unique, inverse = np.unique(keys, return_inverse=True)
+
+        for group, key in enumerate(unique):
+            rows = np.flatnonzero(inverse == group)
+            munic, _, cisp_code = key.partition('|')
+            lat[rows], lng[rows] = self._sample_area(munic, cisp_code, len(rows))
+
+        return lat, lng
+
+    def _sample_area(self, municipality: str, cisp: str, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        area = self.cisps.get(_cisp_key(cisp)) if cisp else None
+        if area is None:
+            area = self.municipios.get(_municipio_key(municipality))
+
+        if area is not None:
+            return area.sample(n, self.rng)
+
+        center = self.centroids.get(_municipio_key(municipality))
+        if center is None:
+            self.unknown.add(str(municipality))
+            return np.full(n, np.nan), np.full(n, np.nan)
+
+        lat = center[0] + self.rng.uniform(-CENTROID_JITTER, CENTROID_JITTER, n)
+        lng = center[1] + self.rng.uniform(-CENTROID_JITTER, CENTROID_JITTER, n)
+
+        return lat, lng
+
+
+def _shoelace(ring: np.ndarray) -> float:
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+
+def _municipio_key(nome: str) -> str:
+    """'Parati' e 'Paraty' -> 'paraty'"""
+    chave = slug(nome)
+    return ALIASES.get(chave, chave)
+
+
+def _cisp_key(value) -> str:
+    """'5', 5, 5.0 -> '5'"""
+    try:
+        return str(int(float(value)))
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _load_areas(path: Path, prop: str, key) -> Dict[str, Area]:
+    """Carrega GeoJSON (Polygon/MultiPolygon) indexado por uma propriedade"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    areas = {}
+    for feature in data.get('features', []):
+        value = feature.get('properties', {}).get(prop)
+        geometry = feature.get('geometry') or {}
+        if value is None:
+            continue
+
+        if geometry.get('type') == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry.get('type') == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            continue
+
+        rings = [np.asarray(ring, dtype=float)[:, :2] for polygon in polygons for ring in polygon]
+        areas[key(value)] = Area(rings)
+
+    return areas
+
+
+def download_municipios(path: Path = MUNICIPIOS_FILE) -> Path:
+    """Baixa a malha municipal do RJ (IBGE) e grava com a propriedade "nome" """
+    import requests
+
+    malha = requests.get(IBGE_MALHA_URL, timeout=60).json()
+    nomes = {
+        str(m['id']): m['nome']
+        for m in requests.get(IBGE_MUNICIPIOS_URL, timeout=60).json()
+    }
+
+    for feature in malha.get('features', []):
+        codigo = str(feature.get('properties', {}).get('codarea'))
+        feature['properties']['nome'] = nomes.get(codigo)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(malha, f, ensure_ascii=False)
+
+    return path
+
+
+def convert_cisp(source: Path, campo: str, path: Path = CISP_FILE) -> int:
+    """
+    Grava a malha de CISPs com a propriedade "cisp"
+
+    source: GeoJSON em WGS84 dos limites do ISP-RJ (ex.: ogr2ogr do shapefile)
+    campo: propriedade de source com o número da CISP
+    """
+    with open(source, 'r', encoding='utf-8') as f:
+        malha = json.load(f)
+
+    features = []
+    for feature in malha.get('features', []):
+        valor = (feature.get('properties') or {}).get(campo)
+        if valor is None:
+            continue
+        feature['properties'] = {'cisp': _cisp_key(valor)}
+        features.append(feature)
+
+    if not features:
+        raise ValueError(f"Nenhuma feição com a propriedade '{campo}' em {source}")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f, ensure_ascii=False)
+
+    return len(features)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gera as malhas usadas pelo AreaGeocoder")
+    parser.add_argument("--baixar", action="store_true", help="Baixa a malha municipal do IBGE")
+    parser.add_argument("--cisp", type=Path, help="GeoJSON (WGS84) dos limites de CISP do ISP-RJ")
+    parser.add_argument("--campo", default="cisp", help="Propriedade com o número da CISP")
+    args = parser.parse_args()
+
+    if args.baixar:
+        print(f"✓ Malha salva em: {download_municipios()}")
+    if args.cisp:
+        print(f"✓ {convert_cisp(args.cisp, args.campo)} CISPs salvas em: {CISP_FILE}")
+    if not (args.baixar or args.cisp):
+        parser.print_help()
@@ -0,0 +1,325 @@
+"""
+SafeDrive RJ - Backfill histórico em paralelo (shards de período × fonte)
+
+    * A janela (ex.: 5 anos) é dividida em períodos de `days` dias e cada
+      período × fonte vira um shard independente. Os períodos contam a
+      partir de EPOCH, não do início da janela: a mesma data cai sempre
+      no mesmo shard, em qualquer dia em que o backfill rode
+    * Um pool de workers (tarefas asyncio) reserva e processa shards; o
+      worker grava um checkpoint (cursor livre, ex.: {"page": 4}) a cada
+      passo, e o shard termina como done ou failed
+    * Estado em SQLite (WAL): vários processos podem usar o mesmo arquivo.
+      A reserva é atômica e tem prazo (lease), então o shard de um
+      processo que morreu volta para a fila quando o prazo vence
+    * Reexecutar retoma de onde parou: shards done são pulados e os
+      demais continuam do último checkpoint
+    * Shard que falhou só volta depois de retry_delay (dobrando a cada
+      tentativa), para não martelar uma fonte fora do ar
+
+Uso:
+    store = BackfillStore()
+    store.add(make_shards(['G1'], date(2020, 1, 1), date.today(), days=30))
+    coordinator = BackfillCoordinator(store, worker, workers=4)
+    asyncio.run(coordinator.run())
+
+`worker.run_shard(shard, checkpoint)` processa um shard a partir de
+`shard.cursor` e chama checkpoint(cursor, items) a cada passo concluído.
+Pode ser corrotina (roda no loop) ou função (roda numa thread).
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from app.services.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_FILE = Path.home() / '.safedrive_backfill.db'
+
+# Estados de um shard
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Origem fixa dos períodos dos shards
+EPOCH = date(2000, 1, 1)
+
+
+class Shard:
+    """Período [start, end) de uma fonte"""
+
+    def __init__(self, source: str, start: date, end: date, cursor: Optional[Dict] = None,
+                 items: int = 0, attempts: int = 0):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.cursor = cursor or {}
+        self.items = items
+        self.attempts = attempts
+
+    @property
+    def key(self) -> str:
+        return f"{self.source}:{self.start.isoformat()}:{self.end.isoformat()}"
+
+    def __repr__(self):
+        return f"Shard({self.key})"
+
+
+def period_start(dia: date, days: int = 30) -> date:
+    """Início do período de `days` dias (contados de EPOCH) que contém o dia"""
+    return EPOCH + timedelta(days=(dia - EPOCH).days // days * days)
+
+
+def make_shards(sources: Iterable[str], start: date, end: date, days: int = 30) -> List[Shard]:
+    """
+    Períodos de `days` dias que cobrem [start, end), para cada fonte (mais recentes primeiro)
+
+    Os limites são alinhados a EPOCH (start arredondado para baixo, end
+    para cima), então as chaves não dependem da data da execução.
+    """
+    periodos = []
+    inicio = period_start(start, days)
+    while inicio < end:
+        fim = inicio + timedelta(days=days)
+        periodos.append((inicio, fim))
+        inicio = fim
+
+    return [
+        Shard(source, inicio, fim)
+        for inicio, fim in reversed(periodos)
+        for source in sources
+    ]
+
+
+class BackfillStore:
+    """Shards e checkpoints em SQLite (compartilhável entre processos)"""
+
+    def __init__(self, path: Path = BACKFILL_FILE):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS shards (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                cursor TEXT,
+                items INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                lease_until REAL,
+                error TEXT,
+                updated_at REAL,
+                not_before REAL
+            )
+        """)
+        # Arquivos de antes do retry com espera
+        colunas = {row[1] for row in self.conn.execute("PRAGMA table_info(shards)")}
+        if 'not_before' not in colunas:
+            self.conn.execute("ALTER TABLE shards ADD COLUMN not_before REAL")
+        self.conn.commit()
+
+    def add(self, shards: Iterable[Shard]) -> int:
+        """Registra shards novos (os já existentes mantêm estado e checkpoint)"""
+        with self.lock:
+            cursor = self.conn.executemany("""
+                INSERT INTO shards (key, source, start_date, end_date, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO NOTHING
+            """, [
+                (shard.key, shard.source, shard.start.isoformat(), shard.end.isoformat(), time.time())
+                for shard in shards
+            ])
+            self.conn.commit()
+            return cursor.rowcount
+
+    def claim(self, owner: str, lease: float, max_attempts: int) -> Optional[Shard]:
+        """
+        Reserva o próximo shard (mais recente primeiro), numa única instrução
+
+        Elegíveis: pendentes, falhos com tentativas sobrando (e cuja espera
+        já passou) e os "running" cujo lease venceu (processo morreu ou travou).
+        """
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("""
+                UPDATE shards SET
+                    status = 'running',
+                    owner = ?,
+                    lease_until = ?,
+                    attempts = attempts + 1,
+                    updated_at = ?
+                WHERE key = (
+                    SELECT key FROM shards
+                    WHERE status = 'pending'
+                       OR (status = 'failed' AND attempts < ? AND COALESCE(not_before, 0) <= ?)
+                       OR (status = 'running' AND lease_until < ?)
+                    ORDER BY start_date DESC, source
+                    LIMIT 1
+                )
+                RETURNING source, start_date, end_date, cursor, items, attempts
+            """, (owner, now + lease, now, max_attempts, now, now)).fetchone()
+            self.conn.commit()
+
+        if row is None:
+            return None
+
+        source, start, end, cursor, items, attempts = row
+        return Shard(source, date.fromisoformat(start), date.fromisoformat(end),
+                     json.loads(cursor) if cursor else {}, items, attempts)
+
+    def checkpoint(self, shard: Shard, owner: str, lease: float, cursor: Dict, items: int = 0):
+        """Grava o cursor do shard, soma itens e renova o lease"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("""
+                UPDATE shards SET
+                    cursor = ?,
+                    items = items + ?,
+                    lease_until = ?,
+                    updated_at = ?
+                WHERE key = ? AND owner = ?
+            """, (json.dumps(cursor), items, now + lease, now, shard.key, owner))
+            self.conn.commit()
+
+    def finish(self, shard: Shard, owner: str, status: str, error: str = None,
+               retry_in: Optional[float] = None):
+        """Encerra o shard; falho com retry_in só pode ser reservado depois desses segundos"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("""
+                UPDATE shards SET
+                    status = ?,
+                    error = ?,
+                    lease_until = NULL,
+                    not_before = ?,
+                    updated_at = ?
+                WHERE key = ? AND owner = ?
+            """, (status, error, now + retry_in if retry_in else None, now, shard.key, owner))
+            self.conn.commit()
+
+    def next_retry(self, max_attempts: int) -> Optional[float]:
+        """Segundos até o próximo shard falho poder ser retomado (None se não houver)"""
+        with self.lock:
+            row = self.conn.execute("""
+                SELECT MIN(COALESCE(not_before, 0)) FROM shards
+                WHERE status = 'failed' AND attempts < ?
+            """, (max_attempts,)).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def summary(self) -> Dict[str, int]:
+        """Shards por status + total de itens"""
+        with self.lock:
+            rows = self.conn.execute("""
+                SELECT status, COUNT(*), SUM(items) FROM shards GROUP BY status
+            """).fetchall()
+
+        resumo = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0, 'items': 0}
+        for status, count, items in rows:
+            resumo[status] = count
+            resumo['items'] += items or 0
+        return resumo
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class BackfillCoordinator:
+    """Pool de workers que consome os shards do store até acabarem"""
+
+    def __init__(self, store: BackfillStore, worker, workers: int = 4,
+                 lease: float = 1800.0, max_attempts: int = 3, retry_delay: float = 60.0,
+                 owner: Optional[str] = None):
+        """
+        Args:
+            worker: Objeto com run_shard(shard, checkpoint) -> itens
+            workers: Shards processados ao mesmo tempo neste processo
+            lease: Segundos sem checkpoint até o shard poder ser retomado
+                   por outro processo
+            max_attempts: Tentativas por shard (somando todas as execuções)
+            retry_delay: Espera (s) antes de retomar um shard que falhou,
+                         dobrada a cada tentativa
+        """
+        self.store = store
+        self.worker = worker
+        self.workers = workers
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.items = 0
+        self.stats = {DONE: 0, FAILED: 0}
+
+    async def run(self) -> Dict[str, int]:
+        """Processa shards até não sobrar nenhum elegível; retorna store.summary()"""
+        inicio = time.monotonic()
+        await asyncio.gather(*(self._worker(i) for i in range(self.workers)))
+
+        resumo = self.store.summary()
+        logger.info(
+            f"🏁 Backfill: {self.stats[DONE]} shards concluídos, {self.stats[FAILED]} falharam, "
+            f"{self.items} itens em {time.monotonic() - inicio:.0f}s "
+            f"(geral: {resumo[DONE]} done, {resumo[PENDING]} pendentes, {resumo[FAILED]} falhos)"
+        )
+        return resumo
+
+    async def _worker(self, n: int):
+        while True:
+            shard = self.store.claim(self.owner, self.lease, self.max_attempts)
+            if shard is None:
+                # Só sobraram falhos esperando a vez: aguarda o primeiro
+                espera = self.store.next_retry(self.max_attempts)
+                if espera is None:
+                    return
+                await asyncio.sleep(espera)
+                continue
+
+            retomado = f" (retomado de {shard.cursor})" if shard.cursor else ""
+            logger.info(f"▶️  [{n}] {shard.key}{retomado}")
+            inicio, antes = time.monotonic(), shard.items
+
+            def checkpoint(cursor: Dict, items: int = 0, shard=shard):
+                shard.cursor = cursor
+                shard.items += items
+                self.items += items
+                self.store.checkpoint(shard, self.owner, self.lease, cursor, items)
+
+            try:
+                await self._call(shard, checkpoint)
+            except asyncio.CancelledError:
+                # Interrompido (Ctrl+C): volta para a fila, com o último checkpoint
+                self.store.finish(shard, self.owner, PENDING)
+                raise
+            except Exception as e:
+                self.stats[FAILED] += 1
+                self.store.finish(shard, self.owner, FAILED, f"{type(e).__name__}: {e}",
+                                  retry_in=self.retry_delay * 2 ** (shard.attempts - 1))
+                logger.error(f"❌ [{n}] {shard.key}: {e} (tentativa {shard.attempts}/{self.max_attempts})")
+                continue
+
+            self.stats[DONE] += 1
+            self.store.finish(shard, self.owner, DONE)
+            METRICS.run(f"backfill:{shard.source}", time.monotonic() - inicio, shard.items - antes)
+            logger.info(f"✅ [{n}] {shard.key}: {shard.items} itens em {time.monotonic() - inicio:.0f}s")
+
+    async def _call(self, shard: Shard, checkpoint):
+        if inspect.iscoroutinefunction(self.worker.run_shard):
+            return await self.worker.run_shard(shard, checkpoint)
+        return await asyncio.to_thread(self.worker.run_shard, shard, checkpoint)
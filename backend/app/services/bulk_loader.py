@@ -0,0 +1,267 @@
+"""
+SafeDrive RJ - Bulk Loader de crime_incidents
+Carga em massa via COPY FROM STDIN -> tabela staging -> merge set-based
+
+Uso:
+    loader = CrimeBulkLoader(conn)
+    inseridos = loader.load(registros)  # iterável de dicts
+    inseridos = loader.load_arrow(batches)  # iterável de pyarrow.RecordBatch
+
+Cada dict usa as mesmas chaves das colunas de crime_incidents
+(crime_type, latitude, longitude, occurred_at, source, source_id...).
+location_point é calculado no banco, no merge. Endereço longo demais
+(rua, bairro, cidade) é cortado no tamanho da coluna; se o COPY de uma
+página falhar (valor inválido), a página é carregada linha a linha e as
+linhas recusadas vão para o log.
+
+Requer o índice único (source, source_id) de database_schema.sql.
+"""
+
+import csv
+import io
+import logging
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import psycopg2
+
+from app.services.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Colunas aceitas pelo loader (ordem do COPY)
+COLUMNS = (
+    'crime_type',
+    'latitude',
+    'longitude',
+    'street_name',
+    'neighborhood',
+    'city',
+    'state',
+    'occurred_at',
+    'description',
+    'source',
+    'source_id',
+    'verified',
+    'confidence_score',
+)
+
+STAGING_TABLE = 'crime_incidents_staging'
+
+# Endereço em TEXT na staging: o merge corta no tamanho de crime_incidents
+STAGING_DDL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        crime_type VARCHAR(50),
+        latitude DOUBLE PRECISION,
+        longitude DOUBLE PRECISION,
+        street_name TEXT,
+        neighborhood TEXT,
+        city TEXT,
+        state VARCHAR(2),
+        occurred_at TIMESTAMP,
+        description TEXT,
+        source VARCHAR(50),
+        source_id VARCHAR(100),
+        verified BOOLEAN,
+        confidence_score DECIMAL(3,2)
+    )
+"""
+
+# Merge: valida, calcula location_point, corta o endereço e ignora duplicatas (source, source_id)
+MERGE_SQL = f"""
+    INSERT INTO crime_incidents (
+        crime_type, latitude, longitude, location_point,
+        street_name, neighborhood, city, state, occurred_at,
+        description, source, source_id, verified, confidence_score
+    )
+    SELECT
+        crime_type, latitude, longitude,
+        ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography,
+        LEFT(street_name, 255), LEFT(neighborhood, 100),
+        COALESCE(LEFT(city, 100), 'Rio de Janeiro'), COALESCE(state, 'RJ'), occurred_at,
+        description, source, source_id,
+        COALESCE(verified, FALSE), COALESCE(confidence_score, 1.0)
+    FROM {STAGING_TABLE}
+    WHERE crime_type IS NOT NULL
+      AND source IS NOT NULL
+      AND occurred_at IS NOT NULL
+      AND latitude BETWEEN -90 AND 90
+      AND longitude BETWEEN -180 AND 180
+    ON CONFLICT (source, source_id) DO NOTHING
+"""
+
+COPY_SQL = "COPY " + STAGING_TABLE + " ({columns}) FROM STDIN WITH (FORMAT csv)"
+
+
+class CrimeBulkLoader:
+    """Carga em massa de incidentes (COPY + merge em SQL)"""
+
+    def __init__(self, db_conn, page_size: int = 50000):
+        self.conn = db_conn
+        self.page_size = page_size
+        self.total_rows = 0
+        self.total_inserted = 0
+        self.total_rejected = 0
+
+    def load(self, rows: Iterable[Dict], commit: bool = True) -> int:
+        """
+        Carrega registros em páginas de page_size
+
+        Args:
+            rows: Iterável de dicts (pode ser um generator)
+            commit: Commitar ao final (uma transação para tudo)
+
+        Returns:
+            Número de linhas inseridas (sem contar duplicatas)
+        """
+        inserted = 0
+
+        with self.conn.cursor() as cursor:
+            cursor.execute(STAGING_DDL)
+
+            for page in self._pages(rows):
+                inserted += self._copy_and_merge(cursor, page)
+
+        if commit:
+            self.conn.commit()
+
+        return inserted
+
+    def load_arrow(self, batches: Iterable, commit: bool = True) -> int:
+        """
+        Carrega record batches do Arrow (geradores vetorizados)
+
+        As colunas de cada batch devem ter os nomes de COLUMNS
+        (qualquer subconjunto, em qualquer ordem). Cada batch vira
+        uma página do COPY, sem criar um dict por linha.
+        """
+        # pyarrow só é necessário para quem usa este caminho
+        import pyarrow.csv as pa_csv
+
+        write_options = pa_csv.WriteOptions(include_header=False)
+        inserted = 0
+
+        def csv_buffer(batch):
+            buffer = io.BytesIO()
+            pa_csv.write_csv(batch, buffer, write_options=write_options)
+            return buffer
+
+        with self.conn.cursor() as cursor:
+            cursor.execute(STAGING_DDL)
+
+            for batch in batches:
+                unknown = set(batch.schema.names) - set(COLUMNS)
+                if unknown:
+                    raise ValueError(f"Colunas desconhecidas: {sorted(unknown)}")
+
+                inserted += self._merge_buffer(
+                    cursor, csv_buffer(batch), batch.num_rows, batch.schema.names,
+                    rows=lambda batch=batch: (csv_buffer(batch.slice(i, 1)) for i in range(batch.num_rows)),
+                )
+
+        if commit:
+            self.conn.commit()
+
+        return inserted
+
+    def _pages(self, rows: Iterable[Dict]) -> Iterator[List[Dict]]:
+        """Agrupa o iterável em listas de page_size (memória limitada)"""
+        page = []
+        for row in rows:
+            page.append(row)
+            if len(page) >= self.page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def _copy_and_merge(self, cursor, page: List[Dict]) -> int:
+        """Serializa a página em CSV e manda para o banco"""
+        return self._merge_buffer(
+            cursor, _csv_buffer(page), len(page),
+            rows=lambda: (_csv_buffer([row]) for row in page),
+        )
+
+    def _merge_buffer(self, cursor, buffer, n_rows: int, columns=COLUMNS,
+                      rows: Optional[Callable[[], Iterator]] = None) -> int:
+        """
+        COPY para staging, merge em crime_incidents e limpa staging
+
+        rows: buffers de uma linha cada, para carregar linha a linha
+              se o COPY da página inteira falhar
+        """
+        inicio = time.perf_counter()
+        copy_sql = COPY_SQL.format(columns=', '.join(columns))
+        rejected = 0
+
+        cursor.execute("SAVEPOINT bulk_page")
+        try:
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+        except psycopg2.Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT bulk_page")
+            if rows is None:
+                raise
+            logger.warning(f"⚠️ COPY de {n_rows} linhas falhou ({_erro(e)}); carregando linha a linha")
+            rejected = self._copy_rows(cursor, copy_sql, rows())
+        cursor.execute("RELEASE SAVEPOINT bulk_page")
+
+        cursor.execute(MERGE_SQL)
+        inserted = max(cursor.rowcount, 0)
+        cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+
+        segundos = time.perf_counter() - inicio
+        METRICS.observe('db_write_seconds', segundos, table='crime_incidents')
+        METRICS.observe('stage_seconds', segundos, stage='db_write')
+        METRICS.inc('db_rows_total', n_rows, table='crime_incidents', result='sent')
+        METRICS.inc('db_rows_total', inserted, table='crime_incidents', result='inserted')
+        if rejected:
+            METRICS.inc('db_rows_total', rejected, table='crime_incidents', result='rejected')
+
+        self.total_rows += n_rows
+        self.total_inserted += inserted
+        self.total_rejected += rejected
+
+        return inserted
+
+    def _copy_rows(self, cursor, copy_sql: str, rows: Iterator) -> int:
+        """COPY linha a linha (cada uma no seu savepoint); retorna as recusadas"""
+        rejected = 0
+        for buffer in rows:
+            cursor.execute("SAVEPOINT bulk_row")
+            try:
+                buffer.seek(0)
+                cursor.copy_expert(copy_sql, buffer)
+                cursor.execute("RELEASE SAVEPOINT bulk_row")
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT bulk_row")
+                rejected += 1
+                linha = buffer.getvalue()
+                if isinstance(linha, bytes):
+                    linha = linha.decode('utf-8', 'replace')
+                logger.warning(f"❌ Linha recusada ({_erro(e)}): {linha.strip()[:500]}")
+        return rejected
+
+
+def _csv_buffer(page: List[Dict]) -> io.StringIO:
+    """Dicts -> CSV do COPY, na ordem de COLUMNS"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for row in page:
+        writer.writerow([_csv_value(row.get(col)) for col in COLUMNS])
+    return buffer
+
+
+def _erro(e: psycopg2.Error) -> str:
+    return (e.pgerror or str(e)).strip().splitlines()[0]
+
+
+def _csv_value(value):
+    """Converte valor Python para campo CSV do COPY (None -> NULL)"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat(sep=' ') if hasattr(value, 'hour') else value.isoformat()
+    return value
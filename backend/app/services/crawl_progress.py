@@ -0,0 +1,77 @@
+"""
+Progresso de coleta à prova de queda (SQLite em modo WAL)
+
+Substitui o JSON reescrito a cada página: cada site é uma linha e cada
+página concluída é um UPSERT atômico, então sites coletados em paralelo
+não sobrescrevem o progresso uns dos outros e uma queda no meio da
+gravação não corrompe o arquivo.
+
+Uso:
+    progresso = CrawlProgress("progresso_coleta_v3.db", legado="progresso_coleta_v3.json")
+    dados = progresso.load({"G1 Rio": {"pagina_atual": 1, ...}})
+    progresso.save("G1 Rio", dados["G1 Rio"])
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+
+class CrawlProgress:
+    """Progresso por site (dict livre por site, gravado como JSON)"""
+
+    def __init__(self, path: str, legado: Optional[str] = None):
+        self.path = path
+        self.legado = legado
+        self.lock = threading.Lock()
+
+        # Callbacks do engine rodam em threads diferentes
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS progresso (
+                site TEXT PRIMARY KEY,
+                dados TEXT NOT NULL,
+                atualizado_em TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.conn.commit()
+
+    def load(self, padrao: Dict[str, Dict]) -> Dict[str, Dict]:
+        """
+        Progresso de cada site de `padrao` (sites sem registro usam o padrão)
+
+        Na primeira execução importa o JSON legado, se existir.
+        """
+        with self.lock:
+            salvos = {
+                site: json.loads(dados)
+                for site, dados in self.conn.execute("SELECT site, dados FROM progresso")
+            }
+
+        if not salvos and self.legado and os.path.exists(self.legado):
+            with open(self.legado, 'r') as f:
+                salvos = json.load(f)
+            for site, info in salvos.items():
+                self.save(site, info)
+
+        return {site: {**info, **salvos.get(site, {})} for site, info in padrao.items()}
+
+    def save(self, site: str, info: Dict):
+        """Grava o progresso de um site (uma transação)"""
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO progresso (site, dados, atualizado_em)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (site) DO UPDATE SET
+                    dados = excluded.dados,
+                    atualizado_em = excluded.atualizado_em
+            """, (site, json.dumps(info)))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
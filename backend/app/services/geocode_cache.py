@@ -0,0 +1,82 @@
+"""
+Cache persistente de geocodificação (SQLite em modo WAL)
+
+Chave = endereço normalizado + cidade ("avenida brasil|rio de janeiro rj"),
+então "Av. Brasil" e "AVENIDA BRASIL" são a mesma consulta. Endereços que
+o Nominatim não achou também são guardados (por NEGATIVE_TTL_DAYS), para
+não gastar 1 s de rate limit com eles a cada execução.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.services.street_gazetteer import normalizar_endereco
+
+GEOCODE_CACHE_FILE = Path.home() / '.safedrive_geocode_cache.db'
+
+NEGATIVE_TTL_DAYS = 30
+
+# get() de uma chave que não está no cache
+MISS = object()
+
+
+def cache_key(address: str, city: str) -> str:
+    return f"{normalizar_endereco(address)}|{normalizar_endereco(city)}"
+
+
+class GeocodeCache:
+    """Coordenadas por endereço normalizado (None = não encontrado)"""
+
+    def __init__(self, path: Path = GEOCODE_CACHE_FILE):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocodes (
+                chave TEXT PRIMARY KEY,
+                lat REAL,
+                lng REAL,
+                fonte TEXT NOT NULL,
+                criado_em REAL NOT NULL
+            )
+        """)
+        self.conn.execute(
+            "DELETE FROM geocodes WHERE lat IS NULL AND criado_em < ?",
+            (time.time() - NEGATIVE_TTL_DAYS * 86400,)
+        )
+        self.conn.commit()
+
+    def get(self, address: str, city: str):
+        """(lat, lng), None (já procurado e não achado) ou MISS"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT lat, lng FROM geocodes WHERE chave = ?", (cache_key(address, city),)
+            ).fetchone()
+
+        if row is None:
+            return MISS
+        return None if row[0] is None else (row[0], row[1])
+
+    def put(self, address: str, city: str, coords: Optional[Tuple[float, float]], fonte: str = 'nominatim'):
+        lat, lng = coords if coords else (None, None)
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO geocodes (chave, lat, lng, fonte, criado_em)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (chave) DO UPDATE SET
+                    lat = excluded.lat,
+                    lng = excluded.lng,
+                    fonte = excluded.fonte,
+                    criado_em = excluded.criado_em
+            """, (cache_key(address, city), lat, lng, fonte, time.time()))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
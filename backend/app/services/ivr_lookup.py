@@ -0,0 +1,536 @@
+"""
+SafeDrive RJ - Risco por modelo de veículo (ranking IVR da SUSEP)
+
+O ranking completo (a mesma tabela que o app.py exibe) é baixado, salvo em
+~/.safedrive_susep_ivr.json e carregado uma vez num índice normalizado:
+    1. Chave exata       ("VW" + "Gol 1.0" -> "volkswagen gol 1 0")
+    2. Prefixo (bisect)  ("volkswagen gol" -> versão com mais veículos expostos)
+    3. Trigramas         ("volkswagem gool", Jaccard >= limiar)
+Com marca desconhecida, a busca é só pelo modelo (em todas as marcas).
+
+Consultas passam por um LRU, refeito a cada troca de índice. Uma thread
+renova a tabela a cada REFRESH_INTERVAL; antes da 1ª carga (ou sem rede)
+vale o arquivo salvo e, sem ele, a base local LOCAL_IVR.
+
+Escala: 'ivr' sai sempre de 0 a 1, como na base local e no padrão do
+SusepScraper. A tabela oficial publica em % (classificada em % com os
+cortes do app.py) e é dividida por 100 ao montar o índice.
+
+Uso:
+    risco = IVR_LOOKUP.lookup("Volkswagen", "Tiguan")
+    # {'marca', 'modelo', 'ivr', 'risco', 'ranking', 'fonte', 'via'} ou None
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.street_gazetteer import trigramas
+from app.utils.texto import remover_acentos
+
+logger = logging.getLogger(__name__)
+
+URL_SUSEP_IVR = "https://www2.susep.gov.br/menuestatistica/rankroubo/resp_menu1.asp"
+
+SUSEP_FILE = Path.home() / '.safedrive_susep_ivr.json'
+
+# Renovação da tabela (a SUSEP publica poucas vezes por ano)
+REFRESH_INTERVAL = 24 * 3600
+RETRY_INTERVAL = 30 * 60
+
+# Consultas distintas guardadas no LRU
+CACHE_SIZE = 4096
+
+FONTE_SUSEP = "SUSEP IVR (ranking oficial)"
+FONTE_LOCAL = "SUSEP IVR 2025"
+
+# Siglas e grafias de marca -> nome usado no índice
+MARCAS = {
+    'vw': 'volkswagen',
+    'gm': 'chevrolet',
+    'chevy': 'chevrolet',
+    'mb': 'mercedes benz',
+    'm benz': 'mercedes benz',
+    'mercedes': 'mercedes benz',
+    'lr': 'land rover',
+}
+
+# Base local (antes montada a cada chamada em SusepScraper), usada até a
+# tabela oficial carregar. IVR de 0 a 1:
+#   > 0.50 = Muito Alto | 0.30-0.50 = Alto | 0.15-0.30 = Médio
+#   0.08-0.15 = Baixo   | < 0.08 = Muito Baixo
+LOCAL_IVR = {
+    # Volkswagen
+    "VOLKSWAGEN GOL": {"ivr": 0.85, "risco": "Muito Alto", "ranking": 2},
+    "VOLKSWAGEN POLO": {"ivr": 0.42, "risco": "Alto", "ranking": 45},
+    "VOLKSWAGEN FOX": {"ivr": 0.48, "risco": "Alto", "ranking": 32},
+    "VOLKSWAGEN VOYAGE": {"ivr": 0.45, "risco": "Alto", "ranking": 38},
+    "VOLKSWAGEN TIGUAN": {"ivr": 0.38, "risco": "Alto", "ranking": 52},
+    "VOLKSWAGEN SAVEIRO": {"ivr": 0.044, "risco": "Muito Baixo", "ranking": 1},
+    "VOLKSWAGEN AMAROK": {"ivr": 0.35, "risco": "Alto", "ranking": 58},
+    "VOLKSWAGEN T-CROSS": {"ivr": 0.42, "risco": "Alto", "ranking": 44},
+    "VOLKSWAGEN JETTA": {"ivr": 0.28, "risco": "Médio", "ranking": 62},
+
+    # Chevrolet
+    "CHEVROLET ONIX": {"ivr": 0.75, "risco": "Muito Alto", "ranking": 3},
+    "CHEVROLET PRISMA": {"ivr": 0.48, "risco": "Alto", "ranking": 33},
+    "CHEVROLET S10": {"ivr": 0.217, "risco": "Médio", "ranking": 78},
+    "CHEVROLET CRUZE": {"ivr": 0.28, "risco": "Médio", "ranking": 65},
+    "CHEVROLET SPIN": {"ivr": 0.25, "risco": "Médio", "ranking": 70},
+    "CHEVROLET TRACKER": {"ivr": 0.075, "risco": "Muito Baixo", "ranking": 3},
+    "CHEVROLET MONTANA": {"ivr": 0.173, "risco": "Baixo", "ranking": 85},
+
+    # Fiat
+    "FIAT PALIO": {"ivr": 0.82, "risco": "Muito Alto", "ranking": 4},
+    "FIAT UNO": {"ivr": 0.78, "risco": "Muito Alto", "ranking": 5},
+    "FIAT STRADA": {"ivr": 0.082, "risco": "Muito Baixo", "ranking": 4},
+    "FIAT ARGO": {"ivr": 0.45, "risco": "Alto", "ranking": 36},
+    "FIAT MOBI": {"ivr": 0.42, "risco": "Alto", "ranking": 43},
+    "FIAT TORO": {"ivr": 0.28, "risco": "Médio", "ranking": 64},
+    "FIAT CINQUECENTO": {"ivr": 0.074, "risco": "Muito Baixo", "ranking": 2},
+
+    # Ford
+    "FORD KA": {"ivr": 0.72, "risco": "Muito Alto", "ranking": 8},
+    "FORD FIESTA": {"ivr": 0.52, "risco": "Muito Alto", "ranking": 28},
+    "FORD FOCUS": {"ivr": 0.32, "risco": "Alto", "ranking": 60},
+    "FORD RANGER": {"ivr": 0.38, "risco": "Alto", "ranking": 51},
+    "FORD ECOSPORT": {"ivr": 0.35, "risco": "Alto", "ranking": 55},
+
+    # Hyundai
+    "HYUNDAI HB20": {"ivr": 0.95, "risco": "Muito Alto", "ranking": 1},
+    "HYUNDAI CRETA": {"ivr": 0.28, "risco": "Médio", "ranking": 66},
+    "HYUNDAI TUCSON": {"ivr": 0.25, "risco": "Médio", "ranking": 71},
+    "HYUNDAI I30": {"ivr": 0.52, "risco": "Muito Alto", "ranking": 29},
+    "HYUNDAI IX35": {"ivr": 0.52, "risco": "Muito Alto", "ranking": 30},
+
+    # Toyota
+    "TOYOTA COROLLA": {"ivr": 0.42, "risco": "Alto", "ranking": 42},
+    "TOYOTA HILUX": {"ivr": 0.45, "risco": "Alto", "ranking": 37},
+    "TOYOTA ETIOS": {"ivr": 0.38, "risco": "Alto", "ranking": 53},
+    "TOYOTA YARIS": {"ivr": 0.15, "risco": "Baixo", "ranking": 92},
+    "TOYOTA COROLLA CROSS": {"ivr": 0.12, "risco": "Baixo", "ranking": 98},
+
+    # Honda
+    "HONDA CIVIC": {"ivr": 0.48, "risco": "Alto", "ranking": 31},
+    "HONDA FIT": {"ivr": 0.42, "risco": "Alto", "ranking": 41},
+    "HONDA CITY": {"ivr": 0.28, "risco": "Médio", "ranking": 67},
+    "HONDA HR-V": {"ivr": 0.25, "risco": "Médio", "ranking": 72},
+
+    # Nissan
+    "NISSAN KICKS": {"ivr": 0.211, "risco": "Médio", "ranking": 80},
+    "NISSAN VERSA": {"ivr": 0.42, "risco": "Alto", "ranking": 40},
+    "NISSAN FRONTIER": {"ivr": 0.38, "risco": "Alto", "ranking": 54},
+    "NISSAN TIIDA": {"ivr": 0.225, "risco": "Médio", "ranking": 77},
+
+    # Renault
+    "RENAULT KWID": {"ivr": 0.52, "risco": "Muito Alto", "ranking": 27},
+    "RENAULT SANDERO": {"ivr": 0.48, "risco": "Alto", "ranking": 34},
+    "RENAULT DUSTER": {"ivr": 0.32, "risco": "Alto", "ranking": 59},
+    "RENAULT LOGAN": {"ivr": 0.45, "risco": "Alto", "ranking": 39},
+    "RENAULT CAPTUR": {"ivr": 0.167, "risco": "Baixo", "ranking": 88},
+
+    # Jeep
+    "JEEP RENEGADE": {"ivr": 0.55, "risco": "Muito Alto", "ranking": 25},
+    "JEEP COMPASS": {"ivr": 0.135, "risco": "Baixo", "ranking": 95},
+}
+
+
+def normalizar(texto: str) -> str:
+    """'Gol 1.0 Mi 8V' -> 'gol 1 0 mi 8v'"""
+    texto = remover_acentos(str(texto or '').lower())
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', texto).split())
+
+
+def normalizar_marca(marca: str) -> str:
+    chave = normalizar(marca)
+    return MARCAS.get(chave, chave)
+
+
+def normalizar_modelo(modelo: str, marca: str = '') -> str:
+    """Modelo normalizado, sem a marca repetida no início ('VW GOL' -> 'gol')"""
+    chave = normalizar(modelo)
+    for prefixo in {marca, *(sigla for sigla, nome in MARCAS.items() if nome == marca)}:
+        if prefixo and chave.startswith(prefixo + ' '):
+            return chave[len(prefixo) + 1:]
+    return chave
+
+
+def classificar_ivr(ivr: Optional[float]) -> str:
+    """Classificação do IVR em % da tabela oficial (mesmos cortes do app.py)"""
+    if ivr is None or math.isnan(ivr):
+        return "Sem dados"
+    if ivr >= 3.0:
+        return "Muito Alto"
+    if ivr >= 2.0:
+        return "Alto"
+    if ivr >= 1.0:
+        return "Médio"
+    if ivr >= 0.5:
+        return "Baixo"
+    return "Muito Baixo"
+
+
+def split_marca_modelo(texto: str) -> Tuple[str, str]:
+    """'VW - GOL 1.0' ou 'VW GOL 1.0' -> ('VW', 'GOL 1.0') (como no app.py)"""
+    texto = str(texto).strip()
+    if " - " in texto:
+        marca, modelo = texto.split(" - ", 1)
+        return marca.strip(), modelo.strip()
+    partes = texto.split()
+    if len(partes) >= 2:
+        return partes[0], " ".join(partes[1:])
+    return texto, ""
+
+
+def _numero(texto: str) -> Optional[float]:
+    """'1.234,56' -> 1234.56 (None se vazio)"""
+    texto = re.sub(r'[^0-9,.-]', '', texto or '').replace('.', '').replace(',', '.')
+    try:
+        return float(texto)
+    except ValueError:
+        return None
+
+
+def parse_susep_html(html: str) -> List[Dict]:
+    """
+    Linhas do ranking da SUSEP: {marca, modelo, ivr, expostos, sinistros}
+
+    Colunas pelo cabeçalho (modelo, índice de roubo/furto, veículos
+    expostos, sinistros), na ordem da tabela quando o cabeçalho não ajuda.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for tabela in soup.find_all('table'):
+        linhas = [
+            [celula.get_text(' ', strip=True) for celula in tr.find_all(['td', 'th'])]
+            for tr in tabela.find_all('tr')
+        ]
+        linhas = [linha for linha in linhas if len(linha) >= 2]
+        if len(linhas) < 2:
+            continue
+
+        colunas = _colunas_susep(linhas[0])
+        rows = []
+        for linha in linhas[1:]:
+            if len(linha) <= max(colunas.values()):
+                continue
+            nome = linha[colunas['modelo']].strip()
+            ivr = _numero(linha[colunas['ivr']])
+            if not nome or ivr is None:
+                continue
+            marca, modelo = split_marca_modelo(nome)
+            rows.append({
+                'marca': marca,
+                'modelo': modelo,
+                'ivr': ivr,
+                'expostos': _numero(linha[colunas['expostos']]) if 'expostos' in colunas else None,
+                'sinistros': _numero(linha[colunas['sinistros']]) if 'sinistros' in colunas else None,
+            })
+        if rows:
+            return rows
+
+    return []
+
+
+def _colunas_susep(cabecalho: List[str]) -> Dict[str, int]:
+    colunas = {}
+    for i, titulo in enumerate(cabecalho):
+        titulo = normalizar(titulo)
+        if 'modelo' in titulo:
+            colunas.setdefault('modelo', i)
+        elif 'indice' in titulo and ('roubo' in titulo or 'furto' in titulo):
+            colunas.setdefault('ivr', i)
+        elif 'veiculo' in titulo and 'exposto' in titulo:
+            colunas.setdefault('expostos', i)
+        elif 'sinistro' in titulo:
+            colunas.setdefault('sinistros', i)
+
+    for i, nome in enumerate(('modelo', 'ivr', 'expostos', 'sinistros')):
+        if nome not in colunas and i < len(cabecalho) and i not in colunas.values():
+            colunas[nome] = i
+    return colunas
+
+
+def fetch_susep(timeout: int = 60) -> List[Dict]:
+    """Baixa e interpreta o ranking (o site da SUSEP costuma falhar no SSL)"""
+    import requests
+
+    try:
+        response = requests.get(URL_SUSEP_IVR, timeout=timeout)
+        response.raise_for_status()
+    except requests.exceptions.SSLError:
+        import urllib3
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        response = requests.get(URL_SUSEP_IVR, timeout=timeout, verify=False)
+        response.raise_for_status()
+
+    response.encoding = response.apparent_encoding or response.encoding
+    return parse_susep_html(response.text)
+
+
+def susep_rows(rows: List[Dict]) -> List[Dict]:
+    """Ranking oficial (IVR em %) -> linhas do índice, IVR de 0 a 1 (ranking 1 = maior IVR)"""
+    ordenadas = sorted(rows, key=lambda r: -r['ivr'])
+    return [
+        {**row, 'ivr': round(row['ivr'] / 100, 6), 'risco': classificar_ivr(row['ivr']),
+         'ranking': i + 1, 'fonte': FONTE_SUSEP}
+        for i, row in enumerate(ordenadas)
+    ]
+
+
+def local_rows() -> List[Dict]:
+    rows = []
+    for chave, data in LOCAL_IVR.items():
+        marca, modelo = chave.split(' ', 1)
+        rows.append({'marca': marca, 'modelo': modelo, 'expostos': None, **data, 'fonte': FONTE_LOCAL})
+    return rows
+
+
+class IvrIndex:
+    """Linhas do ranking com busca exata, por prefixo e por trigramas"""
+
+    def __init__(self, rows: List[Dict], limiar: float = 0.5):
+        """
+        Args:
+            rows: [{marca, modelo, ivr, risco, ranking, fonte, expostos}, ...]
+            limiar: Jaccard mínimo de trigramas (sobre o modelo)
+        """
+        self.rows = rows
+        self.limiar = limiar
+
+        self.marcas: List[str] = [normalizar_marca(r['marca']) for r in rows]
+        self.modelos: List[str] = [normalizar_modelo(r['modelo'], m) for r, m in zip(rows, self.marcas)]
+        self.conhecidas = set(self.marcas)
+
+        # Chave repetida (versões com o mesmo nome): vence a mais exposta
+        self.por_chave: Dict[str, int] = {}
+        self.por_modelo: Dict[str, int] = {}
+        # Sem espaços: 'hb 20' e 'hb20', 't cross' e 'tcross'
+        self.por_compacto: Dict[str, int] = {}
+        for i in sorted(range(len(rows)), key=self._peso, reverse=True):
+            self.por_chave.setdefault(f"{self.marcas[i]} {self.modelos[i]}", i)
+            self.por_modelo.setdefault(self.modelos[i], i)
+            self.por_compacto.setdefault(self.modelos[i].replace(' ', ''), i)
+
+        self.chaves = sorted((f"{m} {modelo}", i) for i, (m, modelo) in enumerate(zip(self.marcas, self.modelos)))
+        self.chaves_modelo = sorted((modelo, i) for i, modelo in enumerate(self.modelos))
+
+        self.grams: List[set] = [trigramas(modelo) for modelo in self.modelos]
+        self.indice: Dict[str, List[int]] = defaultdict(list)
+        for i, grams in enumerate(self.grams):
+            for gram in grams:
+                self.indice[gram].append(i)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _peso(self, i: int):
+        # Mais veículos expostos primeiro; sem exposição, o nome mais curto
+        return (self.rows[i].get('expostos') or 0, -len(self.modelos[i]))
+
+    def lookup(self, marca: str, modelo: str) -> Optional[Tuple[int, str]]:
+        """(linha, via) para marca/modelo já normalizados, ou None"""
+        if not modelo:
+            return None
+
+        if marca in self.conhecidas:
+            chave = f"{marca} {modelo}"
+            if chave in self.por_chave:
+                return self.por_chave[chave], 'exact'
+            i = self._prefix(self.chaves, chave)
+            if i is not None:
+                return i, 'prefix'
+            i = self.fuzzy(modelo, marca)
+            if i is not None:
+                return i, 'fuzzy'
+
+        # Marca desconhecida (ou modelo de outra marca): só o modelo
+        if modelo in self.por_modelo:
+            return self.por_modelo[modelo], 'exact'
+        if modelo.replace(' ', '') in self.por_compacto:
+            return self.por_compacto[modelo.replace(' ', '')], 'exact'
+        i = self._prefix(self.chaves_modelo, modelo)
+        if i is not None:
+            return i, 'prefix'
+        i = self.fuzzy(modelo)
+        if i is not None:
+            return i, 'fuzzy'
+        return None
+
+    def _prefix(self, chaves: List[Tuple[str, int]], chave: str) -> Optional[int]:
+        """Versões que começam com a chave inteira ('gol' acha 'gol 1 0', não 'golf')"""
+        prefixo = chave + ' '
+        j = bisect_left(chaves, (prefixo,))
+        candidatos = []
+        while j < len(chaves) and chaves[j][0].startswith(prefixo):
+            candidatos.append(chaves[j][1])
+            j += 1
+        return max(candidatos, key=self._peso) if candidatos else None
+
+    def fuzzy(self, modelo: str, marca: Optional[str] = None) -> Optional[int]:
+        """
+        Modelo mais parecido (Jaccard de trigramas >= limiar), na marca se dada
+
+        Um modelo conhecido que é prefixo da consulta no meio da palavra
+        ('gol' para 'golf') é outro carro, não erro de digitação: fica de fora.
+        """
+        grams = trigramas(modelo)
+        # Filtro de prefixo (como em StreetGazetteer.fuzzy): só os
+        # trigramas mais raros da consulta geram candidatos
+        raros = sorted(grams, key=lambda g: len(self.indice.get(g, ())))
+        prefixo = len(grams) - math.ceil(self.limiar * len(grams)) + 1
+
+        candidatos = set()
+        for gram in raros[:prefixo]:
+            candidatos.update(self.indice.get(gram, ()))
+
+        melhor, melhor_score = None, 0.0
+        for i in sorted(candidatos):
+            if marca is not None and self.marcas[i] != marca:
+                continue
+            if self._estende(modelo, self.modelos[i]):
+                continue
+            comuns = len(grams & self.grams[i])
+            score = comuns / (len(grams) + len(self.grams[i]) - comuns)
+            if score > melhor_score or (score == melhor_score and melhor is not None
+                                        and self._peso(i) > self._peso(melhor)):
+                melhor, melhor_score = i, score
+        return melhor if melhor_score >= self.limiar else None
+
+    @staticmethod
+    def _estende(consulta: str, modelo: str) -> bool:
+        """consulta = modelo + mais letras/dígitos na mesma palavra ('golf' x 'gol')"""
+        return len(consulta) > len(modelo) and consulta.startswith(modelo) and consulta[len(modelo)] != ' '
+
+
+class IvrLookupService:
+    """Índice IVR compartilhado, com LRU e renovação em segundo plano"""
+
+    def __init__(self, path: Path = SUSEP_FILE, interval: float = REFRESH_INTERVAL,
+                 cache_size: int = CACHE_SIZE, fetch: Callable[[], List[Dict]] = fetch_susep):
+        self.path = Path(path)
+        self.interval = interval
+        self.cache_size = cache_size
+        self.fetch = fetch
+        self.lock = threading.Lock()
+        self.index: Optional[IvrIndex] = None
+        self.updated_at: Optional[float] = None
+        self._cached = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def lookup(self, marca: str, modelo: str) -> Optional[Dict]:
+        """{'marca', 'modelo', 'ivr', 'risco', 'ranking', 'fonte', 'via'} ou None"""
+        if self.index is None:
+            self.start()
+
+        marca = normalizar_marca(marca)
+        achado = self._cached(marca, normalizar_modelo(modelo, marca))
+        # Cópia: o dict do cache não pode ser alterado por quem chamou
+        return dict(achado) if achado else None
+
+    def start(self, background: bool = True):
+        """Carrega o arquivo salvo (ou a base local) e liga a renovação (idempotente)"""
+        with self.lock:
+            if self.index is None:
+                self._load_saved()
+            if background and self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._run, name='ivr-refresh', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def refresh(self) -> int:
+        """Baixa o ranking, salva e troca o índice; retorna o número de modelos"""
+        rows = self.fetch()
+        if not rows:
+            raise ValueError("tabela da SUSEP vazia ou em formato desconhecido")
+
+        agora = time.time()
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({'updated_at': agora, 'rows': rows}, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, self.path)
+
+        self._swap(IvrIndex(susep_rows(rows)), agora)
+        logger.info(f"🚗 Ranking IVR da SUSEP atualizado: {len(rows)} modelos")
+        return len(rows)
+
+    def info(self) -> Dict:
+        cache = self._cached.cache_info() if self._cached else None
+        return {
+            'models': len(self.index) if self.index else 0,
+            'fonte': self.index.rows[0]['fonte'] if self.index and len(self.index) else None,
+            'updated_at': self.updated_at,
+            'cache_hits': cache.hits if cache else 0,
+            'cache_misses': cache.misses if cache else 0,
+        }
+
+    def _load_saved(self):
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            self._swap(IvrIndex(susep_rows(data['rows'])), data['updated_at'])
+        except (OSError, ValueError, KeyError):
+            # Sem arquivo (ou corrompido): base local até o download
+            self._swap(IvrIndex(local_rows()), None)
+
+    def _swap(self, index: IvrIndex, updated_at: Optional[float]):
+        def resolve(marca: str, modelo: str) -> Optional[Dict]:
+            achado = index.lookup(marca, modelo)
+            if achado is None:
+                return None
+            i, via = achado
+            row = index.rows[i]
+            return {
+                'marca': row['marca'],
+                'modelo': row['modelo'],
+                'ivr': row['ivr'],
+                'risco': row['risco'],
+                'ranking': row['ranking'],
+                'fonte': row['fonte'],
+                'via': via,
+            }
+
+        # Índice e cache trocados juntos: consultas em andamento terminam no antigo
+        self._cached = lru_cache(maxsize=self.cache_size)(resolve)
+        self.index = index
+        self.updated_at = updated_at
+
+    def _run(self):
+        espera = 0.0
+        if self.updated_at is not None:
+            espera = max(0.0, self.updated_at + self.interval - time.time())
+
+        while not self._stop.wait(espera):
+            try:
+                self.refresh()
+                espera = self.interval
+            except Exception as e:
+                logger.warning(f"⚠️ Ranking IVR da SUSEP não atualizado: {e}")
+                espera = RETRY_INTERVAL
+
+
+IVR_LOOKUP = IvrLookupService()
+
+
+if __name__ == "__main__":
+    # Conferência rápida na base local: python -m app.services.ivr_lookup
+    servico = IvrLookupService(path=Path(os.devnull))
+    servico.start(background=False)
+
+    assert servico.lookup("VOLKSWAGEN", "GOL")['risco'] == "Muito Alto"
+    assert servico.lookup("VW", "GOL 1.0")['modelo'] == "GOL"
+    assert servico.lookup("VOLKSWAGEN", "GOOL")['modelo'] == "GOL"
+    assert servico.lookup("VOLKSWAGEN", "GOLF") is None, "GOLF não é GOL"
+    assert servico.lookup("HYUNDAI", "HB 20")['modelo'] == "HB20"
+    print(f"✓ IVR: {servico.info()['models']} modelos na base local")
@@ -0,0 +1,318 @@
+"""
+SafeDrive RJ - Agendador de jobs (asyncio) com estado persistente
+
+    * Cada job tem seu próprio laço: jobs independentes rodam em paralelo
+      (um site lento não atrasa o Twitter)
+    * Sem sobreposição: se a execução anterior ainda não terminou quando
+      chega a hora, a rodada é pulada (até `concurrency` execuções juntas)
+    * Timeout e novas tentativas com backoff exponencial
+    * Última execução gravada em SQLite: ao reiniciar, jobs atrasados rodam
+      logo (uma vez, não uma por rodada perdida) e os demais esperam o prazo
+
+Funções síncronas rodam numa thread (asyncio.to_thread); corrotinas rodam
+no próprio loop.
+
+Uso:
+    runner = JobRunner(JobStore())
+    runner.add(Job('news', run_news_scraper, interval=3600, timeout=1800, retries=2))
+    runner.add(Job('twitter', run_twitter_monitor, interval=900))
+    asyncio.run(runner.run_forever())
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.services.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+JOBS_FILE = Path.home() / '.safedrive_jobs.db'
+
+# Resultados de uma execução
+SUCCESS = 'success'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+SKIPPED = 'skipped'
+
+
+class Job:
+    """Definição de um job periódico"""
+
+    def __init__(self, name: str, func: Callable, interval: Optional[float] = None,
+                 timeout: Optional[float] = None, retries: int = 0, backoff: float = 30.0,
+                 max_backoff: float = 900.0, concurrency: int = 1):
+        """
+        Args:
+            name: Nome (chave do estado persistido)
+            func: Função ou corrotina sem argumentos; o retorno (int) é
+                  somado em `total` no estado
+            interval: Segundos entre execuções (None = só sob demanda)
+            timeout: Tempo máximo de uma tentativa
+            retries: Novas tentativas após falha
+            backoff: Espera antes da 1ª nova tentativa (dobra a cada uma)
+            concurrency: Execuções simultâneas permitidas do mesmo job
+        """
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.concurrency = concurrency
+        self.running = 0
+
+
+class JobStore:
+    """Estado dos jobs (última execução, totais) em SQLite"""
+
+    def __init__(self, path: Path = JOBS_FILE):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                name TEXT PRIMARY KEY,
+                last_start REAL,
+                last_end REAL,
+                last_success REAL,
+                last_status TEXT,
+                last_error TEXT,
+                last_result TEXT,
+                runs INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Estado do job (valores vazios se nunca rodou)"""
+        with self.lock:
+            cursor = self.conn.execute("SELECT * FROM jobs WHERE name = ?", (name,))
+            row = cursor.fetchone()
+            columns = [c[0] for c in cursor.description]
+
+        if row is None:
+            return {'name': name, 'last_start': None, 'last_end': None, 'last_success': None,
+                    'last_status': None, 'last_error': None, 'last_result': None,
+                    'runs': 0, 'failures': 0, 'total': 0}
+
+        state = dict(zip(columns, row))
+        state['last_result'] = json.loads(state['last_result']) if state['last_result'] else None
+        return state
+
+    def all(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            names = [row[0] for row in self.conn.execute("SELECT name FROM jobs ORDER BY name")]
+        return [self.get(name) for name in names]
+
+    def started(self, name: str):
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO jobs (name, last_start) VALUES (?, ?)
+                ON CONFLICT (name) DO UPDATE SET last_start = excluded.last_start
+            """, (name, time.time()))
+            self.conn.commit()
+
+    def finished(self, name: str, status: str, result: Any = None, error: str = None):
+        ok = status == SUCCESS
+        now = time.time()
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO jobs (name, last_end, last_success, last_status, last_error,
+                                  last_result, runs, failures, total)
+                VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                    last_end = excluded.last_end,
+                    last_success = COALESCE(excluded.last_success, jobs.last_success),
+                    last_status = excluded.last_status,
+                    last_error = excluded.last_error,
+                    last_result = COALESCE(excluded.last_result, jobs.last_result),
+                    runs = jobs.runs + 1,
+                    failures = jobs.failures + excluded.failures,
+                    total = jobs.total + excluded.total
+            """, (
+                name, now, now if ok else None, status, error,
+                json.dumps(result, default=str) if ok else None,
+                0 if ok else 1,
+                result if ok and isinstance(result, int) else 0,
+            ))
+            self.conn.commit()
+
+    def record(self, name: str, when: float, result: Any = None, total: int = 0):
+        """Registra uma execução bem-sucedida feita fora do runner (importação)"""
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO jobs (name, last_start, last_end, last_success, last_status,
+                                  last_result, runs, total)
+                VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+                ON CONFLICT (name) DO NOTHING
+            """, (name, when, when, when, SUCCESS, json.dumps(result, default=str), total))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class JobRunner:
+    """Executa jobs periódicos em paralelo, cada um com seus limites"""
+
+    def __init__(self, store: JobStore, max_parallel: Optional[int] = None):
+        """
+        Args:
+            max_parallel: Limite global de jobs rodando ao mesmo tempo
+        """
+        self.store = store
+        self.jobs: Dict[str, Job] = {}
+        self.max_parallel = max_parallel
+        self._global: Optional[asyncio.Semaphore] = None
+        # Execuções disparadas pelos laços (referência até terminarem)
+        self._tasks = set()
+
+    def add(self, job: Job) -> Job:
+        self.jobs[job.name] = job
+        return job
+
+    async def run_forever(self):
+        """Laço de cada job agendado até ser cancelado (Ctrl+C)"""
+        self._global = asyncio.Semaphore(self.max_parallel) if self.max_parallel else None
+        tasks = [asyncio.create_task(self._loop(job)) for job in self.jobs.values() if job.interval]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run_once(self, names: Iterable[str] = None) -> Dict[str, str]:
+        """Roda os jobs pedidos (todos por padrão) uma vez, em paralelo"""
+        self._global = asyncio.Semaphore(self.max_parallel) if self.max_parallel else None
+        names = list(names or self.jobs)
+        results = await asyncio.gather(*(self.run_job(self.jobs[name]) for name in names))
+        return dict(zip(names, results))
+
+    def due_in(self, job: Job) -> float:
+        """Segundos até a próxima execução (<= 0: atrasado, roda já)"""
+        last = self.store.get(job.name)['last_start']
+        if last is None:
+            return 0
+        return last + job.interval - time.time()
+
+    async def _loop(self, job: Job):
+        atraso = self.due_in(job)
+        if atraso > 0:
+            logger.info(f"⏰ {job.name}: próxima execução em {atraso / 60:.0f} min")
+            await asyncio.sleep(atraso)
+
+        while True:
+            inicio = time.monotonic()
+            # Não espera a execução: a próxima rodada conta a partir do início
+            task = asyncio.create_task(self.run_job(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            await asyncio.sleep(max(0.0, job.interval - (time.monotonic() - inicio)))
+
+    async def run_job(self, job: Job) -> str:
+        """Uma execução (com novas tentativas); retorna o status final"""
+        if job.running >= job.concurrency:
+            logger.warning(f"⏭️  {job.name}: execução anterior ainda em andamento - pulando")
+            return SKIPPED
+
+        job.running += 1
+        try:
+            if self._global:
+                async with self._global:
+                    return await self._attempts(job)
+            return await self._attempts(job)
+        finally:
+            job.running -= 1
+            # Métricas da execução visíveis para outros processos (API, show_stats)
+            METRICS.flush()
+
+    async def _attempts(self, job: Job) -> str:
+        self.store.started(job.name)
+        logger.info(f"▶️  {job.name} [{datetime.now().strftime('%H:%M:%S')}]")
+
+        for tentativa in range(job.retries + 1):
+            inicio = time.monotonic()
+            try:
+                result = await self._call(job)
+            except asyncio.TimeoutError:
+                status, erro = TIMEOUT, f"timeout após {job.timeout:.0f}s"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                status, erro = FAILED, f"{type(e).__name__}: {e}"
+            else:
+                self.store.finished(job.name, SUCCESS, result)
+                METRICS.run(job.name, time.monotonic() - inicio, result if isinstance(result, int) else 0)
+                logger.info(f"✅ {job.name}: {result!r} em {time.monotonic() - inicio:.1f}s")
+                return SUCCESS
+
+            if status == TIMEOUT and not inspect.iscoroutinefunction(job.func):
+                # A thread não pode ser interrompida: nova tentativa sobreporia a
+                # atual; o desfecho real é gravado quando ela terminar (_call)
+                logger.error(f"❌ {job.name}: {erro} (sem nova tentativa)")
+                return status
+
+            self.store.finished(job.name, status, error=erro)
+
+            if tentativa < job.retries:
+                espera = min(job.max_backoff, job.backoff * 2 ** tentativa)
+                logger.warning(f"⚠️ {job.name}: {erro} - nova tentativa em {espera:.0f}s")
+                await asyncio.sleep(espera)
+            else:
+                logger.error(f"❌ {job.name}: {erro}")
+
+        return status
+
+    async def _call(self, job: Job):
+        if inspect.iscoroutinefunction(job.func):
+            return await asyncio.wait_for(job.func(), job.timeout)
+
+        # Após o timeout a thread segue até o fim; o job continua marcado
+        # como rodando até lá (sem sobreposição) e o resultado não se perde
+        inicio = time.monotonic()
+        task = asyncio.ensure_future(asyncio.to_thread(job.func))
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), job.timeout)
+        except asyncio.TimeoutError:
+            job.running += 1
+            self._tasks.add(task)
+
+            def liberar(t):
+                job.running -= 1
+                self._tasks.discard(t)
+                atraso = f"após o timeout de {job.timeout:.0f}s"
+                if t.cancelled():
+                    self.store.finished(job.name, TIMEOUT, error=f"timeout após {job.timeout:.0f}s")
+                elif t.exception():
+                    e = t.exception()
+                    logger.error(f"❌ {job.name}: terminou {atraso} com erro: {e}")
+                    self.store.finished(job.name, FAILED, error=f"{type(e).__name__}: {e} ({atraso})")
+                else:
+                    result = t.result()
+                    duracao = time.monotonic() - inicio
+                    logger.warning(f"⌛ {job.name}: {result!r} em {duracao:.1f}s ({atraso})")
+                    self.store.finished(job.name, SUCCESS, result, error=f"terminou {atraso}")
+                    METRICS.run(job.name, duracao, result if isinstance(result, int) else 0)
+                METRICS.flush()
+
+            task.add_done_callback(liberar)
+            raise
+
+    async def drain(self):
+        """Espera as execuções em andamento (inclusive threads que passaram do timeout)"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
@@ -0,0 +1,258 @@
+"""
+Itens já gravados no banco (para não baixar/processar de novo)
+
+Filtro de Bloom persistente, carregado no início de cada coletor:
+    KnownItems.for_links(conn)       -> noticias_crimes.link (+ alternativos)
+    KnownItems.for_source_ids(conn)  -> crime_incidents.source_id
+
+O arquivo guarda o maior id já lido de cada tabela (e, para os links, o
+maior atualizado_em: links alternativos entram em linhas antigas); ao
+carregar, só as linhas novas/alteradas são buscadas no banco. O arquivo
+vale só para o mesmo banco (system_identifier + oids + MAX(id)); outro
+banco com o mesmo nome reconstrói do zero. Processos que gravam o mesmo
+arquivo unem os filtros (OR) em vez de sobrescrever.
+
+"link in conhecidos" é em memória: False = com certeza novo; True = já
+visto (falso positivo ~ error_rate).
+"""
+
+import fcntl
+import hashlib
+import json
+import math
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.services.metrics import METRICS
+
+LINKS_FILE = Path.home() / '.safedrive_links.bloom.npz'
+SOURCE_IDS_FILE = Path.home() / '.safedrive_source_ids.bloom.npz'
+
+# (id, valor[, atualizado_em]). Alternativos de linhas antigas chegam pelo
+# atualizado_em, com folga: NOW() é o início da transação, que pode ter
+# sido gravada depois da última leitura
+LINKS_QUERY = """
+    SELECT id, link, atualizado_em FROM noticias_crimes WHERE id > %(max_id)s
+    UNION ALL
+    SELECT id, unnest(links_alternativos), atualizado_em FROM noticias_crimes
+    WHERE id > %(max_id)s OR atualizado_em > %(desde)s::timestamp - INTERVAL '1 hour'
+"""
+
+SOURCE_IDS_QUERY = """
+    SELECT id, source_id FROM crime_incidents
+    WHERE id > %(max_id)s AND source_id IS NOT NULL
+"""
+
+# Identidade do banco/tabela gravada junto com o filtro
+IDENTITY_QUERY = """
+    SELECT (SELECT system_identifier FROM pg_control_system())::text,
+           (SELECT oid FROM pg_database WHERE datname = current_database())::int8,
+           %(table)s::regclass::oid::int8,
+           (SELECT MAX(id) FROM {table})
+"""
+
+CHUNK = 100_000
+
+
+class BloomFilter:
+    """Bits em numpy (uint8), k posições por item via double hashing (blake2b)"""
+
+    def __init__(self, capacity: int, error_rate: float = 1e-5, bits: np.ndarray = None, count: int = 0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.m = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.k = max(1, int(round(self.m / capacity * math.log(2))))
+        self.bits = bits if bits is not None else np.zeros((self.m + 7) // 8, dtype=np.uint8)
+        self.count = count
+
+    def _positions(self, values: Iterable[str]) -> np.ndarray:
+        """(n, k) posições de bit"""
+        digests = b''.join(
+            hashlib.blake2b(v.encode('utf-8'), digest_size=16).digest() for v in values
+        )
+        h = np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+        i = np.arange(self.k, dtype=np.uint64)
+        # uint64 estoura de propósito (módulo 2^64)
+        with np.errstate(over='ignore'):
+            return (h[:, :1] + i * h[:, 1:]) % np.uint64(self.m)
+
+    def add_many(self, values: Iterable[str]) -> int:
+        """Adiciona; retorna (e conta) só os que ainda não estavam no filtro"""
+        values = list(values)
+        novos = 0
+        for start in range(0, len(values), CHUNK):
+            pos = self._positions(values[start:start + CHUNK])
+            byte, bit = pos >> np.uint64(3), (1 << (pos & np.uint64(7))).astype(np.uint8)
+            novos += int(np.count_nonzero(~np.all(self.bits[byte] & bit, axis=1)))
+            np.bitwise_or.at(self.bits, byte.ravel(), bit.ravel())
+        self.count += novos
+        return novos
+
+    def add(self, value: str):
+        self.add_many([value])
+
+    def __contains__(self, value: str) -> bool:
+        pos = self._positions([value])[0]
+        return bool(np.all(self.bits[pos >> np.uint64(3)] & (1 << (pos & np.uint64(7))).astype(np.uint8)))
+
+    def estimated_count(self) -> int:
+        """Itens estimados pelos bits ligados (após unir dois filtros)"""
+        ligados = int(np.unpackbits(self.bits)[:self.m].sum())
+        if ligados >= self.m:
+            return self.capacity * 10
+        return int(round(-self.m / self.k * math.log(1 - ligados / self.m)))
+
+
+class KnownItems:
+    """Filtro de Bloom de uma coluna, persistido em disco e sincronizado por id"""
+
+    def __init__(self, path: Path, query: str, table: str, capacity: int = 1_000_000,
+                 error_rate: float = 1e-5, name: str = None):
+        self.path = Path(path)
+        # Rótulo nas métricas de dedup
+        self.name = name or self.path.stem
+        self.query = query
+        self.table = table
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.filter = BloomFilter(capacity, error_rate)
+        self.max_id = 0
+        # Maior atualizado_em lido (só consultas com a 3ª coluna)
+        self.desde: Optional[datetime] = None
+        self.dbname: Optional[str] = None
+        self.identity: Optional[list] = None
+
+    @classmethod
+    def for_links(cls, conn, path: Path = LINKS_FILE) -> 'KnownItems':
+        return cls(path, LINKS_QUERY, 'noticias_crimes', name='links').load(conn)
+
+    @classmethod
+    def for_source_ids(cls, conn, path: Path = SOURCE_IDS_FILE) -> 'KnownItems':
+        return cls(path, SOURCE_IDS_QUERY, 'crime_incidents', name='source_ids').load(conn)
+
+    def __contains__(self, value: str) -> bool:
+        hit = value in self.filter
+        METRICS.dedup(self.name, hit)
+        return hit
+
+    def __len__(self):
+        return self.filter.count
+
+    def add(self, value: str):
+        """Item gravado nesta execução"""
+        if value and value not in self.filter:
+            self.filter.add(value)
+
+    def load(self, conn) -> 'KnownItems':
+        """Lê o arquivo (se for do mesmo banco) e busca as linhas novas"""
+        self.dbname = conn.get_dsn_parameters().get('dbname')
+        max_id = self._identify(conn)
+        self._read(max_id)
+
+        novos = self._sync(conn)
+        if self.filter.count > self.capacity:
+            # Cheio demais: a taxa de falsos positivos subiria. Reconstrói maior
+            self.capacity = self.filter.count * 2
+            self.filter = BloomFilter(self.capacity, self.error_rate)
+            self.max_id = 0
+            self.desde = None
+            novos = self._sync(conn)
+
+        if novos:
+            self.save()
+        return self
+
+    def _identify(self, conn) -> int:
+        """Identidade do banco/tabela; retorna o MAX(id) atual"""
+        with conn.cursor() as cur:
+            cur.execute(IDENTITY_QUERY.format(table=self.table), {'table': self.table})
+            system_identifier, db_oid, table_oid, max_id = cur.fetchone()
+        conn.commit()
+
+        self.identity = [system_identifier, db_oid, table_oid]
+        return max_id or 0
+
+    def _sync(self, conn) -> int:
+        # Cursor no servidor: a primeira carga pode ter milhões de linhas
+        cur = conn.cursor(name='known_items')
+        cur.itersize = CHUNK
+        cur.execute(self.query, {'max_id': self.max_id, 'desde': self.desde})
+
+        novos = 0
+        while True:
+            rows = cur.fetchmany(CHUNK)
+            if not rows:
+                break
+            self.max_id = max(self.max_id, max(row[0] for row in rows))
+            if len(rows[0]) > 2:
+                self.desde = max(filter(None, [self.desde] + [row[2] for row in rows]), default=None)
+            novos += self.filter.add_many(row[1] for row in rows if row[1])
+
+        cur.close()
+        conn.commit()
+        return novos
+
+    def _read_file(self) -> Optional[tuple]:
+        """(meta, bits) do arquivo, se existir e for deste banco/tabela"""
+        if not self.path.exists():
+            return None
+
+        try:
+            with np.load(self.path) as data:
+                meta = json.loads(str(data['meta']))
+                bits = data['bits'].copy()
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if (meta.get('dbname') != self.dbname or meta.get('identity') != self.identity
+                or meta.get('error_rate') != self.error_rate):
+            return None
+        return meta, bits
+
+    def _read(self, max_id: int):
+        lido = self._read_file()
+        if lido is None:
+            return
+
+        meta, bits = lido
+        if meta['max_id'] > max_id:
+            # Tabela esvaziada/recriada com o mesmo oid (TRUNCATE ... RESTART IDENTITY)
+            return
+
+        self.capacity = meta['capacity']
+        self.max_id = meta['max_id']
+        self.desde = datetime.fromisoformat(meta['desde']) if meta.get('desde') else None
+        self.filter = BloomFilter(self.capacity, self.error_rate, bits=bits, count=meta['count'])
+
+    def save(self):
+        """Une com o que outro processo gravou e grava de forma atômica (temporário + rename)"""
+        with open(self.path.with_suffix('.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            lido = self._read_file()
+            if lido is not None and lido[0]['capacity'] == self.capacity:
+                meta, bits = lido
+                if not np.array_equal(bits, self.filter.bits):
+                    self.filter.bits |= bits
+                    self.filter.count = max(self.filter.count, meta['count'],
+                                            self.filter.estimated_count())
+                self.max_id = max(self.max_id, meta['max_id'])
+                if meta.get('desde'):
+                    self.desde = max(filter(None, [self.desde, datetime.fromisoformat(meta['desde'])]))
+
+            meta = {
+                'dbname': self.dbname,
+                'identity': self.identity,
+                'capacity': self.capacity,
+                'error_rate': self.error_rate,
+                'count': self.filter.count,
+                'max_id': self.max_id,
+                'desde': self.desde.isoformat() if self.desde else None,
+            }
+            tmp = self.path.with_suffix('.tmp.npz')
+            np.savez(tmp, bits=self.filter.bits, meta=np.array(json.dumps(meta)))
+            os.replace(tmp, self.path)
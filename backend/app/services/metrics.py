@@ -0,0 +1,400 @@
+"""
+SafeDrive RJ - Métricas de ingestão (tempo por estágio, vazão, HTTP, banco, dedup)
+
+Registro em memória por processo (METRICS), barato o bastante para ser
+chamado por item:
+
+    with METRICS.stage('geocode'):
+        coords = geocode(endereco)
+    METRICS.observe('http_request_seconds', 0.42, host='g1.globo.com')
+    METRICS.inc('dedup_checks_total', filter='links', result='hit')
+
+Os processos (coletores, importadores, orchestrator) juntam o que
+mediram em ~/.safedrive_metrics.json com flush(): no fim do processo
+(atexit) e após cada job do JobRunner. Histogramas e contadores são
+somados, então vários processos escrevem no mesmo arquivo.
+
+Exportação: to_prometheus() (texto do Prometheus), report() (JSON com
+percentis, itens/s, taxa de acerto do dedup) e format_report() (linhas
+para o terminal). A API serve o arquivo em /api/metrics/ingestion.
+
+Nomes padronizados (prefixo safedrive_ na exportação):
+    stage_seconds{stage}               fetch, parse, classify, geocode, dedup, db_write
+    http_request_seconds{host}         latência das requisições (sem cache)
+    http_requests_total{host,result}   ok, error, not_modified, cache
+    db_write_seconds{table}            um COPY+merge / uma página gravada
+    db_rows_total{table,result}        sent, inserted
+    dedup_checks_total{filter,result}  hit, miss
+    geocode_total{via}                 memory, gazetteer, cache, nominatim, miss
+    run_seconds{collector}             uma execução de um coletor/job
+    items_total{collector}             itens gravados por coletor/job
+"""
+
+import atexit
+import bisect
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+METRICS_FILE = Path.home() / '.safedrive_metrics.json'
+
+PREFIX = 'safedrive_'
+
+# Limites superiores dos buckets (segundos): de 1 ms a 10 min
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# Chave de uma série: (nome, ((rótulo, valor), ...)) com rótulos ordenados
+SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict) -> SeriesKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Contagem por bucket fixo + soma (mesclável entre processos)"""
+
+    def __init__(self, counts: List[int] = None, total: float = 0.0, count: int = 0):
+        self.counts = counts or [0] * (len(BUCKETS) + 1)
+        self.sum = total
+        self.count = count
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: 'Histogram'):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Percentil aproximado (interpolação linear dentro do bucket)"""
+        if not self.count:
+            return None
+        alvo = q * self.count
+        acumulado = 0
+        for i, n in enumerate(self.counts):
+            if n and acumulado + n >= alvo:
+                inferior = BUCKETS[i - 1] if i > 0 else 0.0
+                superior = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return inferior + (superior - inferior) * (alvo - acumulado) / n
+            acumulado += n
+        return BUCKETS[-1]
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else None,
+            'p50': _round(self.quantile(0.50)),
+            'p95': _round(self.quantile(0.95)),
+            'p99': _round(self.quantile(0.99)),
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 6) if value is not None else None
+
+
+class Metrics:
+    """Histogramas e contadores rotulados, thread-safe"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms: Dict[SeriesKey, Histogram] = {}
+        self.counters: Dict[SeriesKey, float] = {}
+        self.updated_at: Optional[float] = None
+
+    # ────────────────────────────────────────────────────────
+    # REGISTRO
+    # ────────────────────────────────────────────────────────
+
+    def observe(self, name: str, value: float, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - inicio, **labels)
+
+    def stage(self, stage: str):
+        """Cronômetro de um estágio do pipeline (stage_seconds{stage})"""
+        return self.timer('stage_seconds', stage=stage)
+
+    def dedup(self, name: str, hit: bool):
+        """Uma verificação de duplicata no filtro `name` (hit = já existia)"""
+        self.inc('dedup_checks_total', filter=name, result='hit' if hit else 'miss')
+
+    def run(self, collector: str, seconds: float, items: int = 0):
+        """Uma execução de coletor/job: duração e itens gravados"""
+        self.observe('run_seconds', seconds, collector=collector)
+        self.inc('items_total', items, collector=collector)
+
+    # ────────────────────────────────────────────────────────
+    # PERSISTÊNCIA (entre processos)
+    # ────────────────────────────────────────────────────────
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> Dict:
+        return {
+            'updated_at': self.updated_at,
+            'histograms': [
+                {'name': name, 'labels': dict(labels), 'counts': list(h.counts), 'sum': h.sum, 'count': h.count}
+                for (name, labels), h in self.histograms.items()
+            ],
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in self.counters.items()
+            ],
+        }
+
+    def merge(self, snapshot: Dict):
+        with self.lock:
+            for item in snapshot.get('histograms', []):
+                key = _key(item['name'], item['labels'])
+                other = Histogram(list(item['counts']), item['sum'], item['count'])
+                if key in self.histograms:
+                    self.histograms[key].merge(other)
+                else:
+                    self.histograms[key] = other
+            for item in snapshot.get('counters', []):
+                key = _key(item['name'], item['labels'])
+                self.counters[key] = self.counters.get(key, 0) + item['value']
+            self.updated_at = max(filter(None, (self.updated_at, snapshot.get('updated_at'))), default=None)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def empty(self) -> bool:
+        return not self.histograms and not self.counters
+
+    def flush(self, path: Path = METRICS_FILE):
+        """Soma o que foi medido desde o último flush ao arquivo e zera o registro"""
+        if self.empty():
+            return
+
+        path = Path(path)
+        with open(path.with_suffix('.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            total = Metrics.load(path)
+            with self.lock:
+                delta = self._snapshot()
+                self.histograms.clear()
+                self.counters.clear()
+            total.merge(delta)
+            total.updated_at = time.time()
+
+            tmp = path.with_suffix('.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(total.snapshot(), f)
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path = METRICS_FILE) -> 'Metrics':
+        """Métricas acumuladas no arquivo (vazio se não existir)"""
+        metrics = cls()
+        try:
+            with open(path, 'r') as f:
+                metrics.merge(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return metrics
+
+    # ────────────────────────────────────────────────────────
+    # EXPORTAÇÃO
+    # ────────────────────────────────────────────────────────
+
+    def to_prometheus(self) -> str:
+        """Formato texto do Prometheus (histogramas com _bucket/_sum/_count)"""
+        linhas = []
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+
+        tipos = set()
+        for (name, labels), h in histograms:
+            nome = PREFIX + name
+            if nome not in tipos:
+                linhas.append(f"# TYPE {nome} histogram")
+                tipos.add(nome)
+            acumulado = 0
+            for limite, n in zip(BUCKETS + (float('inf'),), h.counts):
+                acumulado += n
+                le = '+Inf' if limite == float('inf') else repr(limite)
+                linhas.append(f"{nome}_bucket{_labels(labels + (('le', le),))} {acumulado}")
+            linhas.append(f"{nome}_sum{_labels(labels)} {h.sum}")
+            linhas.append(f"{nome}_count{_labels(labels)} {h.count}")
+
+        for (name, labels), value in counters:
+            nome = PREFIX + name
+            if nome not in tipos:
+                linhas.append(f"# TYPE {nome} counter")
+                tipos.add(nome)
+            linhas.append(f"{nome}{_labels(labels)} {value:g}")
+
+        return '\n'.join(linhas) + '\n'
+
+    def _by_label(self, name: str, label: str) -> Dict[str, Histogram]:
+        """Histogramas de `name` agregados por um rótulo"""
+        resultado: Dict[str, Histogram] = {}
+        with self.lock:
+            for (nome, labels), h in self.histograms.items():
+                if nome != name:
+                    continue
+                valor = dict(labels).get(label, '')
+                resultado.setdefault(valor, Histogram()).merge(h)
+        return resultado
+
+    def total(self, name: str, **labels) -> float:
+        """Soma dos contadores `name` que têm esses rótulos"""
+        with self.lock:
+            return sum(
+                value for (nome, chave), value in self.counters.items()
+                if nome == name and all(dict(chave).get(k) == str(v) for k, v in labels.items())
+            )
+
+    def _label_values(self, name: str, label: str) -> List[str]:
+        with self.lock:
+            series = list(self.histograms) + list(self.counters)
+        return sorted({dict(labels)[label] for nome, labels in series if nome == name and label in dict(labels)})
+
+    def report(self) -> Dict:
+        """Resumo em JSON: percentis por estágio/host/tabela, itens/s e dedup"""
+        stages = {stage: h.summary() for stage, h in self._by_label('stage_seconds', 'stage').items()}
+
+        http = {}
+        for host, h in self._by_label('http_request_seconds', 'host').items():
+            http[host] = {
+                **h.summary(),
+                'errors': self.total('http_requests_total', host=host, result='error'),
+                'cache': self.total('http_requests_total', host=host, result='cache'),
+                'not_modified': self.total('http_requests_total', host=host, result='not_modified'),
+            }
+
+        db = {}
+        for table, h in self._by_label('db_write_seconds', 'table').items():
+            inserted = self.total('db_rows_total', table=table, result='inserted')
+            db[table] = {
+                **h.summary(),
+                'rows_sent': self.total('db_rows_total', table=table, result='sent'),
+                'rows_inserted': inserted,
+                'rows_per_second': round(inserted / h.sum, 1) if h.sum else None,
+            }
+
+        dedup = {}
+        for filtro in self._label_values('dedup_checks_total', 'filter'):
+            hits = self.total('dedup_checks_total', filter=filtro, result='hit')
+            misses = self.total('dedup_checks_total', filter=filtro, result='miss')
+            dedup[filtro] = {
+                'checks': hits + misses,
+                'hits': hits,
+                'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+            }
+
+        collectors = {}
+        for collector, h in self._by_label('run_seconds', 'collector').items():
+            items = self.total('items_total', collector=collector)
+            collectors[collector] = {
+                'runs': h.count,
+                'seconds': round(h.sum, 3),
+                'items': items,
+                'items_per_second': round(items / h.sum, 3) if h.sum else None,
+            }
+
+        geocode = {via: self.total('geocode_total', via=via) for via in self._label_values('geocode_total', 'via')}
+
+        return {
+            'updated_at': self.updated_at,
+            'stages': stages,
+            'http': http,
+            'db_write': db,
+            'dedup': dedup,
+            'geocode': geocode,
+            'collectors': collectors,
+        }
+
+    def format_report(self) -> List[str]:
+        """Linhas legíveis para o terminal (show_stats)"""
+        report = self.report()
+        linhas = []
+
+        def ms(value):
+            return f"{value * 1000:.0f}ms" if value is not None else '-'
+
+        if report['collectors']:
+            linhas.append("Coletores (itens gravados/s):")
+            for nome, c in sorted(report['collectors'].items()):
+                linhas.append(f"  {nome}: {c['items']:,.0f} itens em {c['runs']} execuções, "
+                              f"{c['items_per_second'] or 0:.2f} itens/s")
+
+        if report['stages']:
+            linhas.append("Estágios (p50 / p95 / total):")
+            for nome, s in sorted(report['stages'].items(), key=lambda kv: -kv[1]['sum']):
+                linhas.append(f"  {nome}: {ms(s['p50'])} / {ms(s['p95'])} / {s['sum']:.1f}s ({s['count']:,}x)")
+
+        if report['http']:
+            linhas.append("HTTP por host (p50 / p95):")
+            for host, h in sorted(report['http'].items(), key=lambda kv: -kv[1]['count']):
+                linhas.append(f"  {host}: {ms(h['p50'])} / {ms(h['p95'])} ({h['count']:,} req, "
+                              f"{h['errors']:.0f} erros, {h['cache']:.0f} do cache)")
+
+        if report['db_write']:
+            linhas.append("Gravação no banco (p50 / p95):")
+            for table, d in sorted(report['db_write'].items()):
+                linhas.append(f"  {table}: {ms(d['p50'])} / {ms(d['p95'])}, "
+                              f"{d['rows_inserted']:,.0f} de {d['rows_sent']:,.0f} linhas inseridas")
+
+        if report['dedup']:
+            linhas.append("Deduplicação (acertos):")
+            for filtro, d in sorted(report['dedup'].items()):
+                taxa = f"{d['hit_rate'] * 100:.1f}%" if d['hit_rate'] is not None else '-'
+                linhas.append(f"  {filtro}: {taxa} de {d['checks']:,.0f} verificações")
+
+        if report['geocode']:
+            linhas.append("Geocodificação: " + ", ".join(
+                f"{via} {n:,.0f}" for via, n in sorted(report['geocode'].items(), key=lambda kv: -kv[1])
+            ))
+
+        return linhas
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    partes = []
+    for k, v in labels:
+        v = v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{k}="{v}"')
+    return '{' + ','.join(partes) + '}'
+
+
+# Registro do processo; o que sobrar é gravado na saída
+METRICS = Metrics()
+atexit.register(METRICS.flush)
@@ -0,0 +1,231 @@
+"""
+SafeDrive RJ - Base fixa de crimes do servidor mock (main.py)
+
+Os crimes são gerados uma vez, na subida, com seed fixa: a mesma seed
+dá sempre os mesmos pontos, então o app vê respostas estáveis e dá para
+testar carga no cliente sem PostGIS. A geração é em lote (sample_land:
+máscara de terra em numpy, só a parte rejeitada é sorteada de novo).
+
+    * /nearby: grade uniforme (células de CELL graus) sobre os pontos,
+      candidatos só das células que cobrem o raio, distância exata depois
+    * /all: JSON serializado uma vez (mesma base, mesma resposta)
+    * /stats: contagens da base
+
+Uso:
+    base = MockCrimeDataset.generate(n=10000, seed=42)
+    base.nearby(-22.97, -43.18, radius=1000)
+"""
+
+import json
+from datetime import date
+from typing import Dict, List
+
+import numpy as np
+
+CRIME_TYPES = [
+    "Roubo",
+    "Roubo de Veículo",
+    "Assalto",
+    "Furto",
+    "Furto de Veículo",
+    "Sequestro",
+]
+
+# Pesos para cada tipo (Sequestro é mais raro)
+CRIME_WEIGHTS = [30, 25, 20, 15, 8, 2]
+
+# ÁREAS URBANAS DO RIO (evitar oceano/baías)
+URBAN_AREAS = [
+    # Centro/Zona Sul (Copacabana, Ipanema, Centro)
+    {"lat_min": -22.97, "lat_max": -22.88, "lng_min": -43.25, "lng_max": -43.16, "weight": 30, "name": "Centro/ZS"},
+    # Zona Norte (Tijuca, Méier, Madureira)
+    {"lat_min": -22.93, "lat_max": -22.83, "lng_min": -43.35, "lng_max": -43.23, "weight": 25, "name": "Zona Norte"},
+    # Zona Oeste (Barra, Jacarepaguá, Campo Grande)
+    {"lat_min": -23.02, "lat_max": -22.93, "lng_min": -43.50, "lng_max": -43.30, "weight": 20, "name": "Zona Oeste"},
+    # Baixada Fluminense (Duque de Caxias, Nova Iguaçu)
+    {"lat_min": -22.87, "lat_max": -22.73, "lng_min": -43.42, "lng_max": -43.28, "weight": 15, "name": "Baixada"},
+    # Niterói/São Gonçalo
+    {"lat_min": -22.96, "lat_max": -22.81, "lng_min": -43.15, "lng_max": -42.95, "weight": 10, "name": "Niterói/SG"},
+]
+
+# Janela das datas de ocorrência (dias para trás)
+DAYS = 365
+
+# Lado da célula da grade (graus, ~1,1 km)
+CELL = 0.01
+
+# Metros por grau de latitude (longitude: multiplicar por cos(lat))
+METERS_PER_DEGREE = 111320.0
+
+
+def land_mask(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """Coordenadas em TERRA (não oceano/baía), em lote"""
+    # Oceano a LESTE (longitude muito pequena) e ao SUL (latitude muito grande)
+    agua = (lng > -43.10) | (lat < -23.05)
+
+    # Baía de Guanabara - centro da baía (muito água)
+    agua |= (lat >= -22.95) & (lat <= -22.75) & (lng > -43.15) & (lng <= -43.05)
+
+    # Oceano Atlântico ao sul de Copacabana/Ipanema
+    agua |= (lat < -22.98) & (lng > -43.20)
+
+    return ~agua
+
+
+def sample_land(n: int, rng: np.random.Generator, max_rounds: int = 20):
+    """
+    Sorteia n pontos em terra nas áreas urbanas (rejeição em lote)
+
+    Cada área recebe sua parte pelo peso; a cada rodada só a parte
+    rejeitada é sorteada de novo, ampliada pela taxa de acerto da área.
+    Retorna (lat, lng, área) embaralhados.
+    """
+    pesos = np.array([a["weight"] for a in URBAN_AREAS], dtype=float)
+    metas = rng.multinomial(n, pesos / pesos.sum())
+    lat, lng, areas = [], [], []
+
+    for i, (area, meta) in enumerate(zip(URBAN_AREAS, metas)):
+        faltam, acerto = int(meta), 1.0
+
+        for _ in range(max_rounds):
+            if faltam == 0:
+                break
+
+            k = int(faltam / acerto * 1.1) + 16
+            y = np.round(rng.uniform(area["lat_min"], area["lat_max"], k), 6)
+            x = np.round(rng.uniform(area["lng_min"], area["lng_max"], k), 6)
+            ok = land_mask(y, x)
+            acerto = max(ok.mean(), 0.01)
+
+            y, x = y[ok][:faltam], x[ok][:faltam]
+            lat.append(y)
+            lng.append(x)
+            areas.append(np.full(len(y), i))
+            faltam -= len(y)
+
+    if not lat:
+        vazio = np.empty(0)
+        return vazio, vazio.copy(), np.empty(0, dtype=np.int64)
+
+    lat, lng, areas = np.concatenate(lat), np.concatenate(lng), np.concatenate(areas)
+    ordem = rng.permutation(len(lat))
+    return lat[ordem], lng[ordem], areas[ordem]
+
+
+class GridIndex:
+    """Grade uniforme: pontos ordenados por célula, busca por bbox"""
+
+    def __init__(self, lat: np.ndarray, lng: np.ndarray, cell: float = CELL):
+        self.cell = cell
+        self.lat0 = float(lat.min()) if len(lat) else 0.0
+        self.lng0 = float(lng.min()) if len(lng) else 0.0
+
+        rows = ((lat - self.lat0) // cell).astype(np.int64)
+        cols = ((lng - self.lng0) // cell).astype(np.int64)
+        self.nrows = int(rows.max()) + 1 if len(lat) else 0
+        self.ncols = int(cols.max()) + 1 if len(lng) else 0
+
+        # Célula em ordem de linha: as colunas de uma linha são contíguas
+        keys = rows * self.ncols + cols
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+    def candidates(self, lat: float, lng: float, dlat: float, dlng: float) -> np.ndarray:
+        """Índices dos pontos nas células que cobrem [lat ± dlat] × [lng ± dlng]"""
+        r0 = int((lat - dlat - self.lat0) // self.cell)
+        r1 = int((lat + dlat - self.lat0) // self.cell)
+        c0 = int((lng - dlng - self.lng0) // self.cell)
+        c1 = int((lng + dlng - self.lng0) // self.cell)
+        if r1 < 0 or c1 < 0 or r0 >= self.nrows or c0 >= self.ncols:
+            return np.empty(0, dtype=np.int64)
+
+        rows = np.arange(max(r0, 0), min(r1, self.nrows - 1) + 1) * self.ncols
+        if len(rows) == 0 or c0 > c1:
+            return np.empty(0, dtype=np.int64)
+
+        starts = np.searchsorted(self.keys, rows + max(c0, 0), 'left')
+        ends = np.searchsorted(self.keys, rows + min(c1, self.ncols - 1), 'right')
+        return np.concatenate([self.order[s:e] for s, e in zip(starts, ends)])
+
+
+class MockCrimeDataset:
+    """Crimes do mock em arrays (id = posição), com índice espacial"""
+
+    def __init__(self, lat: np.ndarray, lng: np.ndarray, tipo: np.ndarray,
+                 data: np.ndarray, seed: int):
+        self.lat = lat
+        self.lng = lng
+        self.tipo = tipo
+        self.data = data
+        self.seed = seed
+        self.index = GridIndex(lat, lng)
+        self.ids = np.array([f"mock-rj-{i}" for i in range(len(lat))])
+
+        counts = np.bincount(tipo, minlength=len(CRIME_TYPES))
+        self.by_type = {nome: int(c) for nome, c in zip(CRIME_TYPES, counts)}
+        self._all_json = None
+
+    def __len__(self):
+        return len(self.lat)
+
+    @classmethod
+    def generate(cls, n: int = 10000, seed: int = 42) -> 'MockCrimeDataset':
+        """Sorteia n crimes em terra nas áreas urbanas (vetorizado)"""
+        rng = np.random.default_rng(seed)
+        lat, lng, _ = sample_land(n, rng)
+
+        n = len(lat)
+        pesos_tipo = np.array(CRIME_WEIGHTS, dtype=float)
+        tipo = rng.choice(len(CRIME_TYPES), n, p=pesos_tipo / pesos_tipo.sum())
+        dias = rng.integers(0, DAYS + 1, n)
+        data = (np.datetime64(date.today()) - dias.astype('timedelta64[D]')).astype(str)
+
+        return cls(lat, lng, tipo, data, seed)
+
+    def _crime(self, i: int) -> Dict:
+        return {
+            "id": self.ids[i],
+            "latitude": float(self.lat[i]),
+            "longitude": float(self.lng[i]),
+            "tipo_crime": CRIME_TYPES[self.tipo[i]],
+            "data_ocorrencia": self.data[i],
+        }
+
+    def nearby(self, lat: float, lng: float, radius: float, limit: int = 150) -> List[Dict]:
+        """Crimes a até `radius` metros, do mais próximo ao mais distante"""
+        coslat = max(np.cos(np.radians(lat)), 1e-6)
+        dlat = radius / METERS_PER_DEGREE
+        idx = self.index.candidates(lat, lng, dlat, dlat / coslat)
+
+        # Equirretangular: erro desprezível nos raios do app (até alguns km)
+        dy = (self.lat[idx] - lat) * METERS_PER_DEGREE
+        dx = (self.lng[idx] - lng) * METERS_PER_DEGREE * coslat
+        dist = np.hypot(dx, dy)
+
+        dentro = dist <= radius
+        idx, dist = idx[dentro], dist[dentro]
+        ordem = np.argsort(dist, kind='stable')[:limit]
+
+        crimes = []
+        for i, d in zip(idx[ordem], dist[ordem]):
+            crime = self._crime(i)
+            crime["distance"] = round(float(d), 2)
+            crimes.append(crime)
+        return crimes
+
+    def all_json(self) -> bytes:
+        """Resposta de /api/crimes/all, serializada na primeira chamada"""
+        if self._all_json is None:
+            self._all_json = json.dumps({
+                "crimes": [self._crime(i) for i in range(len(self))],
+                "total": len(self),
+                "estado": "RJ",
+                "stats": self.by_type,
+                "urban_only": True,
+                "validated_land": True,
+                "mock": True,
+            }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return self._all_json
+
+    def stats(self) -> Dict:
+        return {"total": len(self), "by_type": self.by_type}
@@ -0,0 +1,226 @@
+"""
+SafeDrive RJ - Índice de notícias quase-duplicadas (MinHash + LSH)
+
+Substitui a varredura com SequenceMatcher em buscar_noticia_similar:
+    * Assinatura MinHash dos 3-gramas do título normalizado
+      (salva em noticias_crimes.minhash, calculada uma vez por notícia)
+    * LSH em bandas: só os títulos que colidem em alguma banda viram
+      candidatos (busca sublinear)
+    * Similaridade exata (SequenceMatcher) apenas nos candidatos
+
+Mantém em memória a janela móvel de 30 dias, como a busca original.
+
+Uso:
+    indice = NearDuplicateIndex(threshold=0.80)
+    indice.load(conn)
+    id_similar, similaridade = indice.find(titulo, tipo_crime, local)
+    indice.add(novo_id, titulo, tipo_crime, local)
+"""
+
+import heapq
+import re
+import zlib
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.services.metrics import METRICS
+
+STOPWORDS = frozenset(['o', 'a', 'de', 'da', 'do', 'em', 'no', 'na', 'e', 'é', 'são'])
+
+_PONTUACAO = re.compile(r'[^\w\s]')
+
+# 42 bandas x 3 linhas: pares com SequenceMatcher >= 0.8 têm Jaccard de
+# 3-gramas >= ~0.5 e colidem com probabilidade > 99%
+NUM_PERM = 126
+BANDS = 42
+SHINGLE = 3
+
+# Hash universal (a*x + b) mod p, com coeficientes fixos: as assinaturas
+# salvas no banco continuam válidas entre execuções
+_PRIME = np.uint64(4294967311)
+_rng = np.random.RandomState(20240101)
+_A = _rng.randint(1, 2 ** 31, NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 2 ** 31, NUM_PERM).astype(np.uint64)
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas, sem pontuação, sem stopwords e palavras curtas"""
+    if not texto:
+        return ""
+
+    palavras = _PONTUACAO.sub(' ', texto.lower()).split()
+    return ' '.join(p for p in palavras if p not in STOPWORDS and len(p) > 2)
+
+
+def similaridade(norm1: str, norm2: str) -> float:
+    """Similaridade exata entre dois títulos JÁ normalizados"""
+    if not norm1 or not norm2:
+        return 0.0
+    return SequenceMatcher(None, norm1, norm2).ratio()
+
+
+def minhash(normalizado: str) -> np.ndarray:
+    """Assinatura MinHash (NUM_PERM inteiros) dos 3-gramas do texto"""
+    shingles = {
+        normalizado[i:i + SHINGLE]
+        for i in range(max(1, len(normalizado) - SHINGLE + 1))
+    }
+    # crc32 (e não hash()) para ser estável entre processos
+    x = np.fromiter(
+        (zlib.crc32(s.encode('utf-8')) for s in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+    return ((np.outer(x, _A) + _B) % _PRIME).min(axis=0)
+
+
+class _Entry:
+    __slots__ = ('id', 'normalizado', 'tipo_crime', 'local', 'coletado_em', 'keys')
+
+    def __init__(self, id, normalizado, tipo_crime, local, coletado_em, keys):
+        self.id = id
+        self.normalizado = normalizado
+        self.tipo_crime = tipo_crime
+        self.local = local
+        self.coletado_em = coletado_em
+        self.keys = keys
+
+
+class NearDuplicateIndex:
+    """Índice LSH em memória das notícias da janela recente"""
+
+    def __init__(self, threshold: float = 0.80, window_days: int = 30):
+        self.threshold = threshold
+        self.window = timedelta(days=window_days)
+        self.entries: Dict[int, _Entry] = {}
+        self.buckets: Dict[tuple, Set[int]] = {}
+        self._expiry: List[Tuple[datetime, int]] = []  # heap (coletado_em, id)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def signature(titulo: str) -> List[int]:
+        """Assinatura para salvar em noticias_crimes.minhash"""
+        return minhash(normalizar_texto(titulo)).tolist()
+
+    def load(self, conn) -> int:
+        """
+        Carrega a janela do banco (e calcula assinaturas que faltam)
+
+        Returns:
+            Número de notícias no índice
+        """
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT id, titulo, tipo_crime, local, coletado_em, minhash
+            FROM noticias_crimes
+            WHERE coletado_em >= NOW() - %s
+        """, (self.window,))
+
+        sem_assinatura = []
+        for id_, titulo, tipo_crime, local, coletado_em, assinatura in cur.fetchall():
+            if assinatura is None:
+                assinatura = self.signature(titulo)
+                sem_assinatura.append((id_, assinatura))
+            self.add(id_, titulo, tipo_crime, local, coletado_em, assinatura)
+
+        # Notícias anteriores à coluna minhash: grava uma vez
+        if sem_assinatura:
+            from psycopg2.extras import execute_values
+            execute_values(cur, """
+                UPDATE noticias_crimes n SET minhash = v.minhash
+                FROM (VALUES %s) AS v(id, minhash)
+                WHERE n.id = v.id
+            """, sem_assinatura, template="(%s, %s::bigint[])")
+            conn.commit()
+
+        cur.close()
+        return len(self.entries)
+
+    def add(self, id_: int, titulo: str, tipo_crime: str, local: Optional[str],
+            coletado_em: datetime = None, assinatura=None):
+        """Adiciona (ou substitui) uma notícia no índice"""
+        if id_ in self.entries:
+            self._remove(id_)
+
+        normalizado = normalizar_texto(titulo)
+        if assinatura is None:
+            assinatura = minhash(normalizado)
+
+        keys = self._keys(tipo_crime, assinatura)
+        coletado_em = coletado_em or datetime.now()
+
+        self.entries[id_] = _Entry(id_, normalizado, tipo_crime, local, coletado_em, keys)
+        for key in keys:
+            self.buckets.setdefault(key, set()).add(id_)
+        heapq.heappush(self._expiry, (coletado_em, id_))
+
+    def find(self, titulo: str, tipo_crime: str, local: Optional[str]) -> Tuple[Optional[int], float]:
+        """
+        Busca notícia similar do mesmo tipo (e mesmo local, se informado)
+
+        Returns:
+            (id, similaridade) ou (None, 0.0)
+        """
+        self.expire()
+
+        normalizado = normalizar_texto(titulo)
+        if not normalizado:
+            return None, 0.0
+
+        candidatos = set()
+        for key in self._keys(tipo_crime, minhash(normalizado)):
+            candidatos |= self.buckets.get(key, set())
+
+        melhor_id = None
+        melhor_similaridade = 0.0
+
+        for id_ in candidatos:
+            entry = self.entries[id_]
+            if local and entry.local != local:
+                continue
+
+            sim = similaridade(normalizado, entry.normalizado)
+            if sim > melhor_similaridade:
+                melhor_similaridade = sim
+                melhor_id = id_
+
+        if melhor_similaridade >= self.threshold:
+            METRICS.dedup('near_duplicates', True)
+            return melhor_id, melhor_similaridade
+
+        METRICS.dedup('near_duplicates', False)
+        return None, 0.0
+
+    def discard(self, id_: int):
+        """Remove uma notícia (ex.: INSERT desfeito por rollback)"""
+        if id_ in self.entries:
+            self._remove(id_)
+
+    def expire(self, now: datetime = None):
+        """Remove notícias que saíram da janela"""
+        limite = (now or datetime.now()) - self.window
+        while self._expiry and self._expiry[0][0] < limite:
+            coletado_em, id_ = heapq.heappop(self._expiry)
+            entry = self.entries.get(id_)
+            # Entradas substituídas deixam tuplas antigas no heap
+            if entry is not None and entry.coletado_em == coletado_em:
+                self._remove(id_)
+
+    def _remove(self, id_: int):
+        entry = self.entries.pop(id_)
+        for key in entry.keys:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(id_)
+                if not bucket:
+                    del self.buckets[key]
+
+    @staticmethod
+    def _keys(tipo_crime: str, assinatura) -> List[tuple]:
+        """Uma chave por banda (tipo de crime faz parte da chave)"""
+        rows = np.asarray(assinatura, dtype=np.uint64).reshape(BANDS, -1)
+        return [(tipo_crime, banda, row.tobytes()) for banda, row in enumerate(rows)]
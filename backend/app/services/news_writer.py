@@ -0,0 +1,235 @@
+"""
+SafeDrive RJ - Gravação de notícias com deduplicação (coletores v3)
+
+Uma conexão para a coleta inteira e UMA transação por página:
+    * Similar no índice  -> array_append da fonte/link (sem ler a linha antes);
+                            se a nova fonte for preferida, a notícia dela vira a
+                            principal (todas as colunas de conteúdo juntas) e a
+                            antiga passa para as alternativas
+    * Sem similar        -> INSERT ... ON CONFLICT (link) RETURNING id
+
+Se a página falhar, ela é desfeita e regravada notícia a notícia, para
+que uma linha problemática não derrube as outras.
+
+Uso:
+    with NewsWriter(DB_CONFIG, indice, prioridade=["Extra", "G1 Rio"]) as writer:
+        resultados = writer.save_page(noticias)  # ["nova", "alternativa", ...]
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+
+from app.services.known_items import KnownItems
+from app.services.metrics import METRICS
+from app.services.near_duplicates import NearDuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+# Resultados de save_page()
+NOVA = "nova"
+ALTERNATIVA = "alternativa"
+DUPLICADA_LINK = "duplicada_link"
+FONTE_REPETIDA = "fonte_repetida"
+ERRO = "erro"
+
+SQL_INSERIR = """
+    INSERT INTO noticias_crimes (
+        tipo_crime, titulo, link, resumo, fonte,
+        fonte_principal, num_fontes,
+        data_publicacao, local, latitude, longitude, texto_preview, minhash
+    ) VALUES (%s, %s, %s, %s, %s, %s, 1, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (link) DO UPDATE SET
+        atualizado_em = NOW()
+    RETURNING id, (xmax = 0) AS inserida
+"""
+
+# Só acrescenta se a fonte ainda não estiver na notícia. Se a nova fonte
+# tiver prioridade maior que a principal (sites coletados em paralelo), a
+# notícia dela vira a linha (fonte, link e conteúdo trocados juntos) e a
+# antiga passa para as alternativas, como na coleta sequencial em ordem de
+# prioridade. Sem troca se o link novo já estiver em outra linha (UNIQUE).
+SQL_FONTE_ALTERNATIVA = """
+    UPDATE noticias_crimes n
+    SET fontes_alternativas = array_append(COALESCE(n.fontes_alternativas, '{}'),
+            CASE WHEN t.troca THEN n.fonte_principal ELSE %(fonte)s END),
+        links_alternativos = array_append(COALESCE(n.links_alternativos, '{}'),
+            CASE WHEN t.troca THEN n.link ELSE %(link)s END),
+        fonte_principal = CASE WHEN t.troca THEN %(fonte)s ELSE n.fonte_principal END,
+        fonte = CASE WHEN t.troca THEN %(fonte)s ELSE n.fonte END,
+        link = CASE WHEN t.troca THEN %(link)s ELSE n.link END,
+        tipo_crime = CASE WHEN t.troca THEN %(tipo_crime)s ELSE n.tipo_crime END,
+        titulo = CASE WHEN t.troca THEN %(titulo)s ELSE n.titulo END,
+        resumo = CASE WHEN t.troca THEN %(resumo)s ELSE n.resumo END,
+        texto_preview = CASE WHEN t.troca THEN %(texto_preview)s ELSE n.texto_preview END,
+        data_publicacao = CASE WHEN t.troca THEN %(data_publicacao)s ELSE n.data_publicacao END,
+        local = CASE WHEN t.troca THEN %(local)s ELSE n.local END,
+        latitude = CASE WHEN t.troca THEN %(latitude)s ELSE n.latitude END,
+        longitude = CASE WHEN t.troca THEN %(longitude)s ELSE n.longitude END,
+        minhash = CASE WHEN t.troca THEN %(minhash)s::bigint[] ELSE n.minhash END,
+        num_fontes = COALESCE(n.num_fontes, 1) + 1,
+        atualizado_em = NOW()
+    FROM (
+        SELECT COALESCE(array_position(%(prioridade)s::text[], fonte_principal), 2147483647)
+             > COALESCE(array_position(%(prioridade)s::text[], %(fonte)s), 2147483647)
+           AND %(link)s IS NOT NULL
+           AND NOT EXISTS (SELECT 1 FROM noticias_crimes o WHERE o.link = %(link)s) AS troca
+        FROM noticias_crimes
+        WHERE id = %(id)s
+    ) t
+    WHERE n.id = %(id)s
+      AND n.fonte_principal IS DISTINCT FROM %(fonte)s
+      AND NOT (%(fonte)s = ANY(COALESCE(n.fontes_alternativas, '{}')))
+    RETURNING n.id, t.troca
+"""
+
+
+class NewsWriter:
+    """Grava páginas de notícias numa conexão única, uma transação por página"""
+
+    def __init__(self, db_config: Dict, indice: NearDuplicateIndex,
+                 prioridade: Optional[List[str]] = None,
+                 conhecidos: Optional[KnownItems] = None):
+        """
+        Args:
+            db_config: Parâmetros do psycopg2.connect
+            indice: Índice de quase-duplicadas (já carregado)
+            prioridade: Fontes da mais para a menos preferida como principal
+            conhecidos: Filtro de links gravados (atualizado a cada página)
+        """
+        self.db_config = db_config
+        self.indice = indice
+        self.prioridade = list(prioridade or [])
+        self.conhecidos = conhecidos
+        self.conn = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def connect(self):
+        """(Re)abre a conexão se necessário"""
+        if self.conn is None or self.conn.closed:
+            self.conn = psycopg2.connect(**self.db_config)
+        return self.conn
+
+    def close(self):
+        if self.conn is not None and not self.conn.closed:
+            self.conn.close()
+        self.conn = None
+
+    def save_page(self, noticias: List[Dict]) -> List[str]:
+        """
+        Grava as notícias (já processadas) de uma página
+
+        Returns:
+            Um resultado por notícia: nova, alternativa, duplicada_link,
+            fonte_repetida ou erro
+        """
+        if not noticias:
+            return []
+
+        conn = self.connect()
+        resultados = []
+        novos_ids = []
+        trocas = []
+        inicio = time.perf_counter()
+
+        try:
+            with conn.cursor() as cur:
+                for noticia in noticias:
+                    resultado, novo_id = self._save(cur, noticia, trocas)
+                    resultados.append(resultado)
+                    if novo_id is not None:
+                        novos_ids.append(novo_id)
+            conn.commit()
+
+            segundos = time.perf_counter() - inicio
+            METRICS.observe("db_write_seconds", segundos, table="noticias_crimes")
+            METRICS.observe("stage_seconds", segundos, stage="db_write")
+            METRICS.inc("db_rows_total", len(noticias), table="noticias_crimes", result="sent")
+            METRICS.inc("db_rows_total", resultados.count(NOVA), table="noticias_crimes", result="inserted")
+
+            # Linhas que trocaram de notícia principal: índice com o título novo
+            for id_, noticia, assinatura in trocas:
+                self.indice.add(id_, noticia.get("titulo"), noticia.get("tipo_crime"),
+                                noticia.get("local"), assinatura=assinatura)
+
+            if self.conhecidos is not None:
+                for noticia in noticias:
+                    self.conhecidos.add(noticia.get("link"))
+            return resultados
+
+        except psycopg2.Error as e:
+            if not conn.closed:
+                conn.rollback()
+            # Os INSERTs foram desfeitos: tira do índice
+            for id_ in novos_ids:
+                self.indice.discard(id_)
+
+            if len(noticias) == 1:
+                logger.error(f"❌ Erro ao salvar: {e}")
+                return [ERRO]
+
+            logger.warning(f"⚠️ Página desfeita ({e}) - regravando notícia a notícia")
+            return [self.save_page([noticia])[0] for noticia in noticias]
+
+    def _save(self, cur, noticia: Dict, trocas: List) -> Tuple[str, Optional[int]]:
+        """Grava uma notícia; (id, notícia, assinatura) vai para trocas se ela virou a principal"""
+        titulo = noticia.get("titulo")
+        tipo_crime = noticia.get("tipo_crime")
+        local = noticia.get("local")
+
+        id_similar, similaridade = self.indice.find(titulo, tipo_crime, local)
+        assinatura = self.indice.signature(titulo)
+
+        if id_similar:
+            logger.info(f"  🔗 Similar encontrada (ID {id_similar}, {similaridade:.0%}) - adicionando fonte alternativa")
+            cur.execute(SQL_FONTE_ALTERNATIVA, {
+                "id": id_similar,
+                "fonte": noticia.get("fonte"),
+                "link": noticia.get("link"),
+                "tipo_crime": tipo_crime,
+                "titulo": titulo,
+                "resumo": noticia.get("resumo"),
+                "texto_preview": noticia.get("texto_preview"),
+                "data_publicacao": noticia.get("data_publicacao"),
+                "local": local,
+                "latitude": noticia.get("latitude"),
+                "longitude": noticia.get("longitude"),
+                "minhash": assinatura,
+                "prioridade": self.prioridade,
+            })
+            row = cur.fetchone()
+            if row is None:
+                return FONTE_REPETIDA, None
+            if row[1]:
+                trocas.append((id_similar, noticia, assinatura))
+            return ALTERNATIVA, None
+
+        cur.execute(SQL_INSERIR, (
+            tipo_crime,
+            titulo,
+            noticia.get("link"),
+            noticia.get("resumo"),
+            noticia.get("fonte"),
+            noticia.get("fonte"),  # fonte_principal = fonte
+            noticia.get("data_publicacao"),
+            local,
+            noticia.get("latitude"),
+            noticia.get("longitude"),
+            noticia.get("texto_preview"),
+            assinatura
+        ))
+        id_, inserida = cur.fetchone()
+
+        if not inserida:
+            return DUPLICADA_LINK, None
+
+        self.indice.add(id_, titulo, tipo_crime, local, assinatura=assinatura)
+        return NOVA, id_
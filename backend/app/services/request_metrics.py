@@ -0,0 +1,247 @@
+"""
+SafeDrive RJ - Métricas por rota das APIs (latência, banco, serialização)
+
+    install_metrics(app, engine)   # app/main.py (SQLAlchemy)
+    install_metrics(app)           # main.py (mock, sem banco)
+
+Por requisição, agrupado pela rota ("/api/crimes/nearby", não a URL):
+    * latência total (p50/p95/p99)
+    * tempo no banco (eventos do SQLAlchemy) e número de queries
+    * tempo de serialização (json.dumps da resposta, TimedJSONResponse)
+    * linhas (rowcount das queries; sem ele, itens da maior lista do JSON)
+    * bytes da resposta
+
+O resto (latência - banco - serialização) é código da rota, validação e
+jsonable_encoder. GET /metrics devolve o texto do Prometheus (+ métricas
+de ingestão, se pedido); /metrics?format=json traz o resumo por rota,
+ordenado por p99.
+
+Profiler (opcional, pyinstrument): com SAFEDRIVE_PROFILING=1 no ambiente,
+qualquer requisição com ?profile=1 devolve o perfil em HTML no lugar da
+resposta. Rotas síncronas (def) rodam no threadpool: o perfil mostra o
+tempo da rota como um bloco só, a divisão fica por conta das métricas.
+"""
+
+import contextvars
+import os
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Match
+
+from app.services.metrics import Metrics
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+PROFILING_ENV = 'SAFEDRIVE_PROFILING'
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Registro das APIs (separado do METRICS da ingestão; vive só no processo)
+API_METRICS = Metrics()
+
+
+class RequestTimings:
+    """Acumulado de uma requisição (compartilhado com o threadpool via contextvar)"""
+
+    __slots__ = ('db_seconds', 'db_queries', 'db_rows', 'serialize_seconds', 'items')
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.db_rows = 0
+        self.serialize_seconds = 0.0
+        self.items = 0
+
+
+_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    'safedrive_request_timings', default=None
+)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse que mede o json.dumps (default_response_class das apps)"""
+
+    def render(self, content: Any) -> bytes:
+        inicio = time.perf_counter()
+        body = super().render(content)
+        timings = _timings.get()
+        if timings is not None:
+            timings.serialize_seconds += time.perf_counter() - inicio
+            if isinstance(content, dict):
+                timings.items = max((len(v) for v in content.values() if isinstance(v, list)), default=0)
+            elif isinstance(content, list):
+                timings.items = len(content)
+        return body
+
+
+def instrument_engine(engine):
+    """Soma tempo, queries e linhas de cada execução do SQLAlchemy na requisição atual"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('safedrive_inicio', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info['safedrive_inicio'].pop()
+        timings = _timings.get()
+        if timings is not None:
+            timings.db_seconds += time.perf_counter() - inicio
+            timings.db_queries += 1
+            timings.db_rows += max(cursor.rowcount or 0, 0)
+
+
+def _route_path(scope) -> str:
+    """Template da rota (agrupa /vehicle/ABC1234 e /vehicle/XYZ9876)"""
+    route = scope.get('route')
+    if route is not None and hasattr(route, 'path'):
+        return route.path
+    for route in scope['app'].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, 'path', scope['path'])
+    return 'unmatched'
+
+
+class RequestMetricsMiddleware:
+    """Middleware ASGI: mede cada requisição HTTP e registra em API_METRICS"""
+
+    def __init__(self, app, metrics: Metrics = API_METRICS):
+        self.app = app
+        self.metrics = metrics
+        self.profiling = os.getenv(PROFILING_ENV, '') not in ('', '0', 'false') and Profiler is not None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        if self.profiling and parse_qs(scope.get('query_string', b'').decode()).get('profile') == ['1']:
+            return await self._profile(scope, receive, send)
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        resposta = {'status': 500, 'bytes': 0}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                resposta['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                resposta['bytes'] += len(message.get('body', b''))
+            await send(message)
+
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            segundos = time.perf_counter() - inicio
+            _timings.reset(token)
+            self._record(scope, timings, segundos, resposta['status'], resposta['bytes'])
+
+    def _record(self, scope, timings: RequestTimings, segundos: float, status: int, size: int):
+        path = _route_path(scope)
+        if path == '/metrics':
+            return
+        labels = {'method': scope['method'], 'route': path}
+
+        self.metrics.observe('api_request_seconds', segundos, **labels)
+        if timings.db_queries:
+            self.metrics.observe('api_db_seconds', timings.db_seconds, **labels)
+        self.metrics.observe('api_serialize_seconds', timings.serialize_seconds, **labels)
+        self.metrics.inc('api_requests_total', **labels, status=f"{status // 100}xx")
+        self.metrics.inc('api_db_queries_total', timings.db_queries, **labels)
+        # rowcount de SELECT não é garantido pelo driver (sqlite dá -1): cai para os itens do JSON
+        self.metrics.inc('api_rows_total', timings.db_rows or timings.items, **labels)
+        self.metrics.inc('api_response_bytes_total', size, **labels)
+
+    async def _profile(self, scope, receive, send):
+        """Roda a requisição sob o pyinstrument e responde com o HTML do perfil"""
+        profiler = Profiler(async_mode='enabled')
+
+        async def discard(message):
+            pass
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+
+        html = profiler.output_html().encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/html; charset=utf-8'),
+                        (b'content-length', str(len(html)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': html})
+
+
+def routes_report(metrics: Metrics = API_METRICS) -> Dict:
+    """Resumo por rota (maior p99 primeiro)"""
+    latencia = _by_route(metrics, 'api_request_seconds')
+    banco = _by_route(metrics, 'api_db_seconds')
+    serializacao = _by_route(metrics, 'api_serialize_seconds')
+
+    rotas = []
+    for chave, h in latencia.items():
+        method, route = chave
+        db = banco.get(chave)
+        ser = serializacao.get(chave)
+        resumo = h.summary()
+        rotas.append({
+            'method': method,
+            'route': route,
+            **resumo,
+            'db': db.summary() if db else None,
+            'serialize': ser.summary() if ser else None,
+            'db_share': round(db.sum / h.sum, 4) if db and h.sum else None,
+            'serialize_share': round(ser.sum / h.sum, 4) if ser and h.sum else None,
+            'errors': metrics.total('api_requests_total', method=method, route=route, status='5xx'),
+            'queries_per_request': round(metrics.total('api_db_queries_total', method=method, route=route) / h.count, 2),
+            'rows_per_request': round(metrics.total('api_rows_total', method=method, route=route) / h.count, 1),
+            'bytes_per_request': round(metrics.total('api_response_bytes_total', method=method, route=route) / h.count),
+        })
+
+    rotas.sort(key=lambda r: -(r['p99'] or 0))
+    return {'routes': rotas}
+
+
+def _by_route(metrics: Metrics, name: str) -> Dict:
+    resultado = {}
+    with metrics.lock:
+        for (nome, labels), h in metrics.histograms.items():
+            if nome == name:
+                labels = dict(labels)
+                resultado[(labels['method'], labels['route'])] = h
+    return resultado
+
+
+def install_metrics(app: FastAPI, engine=None, include_ingestion: bool = False):
+    """
+    Liga o middleware, o GET /metrics e (com engine) os eventos do SQLAlchemy
+
+    Chamar depois de criar a app com default_response_class=TimedJSONResponse
+    (sem isso a serialização fica zerada).
+    """
+    if engine is not None:
+        instrument_engine(engine)
+
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get('/metrics', include_in_schema=False)
+    def metrics(format: str = 'prometheus'):
+        if format == 'json':
+            return routes_report()
+
+        texto = API_METRICS.to_prometheus()
+        if include_ingestion:
+            texto += Metrics.load().to_prometheus()
+        return PlainTextResponse(texto, media_type=PROMETHEUS_CONTENT_TYPE)
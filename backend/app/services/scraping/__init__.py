@@ -0,0 +1,9 @@
+"""
+Scraping de portais de notícias (engine assíncrono + plugins por site)
+"""
+
+from .cache import HttpCache
+from .engine import ScrapingEngine, TokenBucket, crawl_sites, scrape_sites
+from .pipeline import ParsePipeline
+from .sites import SITES, SiteParser, data_publicacao, get_site, register, texto_materia
+
@@ -0,0 +1,106 @@
+"""
+Cache HTTP em disco, compartilhado por todos os coletores
+
+    * Chave = URL; corpo comprimido (zlib) + ETag/Last-Modified
+    * Revalidação condicional (If-None-Match / If-Modified-Since):
+      um 304 devolve o corpo salvo sem baixar a página de novo
+    * max_age: dentro do prazo nem há requisição (matérias não mudam)
+
+SQLite em modo WAL: vários coletores (processos) podem usar ao mesmo tempo.
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+HTTP_CACHE_FILE = Path.home() / '.safedrive_http_cache.db'
+
+# Entradas sem acesso há mais tempo que isso são apagadas ao abrir
+MAX_IDLE_DAYS = 30
+
+
+class CachedPage:
+    __slots__ = ('body', 'etag', 'last_modified', 'fetched_at')
+
+    def __init__(self, body: str, etag: Optional[str], last_modified: Optional[str], fetched_at: float):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def validators(self) -> Dict[str, str]:
+        """Cabeçalhos da requisição condicional"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """Páginas baixadas, por URL"""
+
+    def __init__(self, path: Path = HTTP_CACHE_FILE):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS paginas (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute(
+            "DELETE FROM paginas WHERE fetched_at < ?",
+            (time.time() - MAX_IDLE_DAYS * 86400,)
+        )
+        self.conn.commit()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM paginas WHERE url = ?",
+                (url,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        body, etag, last_modified, fetched_at = row
+        return CachedPage(zlib.decompress(body).decode('utf-8'), etag, last_modified, fetched_at)
+
+    def put(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO paginas (url, body, etag, last_modified, fetched_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    body = excluded.body,
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    fetched_at = excluded.fetched_at
+            """, (url, zlib.compress(body.encode('utf-8')), etag, last_modified, time.time()))
+            self.conn.commit()
+
+    def touch(self, url: str):
+        """Página revalidada (304): renova o prazo"""
+        with self.lock:
+            self.conn.execute("UPDATE paginas SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
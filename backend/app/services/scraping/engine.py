@@ -0,0 +1,365 @@
+"""
+Motor assíncrono de scraping (httpx + asyncio)
+
+    * Um AsyncClient (pool de conexões) compartilhado por todos os sites
+    * Limite de concorrência e token bucket POR HOST
+    * Sites rodam em paralelo; páginas de um mesmo site são entregues
+      em ordem, com prefetch das próximas dentro do limite do host
+    * Cache HTTP em disco (ETag/Last-Modified) compartilhado entre coletores
+    * HTML interpretado num pool de processos (fila limitada), fora do
+      event loop: parsing e downloads não se revezam mais
+
+Uso:
+    async with ScrapingEngine() as engine:
+        noticias, tem_conteudo = await engine.scrape('g1', 1)
+        await engine.crawl_sites({'g1': range(1, 6), 'r7': range(1, 4)}, on_page)
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.services.metrics import METRICS
+
+from .cache import HTTP_CACHE_FILE, HttpCache
+from .pipeline import ParsePipeline
+from .sites import get_site
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+
+HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+logger = logging.getLogger(__name__)
+
+# httpx loga cada requisição em INFO: poluiria os logs dos coletores
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+class TokenBucket:
+    """Token bucket: no máximo `rate` requisições/s, com rajada de `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostLimit:
+    """Concorrência + taxa de um host"""
+
+    def __init__(self, rate: float, concurrency: int, burst: int = 1):
+        self.bucket = TokenBucket(rate, burst)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+
+
+class ScrapingEngine:
+    """Cliente HTTP compartilhado com limites por host e plugins por site"""
+
+    def __init__(self, timeout: float = 15.0, max_connections: int = 20,
+                 default_rate: float = 0.5, default_concurrency: int = 2,
+                 cache_file: Optional[Path] = HTTP_CACHE_FILE,
+                 parse_workers: Optional[int] = None, parse_queue: int = None):
+        """
+        Args:
+            cache_file: Arquivo do cache HTTP (None desliga o cache)
+            parse_workers: Processos de parsing (0 = no próprio processo)
+            parse_queue: Páginas baixadas aguardando parsing (backpressure)
+        """
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.default_rate = default_rate
+        self.default_concurrency = default_concurrency
+        self.cache_file = cache_file
+        self.hosts: Dict[str, HostLimit] = {}
+        self.client: Optional[httpx.AsyncClient] = None
+        self.cache: Optional[HttpCache] = None
+        self.pipeline = ParsePipeline(parse_workers, parse_queue)
+        self.stats = {"requests": 0, "cache_hits": 0, "not_modified": 0}
+        self._callback_lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+        )
+        self._callback_lock = asyncio.Lock()
+        if self.cache_file:
+            self.cache = HttpCache(self.cache_file)
+        await self.pipeline.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.pipeline.close()
+        if self.pipeline.stats["parsed"]:
+            logger.info(self.pipeline.summary())
+        await self.client.aclose()
+        self.client = None
+        if self.cache:
+            self.cache.close()
+            self.cache = None
+        if self.stats["cache_hits"] or self.stats["not_modified"]:
+            logger.info(
+                f"Cache HTTP: {self.stats['requests']} requisições, "
+                f"{self.stats['not_modified']} não modificadas, "
+                f"{self.stats['cache_hits']} servidas do disco"
+            )
+
+    # ────────────────────────────────────────────────────────
+    # LIMITES
+    # ────────────────────────────────────────────────────────
+
+    def set_limit(self, host: str, rate: float = None, concurrency: int = None, burst: int = 1):
+        """Define (ou sobrescreve) o limite de um host"""
+        self.hosts[host] = HostLimit(
+            rate or self.default_rate,
+            concurrency or self.default_concurrency,
+            burst,
+        )
+
+    def set_site_delay(self, site: str, delay: float):
+        """Atalho para o `delay` dos coletores: 1 requisição a cada `delay` segundos"""
+        parser = get_site(site)
+        for host in parser.hosts():
+            self.set_limit(host, rate=1 / delay if delay else None, concurrency=parser.concurrency)
+
+    def _limit(self, url: str, site: str = None) -> HostLimit:
+        return self._host_limit(urlsplit(url).netloc, site)
+
+    def _host_limit(self, host: str, site: str = None) -> HostLimit:
+        if host not in self.hosts:
+            parser = get_site(site) if site else None
+            self.set_limit(
+                host,
+                rate=parser.rate if parser else None,
+                concurrency=parser.concurrency if parser else None,
+            )
+        return self.hosts[host]
+
+    # ────────────────────────────────────────────────────────
+    # HTTP
+    # ────────────────────────────────────────────────────────
+
+    async def get(self, url: str, site: str = None, max_age: float = 0) -> Optional[str]:
+        """
+        GET respeitando o limite do host. Retorna o HTML ou None em erro
+
+        Com cache: páginas com menos de `max_age` segundos nem são pedidas;
+        as demais são revalidadas por ETag/Last-Modified (304 = corpo salvo).
+        """
+        host = urlsplit(url).netloc
+        cached = self.cache.get(url) if self.cache else None
+        if cached is not None and max_age and cached.age() < max_age:
+            self.stats["cache_hits"] += 1
+            METRICS.inc("http_requests_total", host=host, result="cache")
+            return cached.body
+
+        limit = self._limit(url, site)
+
+        # fetch = espera do limite do host + requisição; http = só a requisição
+        with METRICS.stage("fetch"):
+            async with limit.semaphore:
+                await limit.bucket.acquire()
+                inicio = time.perf_counter()
+                try:
+                    self.stats["requests"] += 1
+                    response = await self.client.get(url, headers=cached.validators() if cached else None)
+                    METRICS.observe("http_request_seconds", time.perf_counter() - inicio, host=host)
+
+                    if response.status_code == 304 and cached is not None:
+                        self.stats["not_modified"] += 1
+                        METRICS.inc("http_requests_total", host=host, result="not_modified")
+                        self.cache.touch(url)
+                        return cached.body
+
+                    response.raise_for_status()
+                except httpx.HTTPError as e:
+                    METRICS.inc("http_requests_total", host=host, result="error")
+                    logger.debug(f"Falha em {url}: {e}")
+                    return None
+
+        METRICS.inc("http_requests_total", host=host, result="ok")
+
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if self.cache and (etag or last_modified or max_age):
+            self.cache.put(url, response.text, etag, last_modified)
+
+        return response.text
+
+    async def get_many(self, urls: Iterable[str], site: str = None, max_age: float = 0) -> List[Optional[str]]:
+        """
+        Vários GETs em paralelo (cada host continua limitado)
+
+        Devolve todo o HTML junto: para muitas páginas, use materias(),
+        que interpreta cada uma assim que chega.
+        """
+        return await asyncio.gather(*(self.get(url, site, max_age) for url in urls))
+
+    # ────────────────────────────────────────────────────────
+    # SITES
+    # ────────────────────────────────────────────────────────
+
+    async def scrape(self, site: str, pagina: int) -> Tuple[List[Dict], bool]:
+        """
+        Baixa e interpreta uma página de listagem
+
+        Tenta as URLs do plugin em ordem; a primeira com notícias vence.
+
+        Returns:
+            (noticias, tem_conteudo)
+        """
+        parser = get_site(site)
+        resultado = ([], False)
+
+        for url in parser.urls(pagina):
+            html = await self.get(url, site)
+            if html is None:
+                continue
+
+            try:
+                resultado = await self.pipeline.parse(site, html, url)
+            except Exception as e:
+                logger.error(f"Erro ao interpretar {parser.fonte} página {pagina}: {e}")
+                continue
+
+            if resultado[0]:
+                break
+
+        return resultado
+
+    async def materia(self, html: Optional[str]) -> Optional[str]:
+        """Corpo de uma matéria baixada (interpretado no pool)"""
+        if not html:
+            return None
+        try:
+            return await self.pipeline.materia(html)
+        except Exception as e:
+            logger.debug(f"Erro ao interpretar matéria: {e}")
+            return None
+
+    async def materias(self, urls: Iterable[str], site: str = None, max_age: float = 0) -> List[Optional[str]]:
+        """
+        Corpo de cada matéria, na ordem das URLs
+
+        Cada HTML vai para o pool assim que chega e é descartado depois do
+        parsing; no máximo queue_size matérias baixadas ficam em memória
+        (com a fila cheia, os downloads seguintes esperam).
+        """
+        vagas = asyncio.Semaphore(self.pipeline.queue_size)
+
+        async def uma(url):
+            async with vagas:
+                return await self.materia(await self.get(url, site, max_age))
+
+        return await asyncio.gather(*(uma(url) for url in urls))
+
+    async def crawl(self, site: str, paginas: Iterable[int], on_page: Callable) -> int:
+        """
+        Percorre as páginas de um site, entregando-as em ordem
+
+        on_page(pagina, noticias, tem_conteudo) é síncrona (pode gravar no
+        banco): roda numa thread, uma chamada por vez no engine inteiro.
+        Retornar False interrompe o site.
+
+        Returns:
+            Número de páginas entregues
+        """
+        paginas = iter(paginas)
+        host = min(get_site(site).hosts())
+        prefetch = self._host_limit(host, site).concurrency
+        pendentes: List[Tuple[int, asyncio.Task]] = []
+        entregues = 0
+
+        def agendar():
+            while len(pendentes) < prefetch:
+                pagina = next(paginas, None)
+                if pagina is None:
+                    return
+                pendentes.append((pagina, asyncio.ensure_future(self.scrape(site, pagina))))
+
+        try:
+            agendar()
+            while pendentes:
+                pagina, task = pendentes.pop(0)
+                noticias, tem_conteudo = await task
+                agendar()
+
+                async with self._callback_lock:
+                    continuar = await asyncio.to_thread(on_page, pagina, noticias, tem_conteudo)
+
+                entregues += 1
+                if continuar is False:
+                    break
+        finally:
+            for _, task in pendentes:
+                task.cancel()
+
+        return entregues
+
+    async def crawl_sites(self, jobs: Dict[str, Iterable[int]], on_page: Callable) -> Dict[str, int]:
+        """
+        Vários sites em paralelo (tempo total ~ o do site mais lento)
+
+        on_page(site, pagina, noticias, tem_conteudo)
+        """
+        async def um_site(site, paginas):
+            return await self.crawl(
+                site, paginas,
+                lambda pagina, noticias, tem: on_page(site, pagina, noticias, tem)
+            )
+
+        resultados = await asyncio.gather(*(um_site(s, p) for s, p in jobs.items()))
+        return dict(zip(jobs, resultados))
+
+
+def crawl_sites(jobs: Dict[str, Iterable[int]], on_page: Callable,
+                delays: Dict[str, float] = None, **engine_kwargs) -> Dict[str, int]:
+    """Versão síncrona de ScrapingEngine.crawl_sites (para os scripts)"""
+    async def run():
+        async with ScrapingEngine(**engine_kwargs) as engine:
+            for site, delay in (delays or {}).items():
+                engine.set_site_delay(site, delay)
+            return await engine.crawl_sites(jobs, on_page)
+
+    return asyncio.run(run())
+
+
+def scrape_sites(jobs: Dict[str, Iterable[int]], **engine_kwargs) -> Dict[str, List[Dict]]:
+    """Baixa todas as páginas pedidas e retorna as notícias por site"""
+    noticias_por_site = {site: [] for site in jobs}
+
+    def on_page(site, pagina, noticias, tem_conteudo):
+        noticias_por_site[site].extend(noticias)
+
+    crawl_sites(jobs, on_page, **engine_kwargs)
+    return noticias_por_site
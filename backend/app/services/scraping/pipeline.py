@@ -0,0 +1,148 @@
+"""
+Estágio de parsing em processos separados
+
+    fetchers (asyncio) --HTML--> fila limitada --> consumidores --> ProcessPoolExecutor
+
+O parsing (CPU) sai do event loop: enquanto um processo interpreta uma
+página, as próximas continuam sendo baixadas. A fila tem tamanho máximo:
+quando os processos não dão conta, `await pipeline.parse(...)` espera na
+fila e os fetchers param de pedir páginas novas (backpressure).
+
+A fila só limita a memória de quem entrega cada HTML assim que ele chega
+(ScrapingEngine.scrape, ScrapingEngine.materias); o que já foi baixado
+com get_many fica todo em memória, com fila ou sem.
+
+Métricas em `pipeline.stats` (profundidade máxima/média da fila, esperas
+por fila cheia, tempo de parsing).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.services.metrics import METRICS
+
+from .sites import get_site, texto_materia
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_page(site: str, html: str, url: str) -> Tuple[Tuple[List[Dict], bool], float]:
+    """Roda no processo filho: (resultado do plugin, segundos de CPU)"""
+    inicio = time.perf_counter()
+    resultado = get_site(site).parse(html, url)
+    return resultado, time.perf_counter() - inicio
+
+
+def _parse_materia(html: str) -> Tuple[Optional[str], float]:
+    inicio = time.perf_counter()
+    texto = texto_materia(html)
+    return texto, time.perf_counter() - inicio
+
+
+class ParsePipeline:
+    """Fila limitada + pool de processos (workers=0 interpreta no próprio processo)"""
+
+    def __init__(self, workers: Optional[int] = None, queue_size: int = None):
+        """
+        Args:
+            workers: Processos de parsing (padrão: núcleos - 1, no máximo 4)
+            queue_size: Páginas aguardando parsing (padrão: 4 por worker)
+        """
+        if workers is None:
+            workers = min(4, max(1, (os.cpu_count() or 2) - 1))
+        self.workers = workers
+        self.queue_size = queue_size or 4 * max(1, workers)
+        self.queue: Optional[asyncio.Queue] = None
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.consumers: List[asyncio.Task] = []
+        self.stats = {
+            "parsed": 0,
+            "parse_seconds": 0.0,
+            "queue_max": 0,
+            "queue_depth_sum": 0,
+            "queue_full_waits": 0,
+            "queue_wait_seconds": 0.0,
+        }
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.workers:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        # Um consumidor por processo: cada um mantém uma página no pool
+        self.consumers = [asyncio.create_task(self._consumir()) for _ in range(max(1, self.workers))]
+
+    async def close(self):
+        for task in self.consumers:
+            task.cancel()
+        await asyncio.gather(*self.consumers, return_exceptions=True)
+        self.consumers = []
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def depth(self) -> int:
+        """Páginas na fila agora"""
+        return self.queue.qsize() if self.queue else 0
+
+    async def parse(self, site: str, html: str, url: str) -> Tuple[List[Dict], bool]:
+        """(noticias, tem_conteudo) da página de listagem, via pool"""
+        return await self._enfileirar(_parse_page, site, html, url)
+
+    async def materia(self, html: str) -> Optional[str]:
+        """Corpo de uma matéria, via pool"""
+        return await self._enfileirar(_parse_materia, html)
+
+    async def _enfileirar(self, funcao, *args):
+        future = asyncio.get_running_loop().create_future()
+
+        if self.queue.full():
+            self.stats["queue_full_waits"] += 1
+        inicio = time.monotonic()
+        await self.queue.put((funcao, args, future))
+        self.stats["queue_wait_seconds"] += time.monotonic() - inicio
+
+        depth = self.queue.qsize()
+        self.stats["queue_max"] = max(self.stats["queue_max"], depth)
+        self.stats["queue_depth_sum"] += depth
+
+        return await future
+
+    async def _consumir(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            funcao, args, future = await self.queue.get()
+            try:
+                if self.executor:
+                    resultado, segundos = await loop.run_in_executor(self.executor, funcao, *args)
+                else:
+                    resultado, segundos = funcao(*args)
+                self.stats["parsed"] += 1
+                self.stats["parse_seconds"] += segundos
+                METRICS.observe("stage_seconds", segundos, stage="parse")
+                if not future.done():
+                    future.set_result(resultado)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    def summary(self) -> str:
+        parsed = self.stats["parsed"]
+        if not parsed:
+            return "Parsing: nenhuma página"
+        return (
+            f"Parsing: {parsed} páginas em {self.workers or 1} worker(s), "
+            f"{self.stats['parse_seconds'] / parsed * 1000:.1f} ms/página, "
+            f"fila máx {self.stats['queue_max']}/{self.queue_size} "
+            f"(média {self.stats['queue_depth_sum'] / parsed:.1f}), "
+            f"{self.stats['queue_full_waits']} esperas por fila cheia"
+        )
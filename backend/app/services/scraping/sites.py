@@ -0,0 +1,432 @@
+"""
+Plugins de portais de notícias
+
+Cada portal é uma subclasse de SiteParser registrada com @register:
+    * urls(pagina)  -> URLs de listagem a tentar, em ordem
+    * seletores     -> seletores CSS dos blocos de notícia (o primeiro
+                       que achar algo vence)
+    * parse_item()  -> dict {titulo, link, resumo, data_str, fonte}
+
+O HTML é interpretado com lxml quando instalado (bem mais rápido que o
+html.parser) e, no engine, em processos separados (ver pipeline.py).
+
+Os limites de educação (rate/concurrency) valem por host e são
+aplicados pelo ScrapingEngine.
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote_plus, urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+SITES: Dict[str, 'SiteParser'] = {}
+
+
+def register(cls):
+    """Registra o plugin pela sua key"""
+    SITES[cls.key] = cls()
+    return cls
+
+
+def get_site(key: str) -> 'SiteParser':
+    try:
+        return SITES[key]
+    except KeyError:
+        raise KeyError(f"Site desconhecido: {key} (disponíveis: {sorted(SITES)})")
+
+
+class SiteParser:
+    """Base dos plugins: listagem paginada + parser do HTML"""
+
+    key = ''
+    fonte = ''
+    base_url = ''
+    min_titulo = 15
+    seletores: Tuple[str, ...] = ("article",)
+
+    # Educação por host (padrão: 1 requisição a cada 2s, 2 em paralelo)
+    rate = 0.5
+    concurrency = 2
+
+    def urls(self, pagina: int) -> List[str]:
+        raise NotImplementedError
+
+    def hosts(self) -> set:
+        """Hosts acessados pelo plugin (para os limites do engine)"""
+        return {urlsplit(url).netloc for url in self.urls(1)} or {urlsplit(self.base_url).netloc}
+
+    def items(self, soup: BeautifulSoup) -> list:
+        for seletor in self.seletores:
+            items = soup.select(seletor)
+            if items:
+                return items
+        return []
+
+    def parse_item(self, item) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def parse(self, html: str, url: str) -> Tuple[List[Dict], bool]:
+        """Retorna (noticias, tem_conteudo)"""
+        soup = BeautifulSoup(html, HTML_PARSER)
+        items = self.items(soup)
+
+        noticias = []
+        vistos = set()
+        for item in items:
+            noticia = self.parse_item(item)
+            # Portais repetem o mesmo link em destaques
+            if noticia and noticia["link"] not in vistos:
+                vistos.add(noticia["link"])
+                noticias.append(noticia)
+
+        return noticias, self.tem_conteudo(items, noticias)
+
+    def tem_conteudo(self, items: list, noticias: List[Dict]) -> bool:
+        return len(noticias) > 0
+
+    def absoluto(self, link: str) -> str:
+        return link if link.startswith("http") else urljoin(self.base_url, link)
+
+    def noticia(self, titulo: str, link: str, resumo: str = "", data_str: str = "") -> Dict:
+        return {
+            "titulo": titulo,
+            "link": link,
+            "resumo": resumo,
+            "data_str": data_str,
+            "fonte": self.fonte
+        }
+
+
+def _texto(tag) -> str:
+    return tag.get_text(strip=True) if tag else ""
+
+
+def _classe_contem(tag: str, *partes: str) -> str:
+    """Seletor CSS: `tag` com alguma das partes na classe (sem caixa)"""
+    return ", ".join(f'{tag}[class*="{parte}" i]' for parte in partes)
+
+
+RE_DATA_RELATIVA = re.compile(r"h[áa]\s+(\d+)\s+(minuto|hora|dia|semana)", re.I)
+RE_DATA_ABSOLUTA = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})(?:\D+(\d{1,2})[h:](\d{2}))?")
+
+UNIDADES = {'minuto': 'minutes', 'hora': 'hours', 'dia': 'days', 'semana': 'weeks'}
+
+
+def data_publicacao(data_str: str, agora: Optional[datetime] = None) -> Optional[datetime]:
+    """'Há 3 horas' / '12/05/2024 14h30' -> datetime (None se não reconhecer)"""
+    if not data_str:
+        return None
+
+    match = RE_DATA_RELATIVA.search(data_str)
+    if match:
+        delta = timedelta(**{UNIDADES[match.group(2).lower()]: int(match.group(1))})
+        return (agora or datetime.now()) - delta
+
+    match = RE_DATA_ABSOLUTA.search(data_str)
+    if match:
+        dia, mes, ano, hora, minuto = match.groups()
+        try:
+            return datetime(int(ano), int(mes), int(dia), int(hora or 0), int(minuto or 0))
+        except ValueError:
+            return None
+
+    return None
+
+
+# ════════════════════════════════════════════════════════════
+# G1
+# ════════════════════════════════════════════════════════════
+
+@register
+class G1(SiteParser):
+    """Feed paginado do G1 Rio"""
+
+    key = 'g1'
+    fonte = 'G1 Rio'
+    base_url = 'https://g1.globo.com'
+    seletores = ("div.feed-post-body",)
+
+    def urls(self, pagina):
+        return [f"https://g1.globo.com/rj/rio-de-janeiro/index/feed/pagina-{pagina}.ghtml"]
+
+    def parse_item(self, item):
+        link_tag = item.find("a", class_="feed-post-link")
+        if not link_tag or not link_tag.get("href"):
+            return None
+
+        return self.noticia(
+            titulo=_texto(link_tag),
+            link=link_tag["href"],
+            resumo=_texto(item.find("div", class_="feed-post-body-resumo")),
+            data_str=_texto(item.find("span", class_="feed-post-datetime")),
+        )
+
+    def tem_conteudo(self, items, noticias):
+        # Página do feed existe mesmo quando nenhum item é aproveitado
+        return len(items) > 0
+
+
+@register
+class G1Busca(SiteParser):
+    """Busca do G1 (histórico por período): urls() não se aplica, use search_urls()"""
+
+    key = 'g1_busca'
+    fonte = 'G1'
+    base_url = 'https://g1.globo.com'
+    min_titulo = 1
+    seletores = ("div.widget--info__text-container",)
+
+    def search_urls(self, termos: List[str], inicio: date, fim: date, pagina: int = 1) -> List[str]:
+        """Uma URL por termo, resultados publicados entre inicio e fim (inclusive)"""
+        return [
+            f"https://g1.globo.com/busca/?q={quote_plus(termo)}&page={pagina}&order=recent"
+            f"&from={inicio.isoformat()}&to={fim.isoformat()}"
+            for termo in termos
+        ]
+
+    def urls(self, pagina):
+        return []
+
+    def parse_item(self, item):
+        link_tag = item.find("a", href=True)
+        if not link_tag:
+            return None
+        return self.noticia(titulo=_texto(link_tag), link=self.absoluto(link_tag["href"]))
+
+
+# ════════════════════════════════════════════════════════════
+# EXTRA
+# ════════════════════════════════════════════════════════════
+
+@register
+class Extra(SiteParser):
+    """Extra - editoria Rio e Casos de Polícia"""
+
+    key = 'extra'
+    fonte = 'Extra'
+    base_url = 'https://extra.globo.com'
+    rate = 1 / 3
+    seletores = (
+        "article",
+        _classe_contem("div", "post", "article", "materia", "noticia"),
+        _classe_contem("div", "feed", "item"),
+    )
+
+    def urls(self, pagina):
+        return [
+            f"https://extra.globo.com/rio/page/{pagina}/",
+            f"https://extra.globo.com/casos-de-policia/page/{pagina}/",
+        ]
+
+    def parse_item(self, item):
+        link_tag = item.find("a", href=True)
+        if not link_tag:
+            return None
+
+        link = self.absoluto(link_tag["href"])
+
+        # Apenas notícias do Rio
+        if "rio" not in link.lower() and "rj" not in link.lower():
+            return None
+
+        titulo = _texto(
+            item.find("h1") or item.find("h2") or item.find("h3") or
+            item.find(class_=re.compile("title|titulo|headline", re.I)) or link_tag
+        )
+        if len(titulo) < self.min_titulo:
+            return None
+
+        resumo = _texto(item.find("p") or item.find(class_=re.compile("resumo|description|excerpt", re.I)))
+
+        return self.noticia(titulo, link, resumo)
+
+
+@register
+class ExtraBusca(Extra):
+    """Extra via busca do DuckDuckGo (quando a listagem do site falha)"""
+
+    key = 'extra_busca'
+    rate = 0.2
+    seletores = ("a.result__a",)
+
+    TERMOS = [
+        "site:extra.globo.com crime rio",
+        "site:extra.globo.com assalto rj",
+        "site:extra.globo.com roubo rio de janeiro",
+        "site:extra.globo.com policia rio",
+        "site:extra.globo.com casos policia rio",
+    ]
+
+    def urls(self, pagina):
+        termo = self.TERMOS[pagina % len(self.TERMOS)]
+        return [f"https://html.duckduckgo.com/html/?q={quote_plus(termo)}"]
+
+    def parse_item(self, item):
+        link = item.get("href", "")
+        titulo = _texto(item)
+        if "extra.globo.com" not in link or len(titulo) < self.min_titulo:
+            return None
+        return self.noticia(titulo, link)
+
+
+# ════════════════════════════════════════════════════════════
+# O GLOBO
+# ════════════════════════════════════════════════════════════
+
+@register
+class OGlobo(SiteParser):
+    """O Globo - editoria Rio"""
+
+    key = 'oglobo'
+    fonte = 'O Globo Rio'
+    base_url = 'https://oglobo.globo.com'
+    rate = 1 / 3
+    seletores = (
+        "article",
+        _classe_contem("div", "bastian", "post", "materia"),
+        _classe_contem("a", "post", "materia", "link"),
+    )
+
+    def urls(self, pagina):
+        return [
+            f"https://oglobo.globo.com/rio/page/{pagina}/",
+            "https://oglobo.globo.com/rio/",
+        ]
+
+    def parse_item(self, item):
+        link_tag = item if item.name == "a" else item.find("a", href=True)
+        if not link_tag or not link_tag.get("href"):
+            return None
+
+        link = self.absoluto(link_tag["href"])
+        if "rio" not in link.lower() and "policia" not in link.lower():
+            return None
+
+        titulo = _texto(
+            item.find("h2") or item.find("h3") or
+            item.find(class_=re.compile("title|titulo", re.I)) or link_tag
+        )
+        if len(titulo) < self.min_titulo:
+            return None
+
+        return self.noticia(titulo, link)
+
+
+@register
+class OGloboLinks(OGlobo):
+    """O Globo - links /rio/noticia/ direto da capa da editoria"""
+
+    key = 'oglobo_links'
+    seletores = ('a[href*="/rio/noticia/"]',)
+
+    def urls(self, pagina):
+        return ["https://oglobo.globo.com/rio/"]
+
+    def parse_item(self, item):
+        titulo = _texto(item)
+        if len(titulo) < self.min_titulo:
+            return None
+        return self.noticia(titulo, self.absoluto(item.get("href", "")))
+
+
+# ════════════════════════════════════════════════════════════
+# UOL
+# ════════════════════════════════════════════════════════════
+
+@register
+class UOL(SiteParser):
+    """UOL - busca por termos + últimas de cotidiano"""
+
+    key = 'uol'
+    fonte = 'UOL Notícias RJ'
+    base_url = 'https://noticias.uol.com.br'
+    seletores = (
+        _classe_contem("div", "thumbnail", "item", "news"),
+        "article",
+        _classe_contem("li", "item", "news"),
+    )
+
+    TERMOS = ["crime rio de janeiro", "assalto rio", "roubo rj"]
+
+    def urls(self, pagina):
+        termo = self.TERMOS[pagina % len(self.TERMOS)]
+        return [
+            f"https://busca.uol.com.br/?q={quote_plus(termo)}&p={pagina}",
+            f"https://noticias.uol.com.br/cotidiano/ultimas/?p={pagina}",
+        ]
+
+    def parse_item(self, item):
+        link_tag = item.find("a", href=True)
+        if not link_tag:
+            return None
+
+        titulo = _texto(item.find("h3") or item.find("h2") or link_tag)
+
+        # Apenas notícias que mencionam o Rio
+        texto = item.get_text().lower()
+        if len(titulo) < self.min_titulo or ("rio" not in texto and "rj" not in texto):
+            return None
+
+        return self.noticia(titulo, self.absoluto(link_tag["href"]))
+
+
+@register
+class UOLCotidiano(UOL):
+    """UOL - apenas últimas de cotidiano (sem busca)"""
+
+    key = 'uol_cotidiano'
+    seletores = (_classe_contem("div", "thumbnail"),)
+
+    def urls(self, pagina):
+        return [f"https://noticias.uol.com.br/cotidiano/ultimas/?p={pagina}"]
+
+
+# ════════════════════════════════════════════════════════════
+# R7
+# ════════════════════════════════════════════════════════════
+
+@register
+class R7(SiteParser):
+    """R7 - Rio de Janeiro"""
+
+    key = 'r7'
+    fonte = 'R7 Rio'
+    base_url = 'https://noticias.r7.com'
+    min_titulo = 10
+    seletores = ("article", _classe_contem("div", "news-item"))
+
+    def urls(self, pagina):
+        return [f"https://noticias.r7.com/rio-de-janeiro?page={pagina}"]
+
+    def parse_item(self, item):
+        link_tag = item.find("a", href=True)
+        if not link_tag:
+            return None
+
+        titulo = _texto(item.find("h3") or item.find("h2") or link_tag)
+        if len(titulo) < self.min_titulo:
+            return None
+
+        return self.noticia(titulo, self.absoluto(link_tag["href"]))
+
+    def tem_conteudo(self, items, noticias):
+        return len(items) > 0
+
+
+# ════════════════════════════════════════════════════════════
+# PÁGINA DE MATÉRIA (portais Globo)
+# ════════════════════════════════════════════════════════════
+
+def texto_materia(html: str) -> Optional[str]:
+    """Corpo de uma matéria (G1, Extra, O Globo usam o mesmo layout)"""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    content = soup.select_one('div.mc-article-body') or soup.select_one('article')
+    return content.get_text() if content else None
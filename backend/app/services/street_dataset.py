@@ -0,0 +1,425 @@
+"""
+SafeDrive RJ - Ruas do OpenStreetMap em streaming + arquivo com índice espacial
+
+Ingestão (sem carregar a cidade na memória):
+    Overpass (XML, "out geom") -> iterparse, um way por vez -> StreetSegment
+        -> write_geoparquet()        arquivo GeoParquet (WKB + colunas de bbox)
+        -> load_street_segments()    COPY + upsert por osm_id em street_segments
+
+O arquivo é ordenado por curva Z (centróide) e gravado em row groups
+pequenos: as estatísticas min/max das colunas de bbox de cada row group
+formam um índice espacial grosso. StreetDataset abre o arquivo com
+memory map e lê só os row groups que tocam a bbox pedida.
+
+Uso:
+    ways = stream_ways(CITY_BBOXES['rio de janeiro'])
+    write_geoparquet(ways, 'streets_rio_de_janeiro.parquet', 'Rio de Janeiro')
+
+    ruas = StreetDataset('streets_rio_de_janeiro.parquet')
+    copacabana = ruas.bbox(-22.99, -43.20, -22.96, -43.17, columns=['name', 'lat', 'lng'])
+"""
+
+import csv
+import io
+import json
+import struct
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+
+# sul, oeste, norte, leste
+CITY_BBOXES = {
+    'rio de janeiro': (-23.1, -43.8, -22.7, -43.1),
+    'volta redonda': (-22.6, -44.2, -22.4, -43.9),
+    'pinheiral': (-22.6, -44.1, -22.4, -43.9),
+}
+
+DEFAULT_NEIGHBORHOOD = "Centro"
+
+# Onde fetch_streets.py grava os arquivos de ruas (e onde o gazetteer e os
+# scrapers procuram), qualquer que seja o diretório corrente
+STREETS_DIR = Path(__file__).resolve().parents[2] / 'scripts'
+
+ROW_GROUP_SIZE = 2048
+COPY_BATCH = 5000
+
+EARTH_RADIUS_M = 6_371_008.8
+
+
+def streets_path(city: str, suffix: str = '.parquet', directory: Path = STREETS_DIR) -> Path:
+    """'Rio de Janeiro' -> <directory>/streets_rio_de_janeiro.parquet"""
+    return Path(directory) / f"streets_{city.lower().replace(' ', '_')}{suffix}"
+
+
+class StreetSegment:
+    """Um way do OSM (trecho de rua)"""
+
+    __slots__ = ('osm_id', 'name', 'highway', 'neighborhood', 'lats', 'lngs')
+
+    def __init__(self, osm_id: int, name: str, highway: str, neighborhood: str,
+                 lats: np.ndarray, lngs: np.ndarray):
+        self.osm_id = osm_id
+        self.name = name
+        self.highway = highway
+        self.neighborhood = neighborhood
+        self.lats = lats
+        self.lngs = lngs
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        """Média dos nós (mesmo critério do JSON antigo)"""
+        return float(self.lats.mean()), float(self.lngs.mean())
+
+    @property
+    def bbox(self) -> Tuple[float, float, float, float]:
+        """(min_lat, min_lng, max_lat, max_lng)"""
+        return float(self.lats.min()), float(self.lngs.min()), float(self.lats.max()), float(self.lngs.max())
+
+    def length_meters(self) -> float:
+        """Soma dos trechos (haversine)"""
+        if len(self.lats) < 2:
+            return 0.0
+        lat, lng = np.radians(self.lats), np.radians(self.lngs)
+        a = (np.sin(np.diff(lat) / 2) ** 2 +
+             np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lng) / 2) ** 2)
+        return float((2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))).sum())
+
+    def wkb(self) -> bytes:
+        """LineString em WKB (little endian, x = lng, y = lat)"""
+        coords = np.column_stack([self.lngs, self.lats]).astype('<f8')
+        return struct.pack('<BII', 1, 2, len(coords)) + coords.tobytes()
+
+
+def overpass_query(bbox: Tuple[float, float, float, float], timeout: int = 180) -> str:
+    sul, oeste, norte, leste = bbox
+    return f"""
+        [out:xml][timeout:{timeout}];
+        way["highway"]["name"]({sul},{oeste},{norte},{leste});
+        out geom tags;
+    """
+
+
+def stream_ways(bbox: Tuple[float, float, float, float], url: str = OVERPASS_URL,
+                timeout: int = 180) -> Iterator[StreetSegment]:
+    """
+    Ways com nome da bbox, lidos da resposta do Overpass enquanto ela chega
+
+    Cada <way> é descartado da árvore assim que vira StreetSegment:
+    a memória não cresce com o tamanho da cidade.
+    """
+    response = requests.post(url, data={'data': overpass_query(bbox, timeout)},
+                             stream=True, timeout=timeout + 30)
+    response.raise_for_status()
+    response.raw.decode_content = True
+
+    try:
+        yield from parse_ways(response.raw)
+    finally:
+        response.close()
+
+
+def parse_ways(source) -> Iterator[StreetSegment]:
+    """StreetSegments de um XML do Overpass (arquivo ou stream)"""
+    contexto = ET.iterparse(source, events=('start', 'end'))
+    _, raiz = next(contexto)
+
+    for evento, elem in contexto:
+        if evento != 'end' or elem.tag != 'way':
+            continue
+
+        tags = {tag.get('k'): tag.get('v') for tag in elem.iter('tag')}
+        nos = [(nd.get('lat'), nd.get('lon')) for nd in elem.iter('nd') if nd.get('lat')]
+        nome = (tags.get('name') or '').strip()
+
+        if nome and nos:
+            coords = np.array(nos, dtype=float)
+            yield StreetSegment(
+                osm_id=int(elem.get('id')),
+                name=nome,
+                highway=tags.get('highway', 'residential'),
+                neighborhood=(tags.get('addr:suburb') or tags.get('addr:neighbourhood') or
+                              tags.get('suburb') or DEFAULT_NEIGHBORHOOD),
+                lats=coords[:, 0],
+                lngs=coords[:, 1],
+            )
+
+        # Libera o way já processado (e os anteriores presos na raiz)
+        elem.clear()
+        raiz.clear()
+
+
+def _morton(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Chave de curva Z (16 bits por eixo): vizinhos no mapa, vizinhos no arquivo"""
+    def quantizar(v):
+        span = (v.max() - v.min()) or 1.0
+        return ((v - v.min()) / span * 0xFFFF).astype(np.uint64)
+
+    def espalhar(x):
+        x = (x | (x << np.uint64(8))) & np.uint64(0x00FF00FF)
+        x = (x | (x << np.uint64(4))) & np.uint64(0x0F0F0F0F)
+        x = (x | (x << np.uint64(2))) & np.uint64(0x33333333)
+        x = (x | (x << np.uint64(1))) & np.uint64(0x55555555)
+        return x
+
+    return espalhar(quantizar(lngs)) | (espalhar(quantizar(lats)) << np.uint64(1))
+
+
+def write_geoparquet(segments: Iterable[StreetSegment], path, city: str,
+                     row_group_size: int = ROW_GROUP_SIZE) -> int:
+    """
+    Grava os segmentos num GeoParquet ordenado por curva Z
+
+    Só colunas compactas ficam na memória até a ordenação final
+    (não os objetos do OSM nem o XML).
+
+    Returns:
+        Número de segmentos gravados
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    colunas: Dict[str, list] = {
+        'osm_id': [], 'name': [], 'neighborhood': [], 'highway': [],
+        'lat': [], 'lng': [], 'nodes_count': [], 'length_m': [],
+        'bbox_min_lat': [], 'bbox_min_lng': [], 'bbox_max_lat': [], 'bbox_max_lng': [],
+        'geometry': [],
+    }
+
+    for seg in segments:
+        lat, lng = seg.center
+        min_lat, min_lng, max_lat, max_lng = seg.bbox
+        colunas['osm_id'].append(seg.osm_id)
+        colunas['name'].append(seg.name)
+        colunas['neighborhood'].append(seg.neighborhood)
+        colunas['highway'].append(seg.highway)
+        colunas['lat'].append(lat)
+        colunas['lng'].append(lng)
+        colunas['nodes_count'].append(len(seg.lats))
+        colunas['length_m'].append(seg.length_meters())
+        colunas['bbox_min_lat'].append(min_lat)
+        colunas['bbox_min_lng'].append(min_lng)
+        colunas['bbox_max_lat'].append(max_lat)
+        colunas['bbox_max_lng'].append(max_lng)
+        colunas['geometry'].append(seg.wkb())
+
+    total = len(colunas['osm_id'])
+    tabela = pa.table({
+        nome: pa.array(valores, type=pa.binary() if nome == 'geometry' else None)
+        for nome, valores in colunas.items()
+    })
+
+    if total:
+        ordem = np.argsort(_morton(np.array(colunas['lat']), np.array(colunas['lng'])), kind='stable')
+        tabela = tabela.take(pa.array(ordem))
+        extent = [min(colunas['bbox_min_lng']), min(colunas['bbox_min_lat']),
+                  max(colunas['bbox_max_lng']), max(colunas['bbox_max_lat'])]
+    else:
+        extent = None
+
+    geo = {
+        'version': '1.0.0',
+        'primary_column': 'geometry',
+        'columns': {
+            'geometry': {
+                'encoding': 'WKB',
+                # Sem 'crs': o padrão do GeoParquet é OGC:CRS84 (lng, lat)
+                'geometry_types': ['LineString'],
+                **({'bbox': extent} if extent else {}),
+            }
+        },
+    }
+    metadata = {
+        **(tabela.schema.metadata or {}),
+        b'geo': json.dumps(geo).encode(),
+        b'safedrive': json.dumps({'city': city}).encode(),
+    }
+
+    pq.write_table(
+        tabela.replace_schema_metadata(metadata), str(path),
+        row_group_size=row_group_size, compression='zstd', write_statistics=True,
+    )
+    return total
+
+
+class StreetDataset:
+    """GeoParquet de ruas aberto com memory map, consultado por bbox"""
+
+    def __init__(self, path):
+        import pyarrow.parquet as pq
+
+        self.path = Path(path)
+        self.file = pq.ParquetFile(str(self.path), memory_map=True)
+
+        meta = self.file.schema_arrow.metadata or {}
+        self.city = json.loads(meta.get(b'safedrive', b'{}')).get('city', '')
+
+        # Extensão de cada row group, das estatísticas do próprio arquivo
+        self.extents: List[Tuple[float, float, float, float]] = []
+        nomes = self.file.schema_arrow.names
+        indices = [nomes.index(c) for c in ('bbox_min_lat', 'bbox_min_lng', 'bbox_max_lat', 'bbox_max_lng')]
+        for i in range(self.file.num_row_groups):
+            rg = self.file.metadata.row_group(i)
+            stats = [rg.column(j).statistics for j in indices]
+            self.extents.append((stats[0].min, stats[1].min, stats[2].max, stats[3].max))
+
+    def __len__(self):
+        return self.file.metadata.num_rows
+
+    def read(self, columns: Optional[List[str]] = None):
+        """Arquivo inteiro (só as colunas pedidas)"""
+        return self.file.read(columns=columns)
+
+    def bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+             columns: Optional[List[str]] = None):
+        """
+        Segmentos que tocam a bbox (pyarrow.Table)
+
+        Row groups fora da bbox nem são lidos do disco.
+        """
+        import pyarrow.compute as pc
+
+        grupos = [
+            i for i, (g_min_lat, g_min_lng, g_max_lat, g_max_lng) in enumerate(self.extents)
+            if g_max_lat >= min_lat and g_min_lat <= max_lat and g_max_lng >= min_lng and g_min_lng <= max_lng
+        ]
+
+        bbox_cols = ['bbox_min_lat', 'bbox_min_lng', 'bbox_max_lat', 'bbox_max_lng']
+        leitura = None if columns is None else list(dict.fromkeys(columns + bbox_cols))
+        tabela = self.file.read_row_groups(grupos, columns=leitura)
+
+        mascara = pc.and_(
+            pc.and_(pc.greater_equal(tabela['bbox_max_lat'], min_lat), pc.less_equal(tabela['bbox_min_lat'], max_lat)),
+            pc.and_(pc.greater_equal(tabela['bbox_max_lng'], min_lng), pc.less_equal(tabela['bbox_min_lng'], max_lng)),
+        )
+        tabela = tabela.filter(mascara)
+        return tabela if columns is None else tabela.select(columns)
+
+    def by_neighborhood(self) -> Dict[str, List[Dict]]:
+        """Mesmo formato do JSON antigo: {bairro: [{name, lat, lng, type, nodes_count}]}"""
+        tabela = self.read(['name', 'neighborhood', 'highway', 'lat', 'lng', 'nodes_count'])
+        ruas: Dict[str, List[Dict]] = {}
+        for linha in tabela.to_pylist():
+            ruas.setdefault(linha['neighborhood'], []).append({
+                'name': linha['name'],
+                'lat': linha['lat'],
+                'lng': linha['lng'],
+                'type': linha['highway'],
+                'nodes_count': linha['nodes_count'],
+            })
+        return ruas
+
+
+STREET_SEGMENTS_COLUMNS = (
+    'osm_id', 'street_name', 'neighborhood', 'city', 'state', 'geometry',
+    'bbox_min_lat', 'bbox_min_lng', 'bbox_max_lat', 'bbox_max_lng', 'length_meters',
+)
+
+STREET_STAGING_TABLE = 'street_segments_staging'
+
+STREET_STAGING_DDL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STREET_STAGING_TABLE} (
+        osm_id BIGINT,
+        street_name VARCHAR(255),
+        neighborhood VARCHAR(100),
+        city VARCHAR(100),
+        state VARCHAR(2),
+        geometry GEOGRAPHY(LINESTRING, 4326),
+        bbox_min_lat DECIMAL(10, 8),
+        bbox_min_lng DECIMAL(11, 8),
+        bbox_max_lat DECIMAL(10, 8),
+        bbox_max_lng DECIMAL(11, 8),
+        length_meters DECIMAL(10, 2)
+    ) ON COMMIT DROP
+"""
+
+# Bancos criados antes da coluna osm_id (database_schema.sql)
+STREET_OSM_ID_DDL = """
+    ALTER TABLE street_segments ADD COLUMN IF NOT EXISTS osm_id BIGINT;
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_street_segments_osm_id ON street_segments(osm_id);
+"""
+
+# Mesmo way do OSM = mesma linha: o id (e o que aponta para ele, como
+# street_risk_cache e crime_incidents.street_segment_id) não muda
+STREET_MERGE_SQL = f"""
+    INSERT INTO street_segments ({', '.join(STREET_SEGMENTS_COLUMNS)})
+    SELECT DISTINCT ON (osm_id) {', '.join(STREET_SEGMENTS_COLUMNS)}
+    FROM {STREET_STAGING_TABLE}
+    ORDER BY osm_id
+    ON CONFLICT (osm_id) DO UPDATE SET
+        {', '.join(f"{col} = EXCLUDED.{col}" for col in STREET_SEGMENTS_COLUMNS[1:])},
+        updated_at = NOW()
+"""
+
+# Só sai o que não está mais no extrato (way apagado ou fora da bbox)
+STREET_DELETE_STALE_SQL = f"""
+    DELETE FROM street_segments s
+    WHERE s.city = %s
+      AND NOT EXISTS (SELECT 1 FROM {STREET_STAGING_TABLE} t WHERE t.osm_id = s.osm_id)
+"""
+
+
+def load_street_segments(conn, segments: Iterable[StreetSegment], city: str, state: str = 'RJ',
+                         batch_size: int = COPY_BATCH) -> int:
+    """
+    Atualiza as ruas da cidade em street_segments, em streaming (COPY por lote)
+
+    Os ways vão para uma staging e entram por upsert em osm_id: ruas que
+    continuam no extrato mantêm o id; só as que sumiram são apagadas.
+    Tudo numa transação: se a ingestão cair no meio, as ruas antigas ficam.
+    A geometria vai como WKB hexadecimal (entrada nativa do PostGIS).
+    """
+    copy_sql = f"COPY {STREET_STAGING_TABLE} ({', '.join(STREET_SEGMENTS_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+
+    def copiar(cursor, linhas):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(linhas)
+        buffer.seek(0)
+        cursor.copy_expert(copy_sql, buffer)
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'street_segments' AND column_name = 'osm_id'
+            """)
+            if cursor.fetchone() is None:
+                cursor.execute(STREET_OSM_ID_DDL)
+            cursor.execute(STREET_STAGING_DDL)
+
+            lote = []
+            for seg in segments:
+                if len(seg.lats) < 2:
+                    continue  # LINESTRING precisa de 2 pontos
+                min_lat, min_lng, max_lat, max_lng = seg.bbox
+                lote.append((
+                    seg.osm_id, seg.name[:255], seg.neighborhood[:100], city, state, seg.wkb().hex(),
+                    min_lat, min_lng, max_lat, max_lng, round(seg.length_meters(), 2),
+                ))
+                if len(lote) >= batch_size:
+                    copiar(cursor, lote)
+                    total += len(lote)
+                    lote = []
+
+            if lote:
+                copiar(cursor, lote)
+                total += len(lote)
+
+            cursor.execute(STREET_MERGE_SQL)
+            cursor.execute(STREET_DELETE_STALE_SQL, (city,))
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return total
+
+
+def bbox_for_city(city: str) -> Tuple[float, float, float, float]:
+    return CITY_BBOXES.get(city.lower(), CITY_BBOXES['rio de janeiro'])
@@ -0,0 +1,197 @@
+"""
+SafeDrive RJ - Gazetteer offline de ruas (streets_<cidade>.json do fetch_streets.py)
+
+Resolve endereços extraídos de notícias sem chamar o Nominatim:
+    1. Nome normalizado exato       ("Rua Visconde de Pirajá")
+    2. Trigramas (Jaccard >= limiar) ("R. Visconde de Piraja", erros de digitação)
+    3. Bairros do arquivo            ("Copacabana")
+
+O OSM divide uma rua em vários trechos (ways): os trechos de mesmo nome
+viram um ponto por bairro (média ponderada pelos nós), e sem bairro
+informado vence o bairro onde a rua é maior.
+
+A busca por trigramas usa filtro de prefixo: só os trigramas mais raros
+da consulta geram candidatos, então trigramas comuns ("rua") não
+custam nada e a consulta fica na casa dos microssegundos.
+"""
+
+import json
+import math
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.services.street_dataset import streets_path
+from app.utils.texto import remover_acentos
+
+# fetch_streets.py grava .parquet (padrão) ou .json (--json)
+STREETS_FILE = streets_path('Rio de Janeiro')
+
+# Abreviações de tipo de logradouro mais comuns nas notícias
+ABREVIACOES = {
+    'r': 'rua',
+    'av': 'avenida',
+    'tv': 'travessa',
+    'trav': 'travessa',
+    'pca': 'praca',
+    'pc': 'praca',
+    'est': 'estrada',
+    'estr': 'estrada',
+    'rod': 'rodovia',
+    'al': 'alameda',
+    'lgo': 'largo',
+    'lad': 'ladeira',
+}
+
+
+def normalizar_endereco(texto: str) -> str:
+    """'Av. N. Sra. de Copacabana,' -> 'avenida n sra de copacabana'"""
+    texto = remover_acentos((texto or '').lower())
+    palavras = re.sub(r'[^a-z0-9]+', ' ', texto).split()
+    if palavras and palavras[0] in ABREVIACOES:
+        palavras[0] = ABREVIACOES[palavras[0]]
+    return ' '.join(palavras)
+
+
+def trigramas(texto: str) -> set:
+    texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class StreetGazetteer:
+    """Ruas e bairros de uma cidade, com busca exata e por trigramas"""
+
+    def __init__(self, city: str, streets: Dict[str, List[Dict]], limiar: float = 0.6):
+        """
+        Args:
+            city: Cidade do arquivo ("Rio de Janeiro")
+            streets: {bairro: [{name, lat, lng, nodes_count}, ...]}
+            limiar: Jaccard mínimo de trigramas para a busca aproximada
+        """
+        self.city = city
+        self.limiar = limiar
+
+        # nome normalizado -> bairro -> [soma lat, soma lng, peso]
+        somas = defaultdict(lambda: defaultdict(lambda: [0.0, 0.0, 0]))
+        bairros = defaultdict(lambda: [0.0, 0.0, 0])
+        # nome normalizado -> grafia do OSM
+        rotulos = {}
+
+        for bairro, ruas in streets.items():
+            for rua in ruas:
+                chave = normalizar_endereco(rua.get('name'))
+                if not chave:
+                    continue
+                rotulos.setdefault(chave, rua['name'].strip())
+                peso = rua.get('nodes_count') or 1
+                for acumulado in (somas[chave][bairro], bairros[bairro]):
+                    acumulado[0] += rua['lat'] * peso
+                    acumulado[1] += rua['lng'] * peso
+                    acumulado[2] += peso
+
+        self.nomes: List[str] = list(somas)
+        self.rotulos: List[str] = [rotulos[nome] for nome in self.nomes]
+        self.pontos: List[Dict[str, Tuple[float, float, int]]] = [
+            {bairro: (lat / peso, lng / peso, peso) for bairro, (lat, lng, peso) in somas[nome].items()}
+            for nome in self.nomes
+        ]
+        self.por_nome = {nome: i for i, nome in enumerate(self.nomes)}
+        self.bairros = {
+            normalizar_endereco(bairro): (lat / peso, lng / peso)
+            for bairro, (lat, lng, peso) in bairros.items()
+        }
+        self.nomes_bairros = {normalizar_endereco(bairro): bairro for bairro in bairros}
+
+        self.grams: List[set] = [trigramas(nome) for nome in self.nomes]
+        self.indice: Dict[str, List[int]] = defaultdict(list)
+        for i, grams in enumerate(self.grams):
+            for gram in grams:
+                self.indice[gram].append(i)
+
+    @classmethod
+    def from_file(cls, path: Path = STREETS_FILE, **kwargs) -> Optional['StreetGazetteer']:
+        """
+        Carrega o arquivo do fetch_streets.py (None se não existir)
+
+        Aceita o GeoParquet ou o JSON antigo; sem o arquivo pedido, tenta
+        o mesmo nome com a outra extensão.
+        """
+        path = Path(path)
+        if not path.exists():
+            path = path.with_suffix('.json' if path.suffix == '.parquet' else '.parquet')
+            if not path.exists():
+                return None
+
+        if path.suffix == '.parquet':
+            from app.services.street_dataset import StreetDataset
+            dataset = StreetDataset(path)
+            return cls(dataset.city, dataset.by_neighborhood(), **kwargs)
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('city', ''), data.get('streets', {}), **kwargs)
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def covers(self, city: str) -> bool:
+        """'Rio de Janeiro, RJ' é atendida por um gazetteer do 'Rio de Janeiro'"""
+        return normalizar_endereco(city).startswith(normalizar_endereco(self.city))
+
+    def lookup(self, address: str, bairro: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """(lat, lng) do endereço, ou None se não houver rua/bairro parecido"""
+        chave = normalizar_endereco(address)
+        if not chave:
+            return None
+
+        i = self.por_nome.get(chave)
+        if i is None:
+            i = self.fuzzy(chave)
+        if i is not None:
+            return self._ponto(i, bairro)
+
+        return self.bairros.get(chave)
+
+    def canonical(self, address: str) -> Optional[str]:
+        """Grafia do OSM da rua (ou bairro) que `lookup` usaria, ou None"""
+        chave = normalizar_endereco(address)
+        if not chave:
+            return None
+
+        i = self.por_nome.get(chave)
+        if i is None:
+            i = self.fuzzy(chave)
+        if i is not None:
+            return self.rotulos[i]
+
+        return self.nomes_bairros.get(chave)
+
+    def fuzzy(self, chave: str) -> Optional[int]:
+        """Índice da rua mais parecida (Jaccard de trigramas >= limiar)"""
+        grams = trigramas(chave)
+        # Filtro de prefixo: quem tem Jaccard >= limiar compartilha pelo
+        # menos um dos (n - ceil(limiar * n) + 1) trigramas mais raros
+        raros = sorted(grams, key=lambda g: len(self.indice.get(g, ())))
+        prefixo = len(grams) - math.ceil(self.limiar * len(grams)) + 1
+
+        candidatos = set()
+        for gram in raros[:prefixo]:
+            candidatos.update(self.indice.get(gram, ()))
+
+        melhor, melhor_score = None, 0.0
+        for i in sorted(candidatos):
+            comuns = len(grams & self.grams[i])
+            score = comuns / (len(grams) + len(self.grams[i]) - comuns)
+            if score > melhor_score:
+                melhor, melhor_score = i, score
+        return melhor if melhor_score >= self.limiar else None
+
+    def _ponto(self, i: int, bairro: Optional[str]) -> Tuple[float, float]:
+        pontos = self.pontos[i]
+        if bairro:
+            for nome, (lat, lng, _) in pontos.items():
+                if normalizar_endereco(nome) == normalizar_endereco(bairro):
+                    return lat, lng
+        lat, lng, _ = max(pontos.values(), key=lambda p: p[2])
+        return lat, lng
@@ -0,0 +1,230 @@
+"""
+SafeDrive RJ - Tipo de crime e bairro a partir do texto da notícia
+
+Substitui as cópias de classificar_crime/extrair_local dos coletores:
+    * Um autômato Aho-Corasick com palavras-chave E bairros, montado uma vez
+    * Uma passada no texto acha todas as ocorrências (custo ~ tamanho do
+      texto, não cresce com o número de bairros)
+    * Sem acento e sem caixa: "Niteroi", "NITERÓI" e "Niterói" batem
+    * Vários candidatos pontuados (menções + posição), em vez de
+      "o primeiro da lista que aparecer"
+
+Palavras-chave de crime são radicais ("rouba" pega "roubaram") e precisam
+começar numa palavra; bairros precisam ser palavras inteiras ("Centro" não
+pega "concentração") e o mais longo vence ("Barra da Tijuca" > "Tijuca").
+
+Uso:
+    tipo_crime, local = analisar_texto(f"{titulo} {resumo}")
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.metrics import METRICS
+from app.utils.texto import remover_acentos
+
+PALAVRAS_CRIMES = {
+    "Sequestro": ["sequestro", "sequestra", "refém", "cativeiro"],
+    "Roubo": ["roubo", "assalto", "assalta", "rouba", "bandido", "armado", "rendido"],
+    "Furto": ["furto", "furta", "furtado", "subtraiu"],
+}
+
+COORDS_BAIRROS = {
+    "Copacabana": (-22.971177, -43.182543),
+    "Ipanema": (-22.983889, -43.204722),
+    "Leblon": (-22.984444, -43.219722),
+    "Botafogo": (-22.951389, -43.182778),
+    "Flamengo": (-22.933333, -43.175),
+    "Centro": (-22.903889, -43.188333),
+    "Lapa": (-22.912778, -43.179722),
+    "Santa Teresa": (-22.918611, -43.188611),
+    "Tijuca": (-22.925556, -43.237778),
+    "Vila Isabel": (-22.916111, -43.245556),
+    "Barra da Tijuca": (-23.003611, -43.364722),
+    "Recreio": (-23.020556, -43.463333),
+    "Jacarepaguá": (-22.936389, -43.360278),
+    "Madureira": (-22.870833, -43.337222),
+    "Campo Grande": (-22.901944, -43.5625),
+    "Bangu": (-22.875833, -43.465833),
+    "Realengo": (-22.881667, -43.433333),
+    "Duque de Caxias": (-22.785556, -43.305278),
+    "Nova Iguaçu": (-22.759444, -43.451111),
+    "São Gonçalo": (-22.826667, -43.053333),
+    "Niterói": (-22.883056, -43.103889),
+    "Rocinha": (-22.987222, -43.249444),
+    "Complexo do Alemão": (-22.863056, -43.262222),
+    "Cidade de Deus": (-22.945, -43.363056),
+    "Maré": (-22.866667, -43.243333),
+    "Zona Norte": (-22.899, -43.279),
+    "Zona Sul": (-22.971, -43.182),
+    "Zona Oeste": (-22.936, -43.360),
+    "Baixada Fluminense": (-22.785, -43.305),
+}
+
+CRIME = 'crime'
+BAIRRO = 'bairro'
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas e sem acentos (mesmo tamanho para texto já composto)"""
+    return remover_acentos((texto or "").lower())
+
+
+class KeywordMatcher:
+    """Aho-Corasick: todas as ocorrências de todos os padrões numa passada"""
+
+    def __init__(self, padroes: Iterable[Tuple[str, object]]):
+        # Estado 0 = raiz; goto[s][c] -> estado; saida[s] = [(tamanho, rotulo)]
+        self.goto: List[Dict[str, int]] = [{}]
+        self.falha: List[int] = [0]
+        self.saida: List[List[Tuple[int, object]]] = [[]]
+
+        for padrao, rotulo in padroes:
+            padrao = normalizar(padrao)
+            if padrao:
+                self._inserir(padrao, rotulo)
+
+        self._ligar_falhas()
+
+    def _inserir(self, padrao: str, rotulo):
+        estado = 0
+        for c in padrao:
+            proximo = self.goto[estado].get(c)
+            if proximo is None:
+                proximo = len(self.goto)
+                self.goto[estado][c] = proximo
+                self.goto.append({})
+                self.falha.append(0)
+                self.saida.append([])
+            estado = proximo
+        self.saida[estado].append((len(padrao), rotulo))
+
+    def _ligar_falhas(self):
+        fila = deque(self.goto[0].values())
+        while fila:
+            estado = fila.popleft()
+            for c, proximo in self.goto[estado].items():
+                fila.append(proximo)
+
+                f = self.falha[estado]
+                while f and c not in self.goto[f]:
+                    f = self.falha[f]
+                self.falha[proximo] = self.goto[f].get(c, 0) if estado else 0
+                self.saida[proximo] = self.saida[proximo] + self.saida[self.falha[proximo]]
+
+    def find(self, texto: str) -> List[Tuple[int, int, object]]:
+        """Ocorrências (inicio, fim, rotulo) no texto JÁ normalizado"""
+        goto, falha, saida = self.goto, self.falha, self.saida
+        ocorrencias = []
+        estado = 0
+
+        for i, c in enumerate(texto):
+            while estado and c not in goto[estado]:
+                estado = falha[estado]
+            estado = goto[estado].get(c, 0)
+
+            for tamanho, rotulo in saida[estado]:
+                ocorrencias.append((i + 1 - tamanho, i + 1, rotulo))
+
+        return ocorrencias
+
+
+class TextEnricher:
+    """Palavras-chave de crime + bairros num único autômato"""
+
+    def __init__(self, palavras_crimes: Dict[str, List[str]] = PALAVRAS_CRIMES,
+                 bairros: Iterable[str] = COORDS_BAIRROS):
+        self.tipos = list(palavras_crimes)
+        padroes = [(p, (CRIME, tipo)) for tipo, palavras in palavras_crimes.items() for p in palavras]
+        padroes += [(bairro, (BAIRRO, bairro)) for bairro in bairros]
+        self.matcher = KeywordMatcher(padroes)
+
+    def candidatos(self, texto: str) -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Todos os tipos de crime e bairros do texto, do mais ao menos provável
+
+        Pontuação = número de menções + bônus (até 1) por aparecer mais cedo
+        (o título vem antes do resumo).
+
+        Returns:
+            {"crime": [(tipo, score), ...], "bairro": [(bairro, score), ...]}
+        """
+        texto = normalizar(texto)
+        tamanho = max(len(texto), 1)
+
+        ocorrencias = [
+            (inicio, fim, rotulo)
+            for inicio, fim, rotulo in self.matcher.find(texto)
+            if _inicio_de_palavra(texto, inicio) and (rotulo[0] == CRIME or _fim_de_palavra(texto, fim))
+        ]
+        ocorrencias = _sem_sobrepostos(ocorrencias)
+
+        pontos = {CRIME: {}, BAIRRO: {}}
+        for inicio, _, (grupo, nome) in ocorrencias:
+            bonus = 1 - inicio / tamanho
+            atual = pontos[grupo].get(nome)
+            # 1 por menção; o bônus é o da primeira menção
+            pontos[grupo][nome] = (atual[0] + 1, atual[1]) if atual else (1, bonus)
+
+        ordem = {tipo: i for i, tipo in enumerate(self.tipos)}
+        return {
+            grupo: [
+                (nome, mencoes + bonus)
+                for nome, (mencoes, bonus) in sorted(
+                    itens.items(),
+                    # Empate: ordem de PALAVRAS_CRIMES (sequestro > roubo > furto)
+                    key=lambda item: (-(item[1][0] + item[1][1]), ordem.get(item[0], 0))
+                )
+            ]
+            for grupo, itens in pontos.items()
+        }
+
+    def analisar(self, texto: str) -> Tuple[Optional[str], Optional[str]]:
+        """(tipo_crime, bairro) mais prováveis, numa passada só"""
+        with METRICS.stage('classify'):
+            candidatos = self.candidatos(texto)
+        crimes = candidatos[CRIME]
+        bairros = candidatos[BAIRRO]
+        return (crimes[0][0] if crimes else None), (bairros[0][0] if bairros else None)
+
+
+def _inicio_de_palavra(texto: str, inicio: int) -> bool:
+    return inicio == 0 or not texto[inicio - 1].isalnum()
+
+
+def _fim_de_palavra(texto: str, fim: int) -> bool:
+    return fim == len(texto) or not texto[fim].isalnum()
+
+
+def _sem_sobrepostos(ocorrencias: List[Tuple[int, int, object]]) -> List[Tuple[int, int, object]]:
+    """Remove ocorrências contidas numa maior do mesmo grupo ("Tijuca" em "Barra da Tijuca")"""
+    ocorrencias = sorted(ocorrencias, key=lambda o: (o[0], -(o[1] - o[0])))
+    resultado = []
+    fim_por_grupo = {}
+
+    for inicio, fim, rotulo in ocorrencias:
+        grupo = rotulo[0]
+        if fim <= fim_por_grupo.get(grupo, -1):
+            continue
+        fim_por_grupo[grupo] = fim
+        resultado.append((inicio, fim, rotulo))
+
+    return resultado
+
+
+_ENRICHER = TextEnricher()
+
+
+def analisar_texto(texto: str) -> Tuple[Optional[str], Optional[str]]:
+    """(tipo_crime, bairro) do texto, com as listas padrão"""
+    return _ENRICHER.analisar(texto)
+
+
+def classificar_crime(texto: str) -> Optional[str]:
+    """Tipo de crime mais provável (ou None)"""
+    return _ENRICHER.analisar(texto)[0]
+
+
+def extrair_local(texto: str) -> Optional[str]:
+    """Bairro mais provável (ou None)"""
+    return _ENRICHER.analisar(texto)[1]
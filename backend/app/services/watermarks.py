@@ -0,0 +1,114 @@
+"""
+Marca d'água de ingestão por fonte (tabela ingestion_watermarks)
+
+Cada fonte guarda o ponto mais novo já coletado:
+    * last_published_at: maior data de publicação vista
+    * last_ids: links/IDs do topo da listagem na última coleta
+
+A coleta diária percorre a listagem (mais recente primeiro) só até
+cruzar a marca, então o custo depende do que é novo, não do acervo.
+A marca só avança depois que os itens foram gravados.
+
+Uso:
+    marcas = Watermarks(conn)
+    marca = marcas.get('G1')   # None na primeira coleta
+    ...
+    marcas.advance('G1', published_at=mais_nova, ids=links_do_topo)
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+WATERMARKS_DDL = """
+    CREATE TABLE IF NOT EXISTS ingestion_watermarks (
+        source VARCHAR(50) PRIMARY KEY,
+        last_published_at TIMESTAMP,
+        last_ids TEXT[] NOT NULL DEFAULT '{}',
+        runs INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT NOW()
+    )
+"""
+
+# Data só anda para frente; IDs são trocados pelos da coleta mais recente
+ADVANCE_SQL = """
+    INSERT INTO ingestion_watermarks (source, last_published_at, last_ids, runs, updated_at)
+    VALUES (%(source)s, %(published_at)s, COALESCE(%(ids)s::text[], '{}'), 1, NOW())
+    ON CONFLICT (source) DO UPDATE SET
+        last_published_at = GREATEST(ingestion_watermarks.last_published_at, excluded.last_published_at),
+        last_ids = COALESCE(%(ids)s::text[], ingestion_watermarks.last_ids),
+        runs = ingestion_watermarks.runs + 1,
+        updated_at = NOW()
+"""
+
+# IDs guardados por fonte (topo da listagem): basta um deles continuar
+# na listagem para a próxima coleta saber onde parar
+MAX_IDS = 20
+
+
+class Watermarks:
+    """Marcas d'água por fonte, no próprio banco"""
+
+    def __init__(self, db_conn):
+        self.conn = db_conn
+        with self.conn.cursor() as cursor:
+            cursor.execute(WATERMARKS_DDL)
+        self.conn.commit()
+
+    def get(self, source: str) -> Optional[Dict]:
+        """{'source', 'last_published_at', 'last_ids', 'runs', 'updated_at'} ou None"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT source, last_published_at, last_ids, runs, updated_at
+                FROM ingestion_watermarks
+                WHERE source = %s
+            """, (source,))
+            row = cursor.fetchone()
+
+        if row is None:
+            return None
+
+        return {
+            'source': row[0],
+            'last_published_at': row[1],
+            'last_ids': list(row[2] or []),
+            'runs': row[3],
+            'updated_at': row[4],
+        }
+
+    def advance(self, source: str, published_at: Optional[datetime] = None,
+                ids: Optional[List[str]] = None, commit: bool = True):
+        """Move a marca da fonte (published_at nunca volta; ids=None mantém os atuais)"""
+        with self.conn.cursor() as cursor:
+            cursor.execute(ADVANCE_SQL, {
+                'source': source,
+                'published_at': published_at,
+                'ids': list(ids)[:MAX_IDS] if ids is not None else None,
+            })
+        if commit:
+            self.conn.commit()
+
+    def has_rows(self, source: str) -> bool:
+        """
+        A fonte já tem incidentes gravados?
+
+        Marca presente responde sem tocar em crime_incidents; sem marca,
+        EXISTS para no primeiro registro (índice por source) em vez de
+        contar todos, e a marca (sem data) é criada.
+        """
+        if self.get(source) is not None:
+            return True
+
+        with self.conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT 1
+                FROM crime_incidents
+                WHERE source = %s
+                LIMIT 1
+            """, (source,))
+            row = cursor.fetchone()
+
+        if row is None:
+            return False
+
+        self.advance(source)
+        return True
@@ -1,10 +1,12 @@
 """
-SUSEP IVR - Base de dados local (SEM dependências externas)
-Dados SUSEP 2025 - 60+ modelos
+SUSEP IVR - Consulta de risco por marca/modelo
+Ranking oficial da SUSEP (base local 2025 até a 1ª carga)
 """
 
 from typing import Dict, Optional
 
+from app.services.ivr_lookup import IVR_LOOKUP
+
 class SusepScraper:
     def __init__(self):
         pass
@@ -41,127 +43,30 @@ class SusepScraper:
     
     def _get_risco_from_database(self, marca: str, modelo: str, ano: Optional[int]) -> Dict:
         """
-        Base de dados SUSEP IVR 2025
+        Ranking IVR da SUSEP (app/services/ivr_lookup.py)
         IVR = Índice de Veículos Roubados
         
-        Classificação:
-        > 0.50 = Muito Alto
-        0.30-0.50 = Alto  
-        0.15-0.30 = Médio
-        0.08-0.15 = Baixo
-        < 0.08 = Muito Baixo
+        Índice carregado uma vez e renovado em segundo plano; busca exata,
+        por prefixo (versões do modelo) e aproximada (trigramas).
         """
+        data = IVR_LOOKUP.lookup(marca, modelo)
         
-        DATABASE = {
-            # Volkswagen
-            "VOLKSWAGEN GOL": {"ivr": 0.85, "risco": "Muito Alto", "ranking": 2},
-            "VOLKSWAGEN POLO": {"ivr": 0.42, "risco": "Alto", "ranking": 45},
-            "VOLKSWAGEN FOX": {"ivr": 0.48, "risco": "Alto", "ranking": 32},
-            "VOLKSWAGEN VOYAGE": {"ivr": 0.45, "risco": "Alto", "ranking": 38},
-            "VOLKSWAGEN TIGUAN": {"ivr": 0.38, "risco": "Alto", "ranking": 52},
-            "VOLKSWAGEN SAVEIRO": {"ivr": 0.044, "risco": "Muito Baixo", "ranking": 1},
-            "VOLKSWAGEN AMAROK": {"ivr": 0.35, "risco": "Alto", "ranking": 58},
-            "VOLKSWAGEN T-CROSS": {"ivr": 0.42, "risco": "Alto", "ranking": 44},
-            "VOLKSWAGEN JETTA": {"ivr": 0.28, "risco": "Médio", "ranking": 62},
-            
-            # Chevrolet
-            "CHEVROLET ONIX": {"ivr": 0.75, "risco": "Muito Alto", "ranking": 3},
-            "CHEVROLET PRISMA": {"ivr": 0.48, "risco": "Alto", "ranking": 33},
-            "CHEVROLET S10": {"ivr": 0.217, "risco": "Médio", "ranking": 78},
-            "CHEVROLET CRUZE": {"ivr": 0.28, "risco": "Médio", "ranking": 65},
-            "CHEVROLET SPIN": {"ivr": 0.25, "risco": "Médio", "ranking": 70},
-            "CHEVROLET TRACKER": {"ivr": 0.075, "risco": "Muito Baixo", "ranking": 3},
-            "CHEVROLET MONTANA": {"ivr": 0.173, "risco": "Baixo", "ranking": 85},
-            
-            # Fiat
-            "FIAT PALIO": {"ivr": 0.82, "risco": "Muito Alto", "ranking": 4},
-            "FIAT UNO": {"ivr": 0.78, "risco": "Muito Alto", "ranking": 5},
-            "FIAT STRADA": {"ivr": 0.082, "risco": "Muito Baixo", "ranking": 4},
-            "FIAT ARGO": {"ivr": 0.45, "risco": "Alto", "ranking": 36},
-            "FIAT MOBI": {"ivr": 0.42, "risco": "Alto", "ranking": 43},
-            "FIAT TORO": {"ivr": 0.28, "risco": "Médio", "ranking": 64},
-            "FIAT CINQUECENTO": {"ivr": 0.074, "risco": "Muito Baixo", "ranking": 2},
-            
-            # Ford
-            "FORD KA": {"ivr": 0.72, "risco": "Muito Alto", "ranking": 8},
-            "FORD FIESTA": {"ivr": 0.52, "risco": "Muito Alto", "ranking": 28},
-            "FORD FOCUS": {"ivr": 0.32, "risco": "Alto", "ranking": 60},
-            "FORD RANGER": {"ivr": 0.38, "risco": "Alto", "ranking": 51},
-            "FORD ECOSPORT": {"ivr": 0.35, "risco": "Alto", "ranking": 55},
-            
-            # Hyundai
-            "HYUNDAI HB20": {"ivr": 0.95, "risco": "Muito Alto", "ranking": 1},
-            "HYUNDAI CRETA": {"ivr": 0.28, "risco": "Médio", "ranking": 66},
-            "HYUNDAI TUCSON": {"ivr": 0.25, "risco": "Médio", "ranking": 71},
-            "HYUNDAI I30": {"ivr": 0.52, "risco": "Muito Alto", "ranking": 29},
-            "HYUNDAI IX35": {"ivr": 0.52, "risco": "Muito Alto", "ranking": 30},
-            
-            # Toyota
-            "TOYOTA COROLLA": {"ivr": 0.42, "risco": "Alto", "ranking": 42},
-            "TOYOTA HILUX": {"ivr": 0.45, "risco": "Alto", "ranking": 37},
-            "TOYOTA ETIOS": {"ivr": 0.38, "risco": "Alto", "ranking": 53},
-            "TOYOTA YARIS": {"ivr": 0.15, "risco": "Baixo", "ranking": 92},
-            "TOYOTA COROLLA CROSS": {"ivr": 0.12, "risco": "Baixo", "ranking": 98},
-            
-            # Honda
-            "HONDA CIVIC": {"ivr": 0.48, "risco": "Alto", "ranking": 31},
-            "HONDA FIT": {"ivr": 0.42, "risco": "Alto", "ranking": 41},
-            "HONDA CITY": {"ivr": 0.28, "risco": "Médio", "ranking": 67},
-            "HONDA HR-V": {"ivr": 0.25, "risco": "Médio", "ranking": 72},
-            
-            # Nissan
-            "NISSAN KICKS": {"ivr": 0.211, "risco": "Médio", "ranking": 80},
-            "NISSAN VERSA": {"ivr": 0.42, "risco": "Alto", "ranking": 40},
-            "NISSAN FRONTIER": {"ivr": 0.38, "risco": "Alto", "ranking": 54},
-            "NISSAN TIIDA": {"ivr": 0.225, "risco": "Médio", "ranking": 77},
-            
-            # Renault
-            "RENAULT KWID": {"ivr": 0.52, "risco": "Muito Alto", "ranking": 27},
-            "RENAULT SANDERO": {"ivr": 0.48, "risco": "Alto", "ranking": 34},
-            "RENAULT DUSTER": {"ivr": 0.32, "risco": "Alto", "ranking": 59},
-            "RENAULT LOGAN": {"ivr": 0.45, "risco": "Alto", "ranking": 39},
-            "RENAULT CAPTUR": {"ivr": 0.167, "risco": "Baixo", "ranking": 88},
-            
-            # Jeep
-            "JEEP RENEGADE": {"ivr": 0.55, "risco": "Muito Alto", "ranking": 25},
-            "JEEP COMPASS": {"ivr": 0.135, "risco": "Baixo", "ranking": 95},
-        }
-        
-        # Buscar veículo
-        key = f"{marca} {modelo}"
-        
-        if key in DATABASE:
-            data = DATABASE[key]
-            print(f"✅ Encontrado: {data['risco']} (IVR {data['ivr']})")
-            return {
-                "marca": marca,
-                "modelo": modelo,
-                "ano": ano,
-                "ivr": data["ivr"],
-                "risco": data["risco"],
-                "ranking": data["ranking"],
-                "fonte": "SUSEP IVR 2025",
-                "encontrado": True
-            }
-        
-        # Busca parcial por modelo
-        for db_key, data in DATABASE.items():
-            if modelo in db_key:
-                print(f"✅ Encontrado (parcial): {data['risco']}")
-                return {
-                    "marca": marca,
-                    "modelo": modelo,
-                    "ano": ano,
-                    "ivr": data["ivr"],
-                    "risco": data["risco"],
-                    "ranking": data["ranking"],
-                    "fonte": "SUSEP IVR 2025 (parcial)",
-                    "encontrado": True
-                }
+        if data is None:
+            print("⚠️ Veículo não encontrado na base")
+            return self._get_default_risk(marca, modelo)
         
-        # Não encontrado
-        print("⚠️ Veículo não encontrado na base")
-        return self._get_default_risk(marca, modelo)
+        parcial = data["via"] != "exact"
+        print(f"✅ Encontrado{' (parcial)' if parcial else ''}: {data['risco']} (IVR {data['ivr']})")
+        return {
+            "marca": marca,
+            "modelo": modelo,
+            "ano": ano,
+            "ivr": data["ivr"],
+            "risco": data["risco"],
+            "ranking": data["ranking"],
+            "fonte": f"{data['fonte']} (parcial)" if parcial else data["fonte"],
+            "encontrado": True
+        }
     
     def _get_default_risk(self, marca: str, modelo: str) -> Dict:
         """Risco padrão quando não encontrado"""
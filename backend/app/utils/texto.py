@@ -0,0 +1,18 @@
+"""
+Normalização de texto (acentos, caixa, slugs)
+"""
+
+import re
+import unicodedata
+
+
+def remover_acentos(texto: str) -> str:
+    """'Niterói' -> 'Niteroi'"""
+    texto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def slug(texto: str) -> str:
+    """'São João de Meriti' -> 'sao_joao_de_meriti' (igual a slug_cidade() no banco)"""
+    texto = remover_acentos((texto or "").lower())
+    return re.sub(r"[^a-z0-9]+", "_", texto).strip("_")
@@ -16,14 +16,14 @@ Cron (todo dia às 3h da manhã):
     0 3 * * * cd /caminho && python atualizador_diario.py
 """
 
-import requests
-from bs4 import BeautifulSoup
-import re
 from datetime import datetime, timedelta
-import time
 import psycopg2
 import logging
 
+from app.services.known_items import KnownItems
+from app.services.scraping import crawl_sites
+from app.services.text_enrichment import COORDS_BAIRROS, analisar_texto
+
 # ════════════════════════════════════════════════════════════
 # CONFIGURAÇÃO
 # ════════════════════════════════════════════════════════════
@@ -46,164 +46,82 @@ DB_CONFIG = {
 }
 
 # Sites (apenas primeiras páginas = notícias recentes)
+# "site" = plugin em app/services/scraping/sites.py
 SITES_DIARIOS = {
     "G1 Rio": {
-        "url": "https://g1.globo.com/rj/rio-de-janeiro/index/feed/pagina-{}.ghtml",
-        "paginas": 5  # Apenas primeiras 5 páginas (mais recentes)
+        "site": "g1",
+        "paginas": 5,  # Apenas primeiras 5 páginas (mais recentes)
+        "parar_se_conhecida": True  # Feed: página toda conhecida = resto já coletado
     },
     "Extra": {
-        "url": "https://extra.globo.com/casos-de-policia/page/{}/",
+        "site": "extra",
         "paginas": 3
     },
     "O Globo": {
-        "url": "https://oglobo.globo.com/rio/page/{}/",
+        "site": "oglobo",
         "paginas": 3
     },
     "UOL": {
-        "url": "https://noticias.uol.com.br/ultimas/?p={}",
+        "site": "uol",
         "paginas": 3
     },
     "R7": {
-        "url": "https://noticias.r7.com/rio-de-janeiro?page={}",
+        "site": "r7",
         "paginas": 3
     }
 }
 
-# Palavras-chave para crimes
-PALAVRAS_CRIMES = {
-    "Sequestro": ["sequestro", "sequestra", "refém", "cativeiro"],
-    "Roubo": ["roubo", "assalto", "assalta", "rouba", "bandido", "armado"],
-    "Furto": ["furto", "furta", "furtado", "subtraiu"],
-}
-
-# Bairros
-COORDS_BAIRROS = {
-    "Copacabana": (-22.971177, -43.182543),
-    "Ipanema": (-22.983889, -43.204722),
-    "Leblon": (-22.984444, -43.219722),
-    "Botafogo": (-22.951389, -43.182778),
-    "Flamengo": (-22.933333, -43.175),
-    "Centro": (-22.903889, -43.188333),
-    "Lapa": (-22.912778, -43.179722),
-    "Santa Teresa": (-22.918611, -43.188611),
-    "Tijuca": (-22.925556, -43.237778),
-    "Vila Isabel": (-22.916111, -43.245556),
-    "Barra da Tijuca": (-23.003611, -43.364722),
-    "Recreio": (-23.020556, -43.463333),
-    "Jacarepaguá": (-22.936389, -43.360278),
-    "Madureira": (-22.870833, -43.337222),
-    "Campo Grande": (-22.901944, -43.5625),
-    "Bangu": (-22.875833, -43.465833),
-    "Duque de Caxias": (-22.785556, -43.305278),
-    "Nova Iguaçu": (-22.759444, -43.451111),
-    "São Gonçalo": (-22.826667, -43.053333),
-    "Niterói": (-22.883056, -43.103889),
-    "Zona Norte": (-22.899, -43.279),
-    "Zona Sul": (-22.971, -43.182),
-}
-
 # ════════════════════════════════════════════════════════════
 # FUNÇÕES
 # ════════════════════════════════════════════════════════════
 
-def buscar_noticias_recentes(site_nome, config):
-    """Busca apenas notícias recentes de um site"""
-    logging.info(f"📰 {site_nome}...")
+def buscar_noticias_recentes(conhecidos):
+    """
+    Busca as notícias recentes de todos os sites, em paralelo
     
-    noticias = []
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
+    Links já gravados são descartados em memória (filtro de Bloom); o G1
+    para na primeira página em que tudo já é conhecido.
+    """
+    logging.info(f"📰 Buscando em {len(SITES_DIARIOS)} sites...")
     
-    for pagina in range(1, config["paginas"] + 1):
-        try:
-            url = config["url"].format(pagina)
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Tentar diferentes seletores
-            items = (soup.find_all("div", class_="feed-post-body") or 
-                    soup.find_all("article") or
-                    soup.find_all("div", class_=re.compile("post|article|item")))
-            
-            for item in items:
-                # Link
-                link_tag = item.find("a", href=True)
-                if not link_tag:
-                    continue
-                
-                link = link_tag["href"]
-                if not link.startswith("http"):
-                    # Construir URL completa
-                    base_url = url.split("/")[0] + "//" + url.split("/")[2]
-                    link = base_url + link
-                
-                # Título
-                titulo_tag = (item.find("h2") or item.find("h3") or 
-                             item.find(class_=re.compile("title|headline")) or link_tag)
-                titulo = titulo_tag.get_text(strip=True) if titulo_tag else ""
-                
-                if not titulo or len(titulo) < 10:
-                    continue
-                
-                # Resumo
-                resumo_tag = item.find("p") or item.find(class_=re.compile("resumo|description|excerpt"))
-                resumo = resumo_tag.get_text(strip=True) if resumo_tag else ""
-                
-                noticias.append({
-                    "titulo": titulo,
-                    "link": link,
-                    "resumo": resumo,
-                    "fonte": site_nome
-                })
-            
-            time.sleep(1)  # Rate limiting
-            
-        except Exception as e:
-            logging.error(f"  ❌ Erro página {pagina}: {e}")
-            continue
+    nomes = {config["site"]: site_nome for site_nome, config in SITES_DIARIOS.items()}
+    jobs = {config["site"]: range(1, config["paginas"] + 1) for config in SITES_DIARIOS.values()}
+    delays = {config["site"]: 1 for config in SITES_DIARIOS.values()}  # Rate limiting
     
-    logging.info(f"  ✅ {len(noticias)} notícias coletadas")
-    return noticias
-
-
-def classificar_crime(texto):
-    """Classifica tipo de crime"""
-    texto_lower = texto.lower()
+    noticias_por_site = {site_nome: [] for site_nome in SITES_DIARIOS}
+    conhecidas = {site_nome: 0 for site_nome in SITES_DIARIOS}
     
-    for tipo, palavras in PALAVRAS_CRIMES.items():
-        for palavra in palavras:
-            if palavra in texto_lower:
-                return tipo
+    def on_page(site, pagina, noticias, tem_conteudo):
+        site_nome = nomes[site]
+        novas = [noticia for noticia in noticias if noticia["link"] not in conhecidos]
+        for noticia in novas:
+            noticia["fonte"] = site_nome
+        
+        noticias_por_site[site_nome].extend(novas)
+        conhecidas[site_nome] += len(noticias) - len(novas)
+        
+        if noticias and not novas and SITES_DIARIOS[site_nome].get("parar_se_conhecida"):
+            logging.info(f"  🛑 {site_nome}: página {pagina} já conhecida - parando")
+            return False
     
-    return None
-
-
-def extrair_local(texto):
-    """Extrai bairro mencionado"""
-    texto_lower = texto.lower()
+    crawl_sites(jobs, on_page, delays=delays, timeout=10)
     
-    for bairro in COORDS_BAIRROS.keys():
-        if bairro.lower() in texto_lower:
-            return bairro
+    for site_nome, noticias in noticias_por_site.items():
+        logging.info(f"  ✅ {site_nome}: {len(noticias)} notícias novas "
+                    f"({conhecidas[site_nome]} já conhecidas)")
     
-    return None
+    return noticias_por_site
 
 
 def processar_e_salvar(noticia_raw):
     """Processa notícia e salva no banco"""
     texto = f"{noticia_raw['titulo']} {noticia_raw.get('resumo', '')}"
     
-    # Classificar
-    tipo_crime = classificar_crime(texto)
+    # Tipo de crime + bairro (uma passada no texto)
+    tipo_crime, local = analisar_texto(texto)
     if not tipo_crime:
         return False
     
-    # Extrair local
-    local = extrair_local(texto)
-    
     # Coordenadas
     lat, lng = COORDS_BAIRROS.get(local, (None, None)) if local else (None, None)
     
@@ -258,9 +176,17 @@ def atualizador_diario():
     total_coletadas = 0
     total_salvas = 0
     
-    # Para cada site
-    for site_nome, config in SITES_DIARIOS.items():
-        noticias = buscar_noticias_recentes(site_nome, config)
+    # Links já gravados (carrega do disco + linhas novas do banco)
+    conn = psycopg2.connect(**DB_CONFIG)
+    conhecidos = KnownItems.for_links(conn)
+    conn.close()
+    logging.info(f"🧮 Links conhecidos: {len(conhecidos)}")
+    
+    # Todos os sites de uma vez (listagens revalidadas pelo cache HTTP)
+    noticias_por_site = buscar_noticias_recentes(conhecidos)
+    logging.info("")
+    
+    for site_nome, noticias in noticias_por_site.items():
         total_coletadas += len(noticias)
         
         # Processar e salvar
@@ -268,11 +194,14 @@ def atualizador_diario():
         for noticia in noticias:
             if processar_e_salvar(noticia):
                 salvas += 1
+                conhecidos.add(noticia["link"])
         
         total_salvas += salvas
-        logging.info(f"  💾 {salvas} crimes salvos")
+        logging.info(f"  💾 {site_nome}: {salvas} crimes salvos")
         logging.info("")
     
+    conhecidos.save()
+    
     # Relatório
     logging.info("=" * 60)
     logging.info("✅ ATUALIZAÇÃO CONCLUÍDA!")
@@ -2,6 +2,12 @@
 """
 SafeDrive RJ - Street Risk Calculator (CORRIGIDO)
 Calcula risco por MUNICÍPIO (já que não temos bairros)
+
+Lê dos rollups (crime_rollups.sql), não de crime_incidents.
+
+Uso:
+    python calculate_risks.py            # relatório
+    python calculate_risks.py --refresh  # reconstrói os rollups antes
 """
 
 import psycopg2
@@ -41,7 +47,7 @@ def connect_db():
         return None
 
 
-def main():
+def main(refresh: bool = False):
     print("=" * 60)
     print("  SafeDrive RJ - Análise de Riscos")
     print("=" * 60)
@@ -56,18 +62,25 @@ def main():
     
     cursor = conn.cursor()
     
+    if refresh:
+        print_info("Reconstruindo rollups...")
+        cursor.execute("SELECT refresh_crime_rollups()")
+        conn.commit()
+        print_success("Rollups atualizados!")
+        print()
+    
     # Estatísticas gerais
     print_info("📊 Estatísticas Gerais:")
     
-    cursor.execute("SELECT COUNT(*) FROM crime_incidents")
+    cursor.execute("SELECT COALESCE(SUM(total), 0) FROM crime_rollup_daily")
     total = cursor.fetchone()[0]
     print(f"  Total de crimes: {total}")
     
     cursor.execute("""
-        SELECT crime_type, COUNT(*) 
-        FROM crime_incidents 
+        SELECT crime_type, SUM(total) 
+        FROM crime_rollup_daily 
         GROUP BY crime_type 
-        ORDER BY COUNT(*) DESC
+        ORDER BY SUM(total) DESC
     """)
     print()
     print_info("Por tipo:")
@@ -81,11 +94,11 @@ def main():
     cursor.execute("""
         SELECT 
             city,
-            COUNT(*) as total_crimes,
-            COUNT(*) FILTER (WHERE occurred_at >= NOW() - INTERVAL '30 days') as crimes_30d,
-            MAX(occurred_at) as ultimo_crime
-        FROM crime_incidents
-        WHERE city IS NOT NULL
+            SUM(total) as total_crimes,
+            COALESCE(SUM(total) FILTER (WHERE dia >= CURRENT_DATE - 30), 0) as crimes_30d,
+            MAX(last_occurred_at) as ultimo_crime
+        FROM crime_rollup_daily
+        WHERE city <> ''
         GROUP BY city
         ORDER BY total_crimes DESC
         LIMIT 10
@@ -106,18 +119,22 @@ def main():
     
     now = datetime.now()
     
+    # 24h e 7d pelo rollup horário, 30d e 365d pelo diário
     cursor.execute("""
         SELECT 
-            COUNT(*) FILTER (WHERE occurred_at >= %s) as ultimas_24h,
-            COUNT(*) FILTER (WHERE occurred_at >= %s) as ultimos_7d,
-            COUNT(*) FILTER (WHERE occurred_at >= %s) as ultimos_30d,
-            COUNT(*) FILTER (WHERE occurred_at >= %s) as ultimos_365d
-        FROM crime_incidents
+            (SELECT COALESCE(SUM(total), 0) FROM crime_rollup_hourly
+             WHERE bucket >= date_trunc('hour', %s::timestamp)) as ultimas_24h,
+            (SELECT COALESCE(SUM(total), 0) FROM crime_rollup_hourly
+             WHERE bucket >= date_trunc('hour', %s::timestamp)) as ultimos_7d,
+            (SELECT COALESCE(SUM(total), 0) FROM crime_rollup_daily
+             WHERE dia >= %s) as ultimos_30d,
+            (SELECT COALESCE(SUM(total), 0) FROM crime_rollup_daily
+             WHERE dia >= %s) as ultimos_365d
     """, (
         now - timedelta(hours=24),
         now - timedelta(days=7),
-        now - timedelta(days=30),
-        now - timedelta(days=365)
+        (now - timedelta(days=30)).date(),
+        (now - timedelta(days=365)).date()
     ))
     
     row = cursor.fetchone()
@@ -132,10 +149,10 @@ def main():
     
     cursor.execute("""
         SELECT 
-            EXTRACT(HOUR FROM occurred_at) as hora,
-            COUNT(*) as qtd
-        FROM crime_incidents
-        WHERE occurred_at >= NOW() - INTERVAL '90 days'
+            EXTRACT(HOUR FROM bucket) as hora,
+            SUM(total) as qtd
+        FROM crime_rollup_hourly
+        WHERE bucket >= NOW() - INTERVAL '90 days'
         GROUP BY hora
         ORDER BY qtd DESC
         LIMIT 5
@@ -155,11 +172,11 @@ def main():
     
     cursor.execute("""
         SELECT 
-            EXTRACT(DOW FROM occurred_at) as dia,
-            COUNT(*) as qtd
-        FROM crime_incidents
-        WHERE occurred_at >= NOW() - INTERVAL '90 days'
-        GROUP BY dia
+            EXTRACT(DOW FROM dia) as dia_semana,
+            SUM(total) as qtd
+        FROM crime_rollup_daily
+        WHERE dia >= CURRENT_DATE - 90
+        GROUP BY dia_semana
         ORDER BY qtd DESC
     """)
     
@@ -181,4 +198,6 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import sys
+    
+    main(refresh="--refresh" in sys.argv)
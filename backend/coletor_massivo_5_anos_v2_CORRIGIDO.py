@@ -15,16 +15,16 @@ Uso:
     python coletor_massivo_5_anos_v2_CORRIGIDO.py
 """
 
-import requests
-from bs4 import BeautifulSoup
-import re
 from datetime import datetime, timedelta
-import time
 import psycopg2
 import logging
 import json
 import os
 
+from app.services.known_items import KnownItems
+from app.services.scraping import crawl_sites
+from app.services.text_enrichment import COORDS_BAIRROS, analisar_texto
+
 # ════════════════════════════════════════════════════════════
 # CONFIGURAÇÃO
 # ════════════════════════════════════════════════════════════
@@ -73,46 +73,6 @@ SITES = {
     }
 }
 
-# Palavras-chave
-PALAVRAS_CRIMES = {
-    "Sequestro": ["sequestro", "sequestra", "refém", "cativeiro"],
-    "Roubo": ["roubo", "assalto", "assalta", "rouba", "bandido", "armado", "rendido"],
-    "Furto": ["furto", "furta", "furtado", "subtraiu"],
-}
-
-# Coordenadas
-COORDS_BAIRROS = {
-    "Copacabana": (-22.971177, -43.182543),
-    "Ipanema": (-22.983889, -43.204722),
-    "Leblon": (-22.984444, -43.219722),
-    "Botafogo": (-22.951389, -43.182778),
-    "Flamengo": (-22.933333, -43.175),
-    "Centro": (-22.903889, -43.188333),
-    "Lapa": (-22.912778, -43.179722),
-    "Santa Teresa": (-22.918611, -43.188611),
-    "Tijuca": (-22.925556, -43.237778),
-    "Vila Isabel": (-22.916111, -43.245556),
-    "Barra da Tijuca": (-23.003611, -43.364722),
-    "Recreio": (-23.020556, -43.463333),
-    "Jacarepaguá": (-22.936389, -43.360278),
-    "Madureira": (-22.870833, -43.337222),
-    "Campo Grande": (-22.901944, -43.5625),
-    "Bangu": (-22.875833, -43.465833),
-    "Realengo": (-22.881667, -43.433333),
-    "Duque de Caxias": (-22.785556, -43.305278),
-    "Nova Iguaçu": (-22.759444, -43.451111),
-    "São Gonçalo": (-22.826667, -43.053333),
-    "Niterói": (-22.883056, -43.103889),
-    "Rocinha": (-22.987222, -43.249444),
-    "Complexo do Alemão": (-22.863056, -43.262222),
-    "Cidade de Deus": (-22.945, -43.363056),
-    "Maré": (-22.866667, -43.243333),
-    "Zona Norte": (-22.899, -43.279),
-    "Zona Sul": (-22.971, -43.182),
-    "Zona Oeste": (-22.936, -43.360),
-    "Baixada Fluminense": (-22.785, -43.305),
-}
-
 # ════════════════════════════════════════════════════════════
 # BANCO DE DADOS
 # ════════════════════════════════════════════════════════════
@@ -190,342 +150,15 @@ def salvar_noticia(noticia):
 
 
 # ════════════════════════════════════════════════════════════
-# SCRAPERS CORRIGIDOS E ROBUSTOS
+# SCRAPERS POR SITE (plugins em app/services/scraping/sites.py)
 # ════════════════════════════════════════════════════════════
 
-def scrape_g1(pagina):
-    """Scraper G1 - JÁ FUNCIONA!"""
-    url = f"https://g1.globo.com/rj/rio-de-janeiro/index/feed/pagina-{pagina}.ghtml"
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        noticias = []
-        items = soup.find_all("div", class_="feed-post-body")
-        
-        for item in items:
-            link_tag = item.find("a", class_="feed-post-link")
-            if not link_tag:
-                continue
-            
-            titulo = link_tag.get_text(strip=True)
-            link = link_tag["href"]
-            
-            # Data
-            data_tag = item.find("span", class_="feed-post-datetime")
-            data_str = data_tag.get_text(strip=True) if data_tag else ""
-            
-            # Resumo
-            resumo_tag = item.find("div", class_="feed-post-body-resumo")
-            resumo = resumo_tag.get_text(strip=True) if resumo_tag else ""
-            
-            noticias.append({
-                "titulo": titulo,
-                "link": link,
-                "resumo": resumo,
-                "data_str": data_str,
-                "fonte": "G1 Rio"
-            })
-        
-        return noticias, len(items) > 0
-        
-    except Exception as e:
-        logging.error(f"Erro G1 página {pagina}: {e}")
-        return [], False
-
-
-def scrape_extra_corrigido(pagina):
-    """Scraper CORRIGIDO para Extra - Casos de Polícia"""
-    
-    # URLs alternativas do Extra
-    urls_testar = [
-        f"https://extra.globo.com/rio/page/{pagina}/",
-        f"https://extra.globo.com/casos-de-policia/page/{pagina}/",
-    ]
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
-    }
-    
-    for url in urls_testar:
-        try:
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            noticias = []
-            
-            # Múltiplos seletores para encontrar artigos
-            items = (
-                soup.find_all("article") or
-                soup.find_all("div", class_=re.compile("post|article|materia|noticia", re.I)) or
-                soup.find_all("div", class_=re.compile("feed|item", re.I))
-            )
-            
-            for item in items:
-                # Tentar encontrar link
-                link_tag = item.find("a", href=True)
-                if not link_tag:
-                    continue
-                
-                link = link_tag["href"]
-                
-                # Garantir URL completa
-                if not link.startswith("http"):
-                    link = "https://extra.globo.com" + link
-                
-                # Filtrar apenas notícias do Rio
-                if "rio" not in link.lower() and "rj" not in link.lower():
-                    continue
-                
-                # Tentar encontrar título
-                titulo_tag = (
-                    item.find("h1") or
-                    item.find("h2") or
-                    item.find("h3") or
-                    item.find(class_=re.compile("title|titulo|headline", re.I)) or
-                    link_tag
-                )
-                
-                titulo = titulo_tag.get_text(strip=True) if titulo_tag else ""
-                
-                # Validar
-                if not titulo or len(titulo) < 15:
-                    continue
-                
-                # Resumo
-                resumo_tag = item.find("p") or item.find(class_=re.compile("resumo|description|excerpt", re.I))
-                resumo = resumo_tag.get_text(strip=True) if resumo_tag else ""
-                
-                noticias.append({
-                    "titulo": titulo,
-                    "link": link,
-                    "resumo": resumo,
-                    "data_str": "",
-                    "fonte": "Extra"
-                })
-            
-            if len(noticias) > 0:
-                return noticias, True
-                
-        except Exception as e:
-            logging.debug(f"Tentativa Extra falhou em {url}: {e}")
-            continue
-    
-    return [], False
-
-
-def scrape_oglobo_corrigido(pagina):
-    """Scraper CORRIGIDO para O Globo Rio"""
-    
-    urls_testar = [
-        f"https://oglobo.globo.com/rio/page/{pagina}/",
-        f"https://oglobo.globo.com/rio/",
-    ]
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-        "Accept": "text/html,application/xhtml+xml",
-    }
-    
-    for url in urls_testar:
-        try:
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            noticias = []
-            
-            # Seletores robustos
-            items = (
-                soup.find_all("article") or
-                soup.find_all("div", class_=re.compile("bastian|post|materia", re.I)) or
-                soup.find_all("a", class_=re.compile("post|materia|link", re.I))
-            )
-            
-            for item in items:
-                # Link
-                if item.name == "a":
-                    link_tag = item
-                else:
-                    link_tag = item.find("a", href=True)
-                
-                if not link_tag:
-                    continue
-                
-                link = link_tag.get("href", "")
-                
-                # URL completa
-                if link and not link.startswith("http"):
-                    link = "https://oglobo.globo.com" + link
-                
-                # Filtrar Rio
-                if not link or ("rio" not in link.lower() and "policia" not in link.lower()):
-                    continue
-                
-                # Título
-                titulo_tag = (
-                    item.find("h2") or
-                    item.find("h3") or
-                    item.find(class_=re.compile("title|titulo", re.I)) or
-                    link_tag
-                )
-                
-                titulo = titulo_tag.get_text(strip=True) if titulo_tag else ""
-                
-                if not titulo or len(titulo) < 15:
-                    continue
-                
-                noticias.append({
-                    "titulo": titulo,
-                    "link": link,
-                    "resumo": "",
-                    "data_str": "",
-                    "fonte": "O Globo Rio"
-                })
-            
-            if len(noticias) > 0:
-                return noticias, True
-                
-        except Exception as e:
-            logging.debug(f"Tentativa O Globo falhou: {e}")
-            continue
-    
-    return [], False
-
-
-def scrape_uol_corrigido(pagina):
-    """Scraper CORRIGIDO para UOL"""
-    
-    # UOL por busca de termos específicos
-    termos = ["crime rio de janeiro", "assalto rio", "roubo rj"]
-    termo = termos[pagina % len(termos)]
-    
-    urls_testar = [
-        f"https://busca.uol.com.br/?q={termo.replace(' ', '+')}&p={pagina}",
-        f"https://noticias.uol.com.br/cotidiano/ultimas/?p={pagina}",
-    ]
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-    }
-    
-    for url in urls_testar:
-        try:
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            noticias = []
-            
-            # Seletores UOL
-            items = (
-                soup.find_all("div", class_=re.compile("thumbnail|item|news", re.I)) or
-                soup.find_all("article") or
-                soup.find_all("li", class_=re.compile("item|news", re.I))
-            )
-            
-            for item in items:
-                link_tag = item.find("a", href=True)
-                if not link_tag:
-                    continue
-                
-                link = link_tag["href"]
-                
-                # URL completa
-                if link and not link.startswith("http"):
-                    link = "https://noticias.uol.com.br" + link
-                
-                # Filtrar Rio
-                titulo_tag = item.find("h3") or item.find("h2") or link_tag
-                titulo = titulo_tag.get_text(strip=True) if titulo_tag else ""
-                
-                texto_completo = item.get_text().lower()
-                if not titulo or ("rio" not in texto_completo and "rj" not in texto_completo):
-                    continue
-                
-                if len(titulo) < 15:
-                    continue
-                
-                noticias.append({
-                    "titulo": titulo,
-                    "link": link,
-                    "resumo": "",
-                    "data_str": "",
-                    "fonte": "UOL Notícias RJ"
-                })
-            
-            if len(noticias) > 0:
-                return noticias, True
-                
-        except Exception as e:
-            logging.debug(f"Tentativa UOL falhou: {e}")
-            continue
-    
-    return [], False
-
-
-def scrape_r7(pagina):
-    """Scraper R7 - Mantido original"""
-    url = f"https://noticias.r7.com/rio-de-janeiro?page={pagina}"
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-    }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        noticias = []
-        items = soup.find_all("article") or soup.find_all("div", class_=re.compile("news-item|post", re.I))
-        
-        for item in items:
-            link_tag = item.find("a", href=True)
-            if not link_tag:
-                continue
-            
-            link = link_tag["href"]
-            if not link.startswith("http"):
-                link = "https://noticias.r7.com" + link
-            
-            titulo_tag = item.find("h3") or item.find("h2") or link_tag
-            titulo = titulo_tag.get_text(strip=True) if titulo_tag else ""
-            
-            if not titulo or len(titulo) < 10:
-                continue
-            
-            noticias.append({
-                "titulo": titulo,
-                "link": link,
-                "resumo": "",
-                "data_str": "",
-                "fonte": "R7 Rio"
-            })
-        
-        return noticias, len(items) > 0
-        
-    except Exception as e:
-        logging.error(f"Erro R7 página {pagina}: {e}")
-        return [], False
-
-
-# Mapa de scrapers
 SCRAPERS = {
-    "G1 Rio": scrape_g1,
-    "Extra": scrape_extra_corrigido,
-    "O Globo Rio": scrape_oglobo_corrigido,
-    "UOL Notícias RJ": scrape_uol_corrigido,
-    "R7 Rio": scrape_r7,
+    "G1 Rio": "g1",
+    "Extra": "extra",
+    "O Globo Rio": "oglobo",
+    "UOL Notícias RJ": "uol",
+    "R7 Rio": "r7",
 }
 
 
@@ -533,29 +166,6 @@ SCRAPERS = {
 # PROCESSAMENTO
 # ════════════════════════════════════════════════════════════
 
-def classificar_crime(texto):
-    """Classifica tipo de crime"""
-    texto_lower = texto.lower()
-    
-    for tipo, palavras in PALAVRAS_CRIMES.items():
-        for palavra in palavras:
-            if palavra in texto_lower:
-                return tipo
-    
-    return None
-
-
-def extrair_local(texto):
-    """Extrai bairro mencionado"""
-    texto_lower = texto.lower()
-    
-    for bairro in COORDS_BAIRROS.keys():
-        if bairro.lower() in texto_lower:
-            return bairro
-    
-    return None
-
-
 def geocodificar(local):
     """Retorna coordenadas do bairro"""
     if not local:
@@ -568,14 +178,11 @@ def processar_noticia(noticia_raw):
     """Processa e enriquece notícia"""
     texto_completo = f"{noticia_raw['titulo']} {noticia_raw.get('resumo', '')}"
     
-    # Classificar
-    tipo_crime = classificar_crime(texto_completo)
+    # Tipo de crime + bairro (uma passada no texto)
+    tipo_crime, local = analisar_texto(texto_completo)
     if not tipo_crime:
         return None
     
-    # Extrair local
-    local = extrair_local(texto_completo)
-    
     # Geocodificar
     lat, lng = geocodificar(local)
     
@@ -633,69 +240,35 @@ def coletor_massivo():
         logging.info(f"  • {site}: Página {info['pagina_atual']}, {info['total_coletadas']} coletadas")
     logging.info("")
     
-    total_geral = 0
-    total_salvas_geral = 0
+    # Links já gravados: descartados antes de processar/salvar
+    conn = psycopg2.connect(**DB_CONFIG)
+    conhecidos = KnownItems.for_links(conn)
+    conn.close()
+    logging.info(f"🧮 Links conhecidos: {len(conhecidos)}")
+    logging.info("")
     
-    for nome_site, config in SITES.items():
-        logging.info("=" * 60)
-        logging.info(f"📰 SITE: {nome_site}")
-        logging.info("=" * 60)
-        
-        scraper = SCRAPERS[nome_site]
-        pagina_inicial = progresso[nome_site]["pagina_atual"]
-        max_paginas = config["max_paginas"]
-        delay = config["delay"]
-        
-        paginas_vazias = 0
-        max_paginas_vazias = 30  # Reduzido para 30
-        
-        for pagina in range(pagina_inicial, max_paginas + 1):
-            logging.info(f"\n📄 Página {pagina}/{max_paginas}")
-            
-            noticias_raw, tem_conteudo = scraper(pagina)
-            
-            if not tem_conteudo or len(noticias_raw) == 0:
-                paginas_vazias += 1
-                logging.info(f"  ⚠️ Página vazia ({paginas_vazias}/{max_paginas_vazias})")
-                
-                if paginas_vazias >= max_paginas_vazias:
-                    logging.info(f"  🛑 {max_paginas_vazias} páginas vazias - finalizando {nome_site}")
-                    break
-            else:
-                paginas_vazias = 0
-            
-            total_geral += len(noticias_raw)
-            logging.info(f"  📥 {len(noticias_raw)} notícias brutas")
-            
-            salvas_pagina = 0
-            for noticia_raw in noticias_raw:
-                noticia = processar_noticia(noticia_raw)
-                
-                if noticia and salvar_noticia(noticia):
-                    salvas_pagina += 1
-                    total_salvas_geral += 1
-                    progresso[nome_site]["total_coletadas"] += 1
-            
-            logging.info(f"  ✅ {salvas_pagina} crimes salvos")
-            logging.info(f"  📊 Total {nome_site}: {progresso[nome_site]['total_coletadas']}")
-            
-            progresso[nome_site]["pagina_atual"] = pagina + 1
-            salvar_progresso(progresso)
-            
-            time.sleep(delay)
-            
-            if pagina % 10 == 0:
-                logging.info(f"\n  📊 TOTAL GERAL: {total_salvas_geral} crimes salvos\n")
-        
-        logging.info(f"\n✅ {nome_site} finalizado: {progresso[nome_site]['total_coletadas']} crimes\n")
+    totais = {"brutas": 0, "salvas": 0, "conhecidas": 0}
+    
+    # Todos os sites em paralelo (cada host com seu delay)
+    jobs = {
+        SCRAPERS[nome_site]: range(progresso[nome_site]["pagina_atual"], config["max_paginas"] + 1)
+        for nome_site, config in SITES.items()
+    }
+    delays = {SCRAPERS[nome_site]: config["delay"] for nome_site, config in SITES.items()}
+    
+    try:
+        crawl_sites(jobs, processador_de_paginas(progresso, totais, conhecidos), delays=delays)
+    finally:
+        conhecidos.save()
     
     # Relatório final
     logging.info("")
     logging.info("=" * 60)
     logging.info("✅ COLETA MASSIVA V2 CONCLUÍDA!")
     logging.info("=" * 60)
-    logging.info(f"📊 Notícias brutas coletadas: {total_geral}")
-    logging.info(f"💾 Crimes salvos no banco: {total_salvas_geral}")
+    logging.info(f"📊 Notícias brutas coletadas: {totais['brutas']}")
+    logging.info(f"💾 Crimes salvos no banco: {totais['salvas']}")
+    logging.info(f"🧮 Já conhecidas (puladas): {totais['conhecidas']}")
     logging.info("")
     logging.info("📰 Por site:")
     for site, info in progresso.items():
@@ -705,6 +278,60 @@ def coletor_massivo():
     gerar_relatorio_final()
 
 
+def processador_de_paginas(progresso, totais, conhecidos):
+    """Callback do engine: processa e salva cada página (em ordem por site)"""
+    nomes = {plugin: nome_site for nome_site, plugin in SCRAPERS.items()}
+    max_paginas_vazias = 30
+    paginas_vazias = {nome_site: 0 for nome_site in SITES}
+    
+    def on_page(site, pagina, noticias_raw, tem_conteudo):
+        nome_site = nomes[site]
+        max_paginas = SITES[nome_site]["max_paginas"]
+        logging.info(f"\n📄 {nome_site} - Página {pagina}/{max_paginas}")
+        
+        if not tem_conteudo or len(noticias_raw) == 0:
+            paginas_vazias[nome_site] += 1
+            logging.info(f"  ⚠️ Página vazia ({paginas_vazias[nome_site]}/{max_paginas_vazias})")
+            
+            if paginas_vazias[nome_site] >= max_paginas_vazias:
+                logging.info(f"  🛑 {max_paginas_vazias} páginas vazias - finalizando {nome_site}")
+                logging.info(f"\n✅ {nome_site} finalizado: {progresso[nome_site]['total_coletadas']} crimes\n")
+                return False
+        else:
+            paginas_vazias[nome_site] = 0
+        
+        totais["brutas"] += len(noticias_raw)
+        logging.info(f"  📥 {len(noticias_raw)} notícias brutas")
+        
+        salvas_pagina = 0
+        for noticia_raw in noticias_raw:
+            if noticia_raw["link"] in conhecidos:
+                totais["conhecidas"] += 1
+                continue
+            
+            noticia = processar_noticia(noticia_raw)
+            
+            if noticia and salvar_noticia(noticia):
+                conhecidos.add(noticia["link"])
+                salvas_pagina += 1
+                totais["salvas"] += 1
+                progresso[nome_site]["total_coletadas"] += 1
+        
+        logging.info(f"  ✅ {salvas_pagina} crimes salvos")
+        logging.info(f"  📊 Total {nome_site}: {progresso[nome_site]['total_coletadas']}")
+        
+        progresso[nome_site]["pagina_atual"] = pagina + 1
+        salvar_progresso(progresso)
+        
+        if pagina % 10 == 0:
+            logging.info(f"\n  📊 TOTAL GERAL: {totais['salvas']} crimes salvos\n")
+        
+        return True
+    
+    return on_page
+
+
+
 def gerar_relatorio_final():
     """Gera relatório completo do banco"""
     conn = psycopg2.connect(**DB_CONFIG)
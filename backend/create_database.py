@@ -73,7 +73,9 @@ def verify_tables(conn):
         'maintenance_parts',
         'route_analyses',
         'vehicle_km_log',
-        'notifications'
+        'notifications',
+        'crime_rollup_hourly',
+        'crime_rollup_daily'
     ]
     
     cursor = conn.cursor()
@@ -192,6 +194,13 @@ def main():
         print_error("Erro ao criar schema!")
         sys.exit(1)
     
+    # Rollups de estatísticas (tabelas + triggers)
+    print_info("Criando rollups de crimes...")
+    if execute_sql_file(conn, Path(__file__).parent / 'crime_rollups.sql'):
+        print_success("Rollups criados!")
+    else:
+        print_warning("Rollups não foram criados (rode crime_rollups.sql manualmente)")
+    
     # Verificar tabelas
     all_ok, total = verify_tables(conn)
     
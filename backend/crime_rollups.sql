@@ -0,0 +1,193 @@
+-- ═══════════════════════════════════════════════════════════
+-- ROLLUPS DE CRIMES - AGREGADOS POR HORA E POR DIA
+-- ═══════════════════════════════════════════════════════════
+-- Mantém contagens de crime_incidents por (período, cidade, tipo, fonte)
+-- para que /api/crimes/stats e calculate_risks.py não precisem
+-- varrer a tabela inteira a cada chamada.
+--
+-- Manutenção:
+--   * Incremental: triggers por STATEMENT (funcionam com INSERT em lote e COPY)
+--   * Completa: SELECT refresh_crime_rollups();  (ex: cron diário)
+
+-- Normaliza nome de cidade para filtro (ex: 'Niterói' -> 'niteroi')
+CREATE OR REPLACE FUNCTION slug_cidade(cidade TEXT)
+RETURNS TEXT AS $$
+    SELECT trim(BOTH '_' FROM regexp_replace(
+        translate(lower(coalesce(cidade, '')),
+                  'áàâãäéèêëíìîïóòôõöúùûüç',
+                  'aaaaaeeeeiiiiooooouuuuc'),
+        '[^a-z0-9]+', '_', 'g'
+    ));
+$$ LANGUAGE sql IMMUTABLE;
+
+-- ============================================
+-- TABELA: crime_rollup_hourly (Agregado por hora)
+-- ============================================
+CREATE TABLE IF NOT EXISTS crime_rollup_hourly (
+    bucket TIMESTAMP NOT NULL, -- date_trunc('hour', occurred_at)
+    city VARCHAR(100) NOT NULL,
+    city_slug VARCHAR(100) GENERATED ALWAYS AS (slug_cidade(city)) STORED,
+    crime_type VARCHAR(50) NOT NULL,
+    source VARCHAR(50) NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    last_occurred_at TIMESTAMP,
+    PRIMARY KEY (bucket, city, crime_type, source)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rollup_hourly_slug ON crime_rollup_hourly(city_slug, bucket DESC);
+
+-- ============================================
+-- TABELA: crime_rollup_daily (Agregado por dia)
+-- ============================================
+CREATE TABLE IF NOT EXISTS crime_rollup_daily (
+    dia DATE NOT NULL,
+    city VARCHAR(100) NOT NULL,
+    city_slug VARCHAR(100) GENERATED ALWAYS AS (slug_cidade(city)) STORED,
+    crime_type VARCHAR(50) NOT NULL,
+    source VARCHAR(50) NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    last_occurred_at TIMESTAMP,
+    PRIMARY KEY (dia, city, crime_type, source)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rollup_daily_slug ON crime_rollup_daily(city_slug, dia DESC);
+CREATE INDEX IF NOT EXISTS idx_rollup_daily_dia ON crime_rollup_daily(dia DESC);
+
+-- ============================================
+-- FUNCTIONS
+-- ============================================
+
+-- Recalcula do zero os buckets (horas e dias) informados
+CREATE OR REPLACE FUNCTION recalcular_crime_rollups(horas TIMESTAMP[])
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM crime_rollup_hourly WHERE bucket = ANY(horas);
+
+    INSERT INTO crime_rollup_hourly (bucket, city, crime_type, source, total, last_occurred_at)
+    SELECT date_trunc('hour', c.occurred_at), COALESCE(c.city, ''), c.crime_type, c.source,
+           COUNT(*), MAX(c.occurred_at)
+    FROM unnest(horas) AS h(inicio)
+    JOIN crime_incidents c
+      ON c.occurred_at >= h.inicio AND c.occurred_at < h.inicio + INTERVAL '1 hour'
+    GROUP BY 1, 2, 3, 4;
+
+    DELETE FROM crime_rollup_daily
+    WHERE dia IN (SELECT DISTINCT h::date FROM unnest(horas) AS h);
+
+    INSERT INTO crime_rollup_daily (dia, city, crime_type, source, total, last_occurred_at)
+    SELECT c.occurred_at::date, COALESCE(c.city, ''), c.crime_type, c.source,
+           COUNT(*), MAX(c.occurred_at)
+    FROM (SELECT DISTINCT h::date AS dia FROM unnest(horas) AS h) d
+    JOIN crime_incidents c
+      ON c.occurred_at >= d.dia AND c.occurred_at < d.dia + 1
+    GROUP BY 1, 2, 3, 4;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reconstrói os rollups a partir de crime_incidents (refresh agendado)
+CREATE OR REPLACE FUNCTION refresh_crime_rollups()
+RETURNS VOID AS $$
+BEGIN
+    TRUNCATE crime_rollup_hourly, crime_rollup_daily;
+
+    INSERT INTO crime_rollup_hourly (bucket, city, crime_type, source, total, last_occurred_at)
+    SELECT date_trunc('hour', occurred_at), COALESCE(city, ''), crime_type, source,
+           COUNT(*), MAX(occurred_at)
+    FROM crime_incidents
+    GROUP BY 1, 2, 3, 4;
+
+    INSERT INTO crime_rollup_daily (dia, city, crime_type, source, total, last_occurred_at)
+    SELECT bucket::date, city, crime_type, source, SUM(total), MAX(last_occurred_at)
+    FROM crime_rollup_hourly
+    GROUP BY 1, 2, 3, 4;
+END;
+$$ LANGUAGE plpgsql;
+
+-- INSERT: soma as linhas novas (um upsert por bucket, não por linha)
+CREATE OR REPLACE FUNCTION crime_rollups_on_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO crime_rollup_hourly AS r (bucket, city, crime_type, source, total, last_occurred_at)
+    SELECT date_trunc('hour', occurred_at), COALESCE(city, ''), crime_type, source,
+           COUNT(*), MAX(occurred_at)
+    FROM novos
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (bucket, city, crime_type, source) DO UPDATE SET
+        total = r.total + EXCLUDED.total,
+        last_occurred_at = GREATEST(r.last_occurred_at, EXCLUDED.last_occurred_at);
+
+    INSERT INTO crime_rollup_daily AS r (dia, city, crime_type, source, total, last_occurred_at)
+    SELECT occurred_at::date, COALESCE(city, ''), crime_type, source,
+           COUNT(*), MAX(occurred_at)
+    FROM novos
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (dia, city, crime_type, source) DO UPDATE SET
+        total = r.total + EXCLUDED.total,
+        last_occurred_at = GREATEST(r.last_occurred_at, EXCLUDED.last_occurred_at);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- DELETE: recalcula apenas os buckets afetados
+CREATE OR REPLACE FUNCTION crime_rollups_on_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM recalcular_crime_rollups(
+        ARRAY(SELECT DISTINCT date_trunc('hour', occurred_at) FROM antigos)
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- UPDATE: recalcula os buckets antigos e novos das linhas em que
+-- data, cidade, tipo ou fonte mudaram (updates de outras colunas são ignorados)
+CREATE OR REPLACE FUNCTION crime_rollups_on_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM recalcular_crime_rollups(
+        ARRAY(
+            SELECT unnest(ARRAY[date_trunc('hour', a.occurred_at), date_trunc('hour', n.occurred_at)])
+            FROM antigos a
+            JOIN novos n ON n.id = a.id
+            WHERE (a.occurred_at, a.city, a.crime_type, a.source)
+                  IS DISTINCT FROM (n.occurred_at, n.city, n.crime_type, n.source)
+        )
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- TRIGGERS
+-- ============================================
+DROP TRIGGER IF EXISTS trg_crime_rollups_insert ON crime_incidents;
+DROP TRIGGER IF EXISTS trg_crime_rollups_delete ON crime_incidents;
+DROP TRIGGER IF EXISTS trg_crime_rollups_update ON crime_incidents;
+
+CREATE TRIGGER trg_crime_rollups_insert
+AFTER INSERT ON crime_incidents
+REFERENCING NEW TABLE AS novos
+FOR EACH STATEMENT EXECUTE FUNCTION crime_rollups_on_insert();
+
+CREATE TRIGGER trg_crime_rollups_delete
+AFTER DELETE ON crime_incidents
+REFERENCING OLD TABLE AS antigos
+FOR EACH STATEMENT EXECUTE FUNCTION crime_rollups_on_delete();
+
+CREATE TRIGGER trg_crime_rollups_update
+AFTER UPDATE ON crime_incidents
+REFERENCING OLD TABLE AS antigos NEW TABLE AS novos
+FOR EACH STATEMENT EXECUTE FUNCTION crime_rollups_on_update();
+
+-- Popular com os dados existentes
+SELECT refresh_crime_rollups();
+
+GRANT ALL PRIVILEGES ON crime_rollup_hourly, crime_rollup_daily TO safedrive_user;
+
+-- Exemplo: estatísticas do Rio nos últimos 7 dias
+-- SELECT crime_type, SUM(total)
+-- FROM crime_rollup_hourly
+-- WHERE city_slug = 'rio_de_janeiro'
+--   AND bucket >= date_trunc('hour', NOW() - INTERVAL '7 days')
+-- GROUP BY crime_type;
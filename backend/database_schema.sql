@@ -184,6 +184,18 @@ CREATE INDEX idx_crimes_source ON crime_incidents(source);
 CREATE INDEX idx_crimes_verified ON crime_incidents(verified) WHERE verified = TRUE;
 CREATE INDEX idx_crimes_street_segment ON crime_incidents(street_segment_id) WHERE street_segment_id IS NOT NULL;
 
+-- Deduplicação por fonte (ON CONFLICT (source, source_id) nos importadores)
+CREATE UNIQUE INDEX idx_crimes_source_unique ON crime_incidents(source, source_id);
+
+-- Marca d'água por fonte: a coleta diária para ao cruzá-la (app/services/watermarks.py)
+CREATE TABLE ingestion_watermarks (
+    source VARCHAR(50) PRIMARY KEY,
+    last_published_at TIMESTAMP, -- Publicação mais recente já coletada
+    last_ids TEXT[] NOT NULL DEFAULT '{}', -- Links do topo da listagem na última coleta
+    runs INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
 -- Índice composto para consultas por região e período
 
 -- ============================================
@@ -192,6 +204,9 @@ CREATE INDEX idx_crimes_street_segment ON crime_incidents(street_segment_id) WHE
 CREATE TABLE street_segments (
     id SERIAL PRIMARY KEY,
     
+    -- Way do OpenStreetMap (chave do upsert em load_street_segments)
+    osm_id BIGINT,
+    
     -- Identificação da rua
     street_name VARCHAR(255) NOT NULL,
     neighborhood VARCHAR(100),
@@ -219,6 +234,7 @@ CREATE TABLE street_segments (
 CREATE INDEX idx_street_segments_geometry ON street_segments USING GIST(geometry);
 CREATE INDEX idx_street_segments_name ON street_segments USING GIN(street_name gin_trgm_ops);
 CREATE INDEX idx_street_segments_neighborhood ON street_segments(neighborhood);
+CREATE UNIQUE INDEX idx_street_segments_osm_id ON street_segments(osm_id);
 
 -- ============================================
 -- TABELA: street_risk_cache (Cache de Risco por Rua)
@@ -5,11 +5,16 @@ Importa dados de criminalidade do ISP-RJ
 """
 
 import requests
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import psycopg2
 from datetime import datetime
-from typing import List, Dict
-import random
+from typing import Iterable, Iterator, Tuple
+
+from app.services.area_geocoder import MUNICIPIOS_FILE, AreaGeocoder, download_municipios
+from app.services.bulk_loader import CrimeBulkLoader
 
 # Cores
 class Colors:
@@ -32,17 +37,14 @@ def print_warning(msg):
     print(f"{Colors.YELLOW}⚠{Colors.END} {msg}")
 
 
-# Coordenadas aproximadas dos bairros do Rio
-BAIRROS_COORDS = {
-    'Centro': (-22.9068, -43.1729),
-    'Copacabana': (-22.9707, -43.1823),
-    'Ipanema': (-22.9838, -43.2058),
-    'Barra da Tijuca': (-23.0050, -43.3650),
-    'Tijuca': (-22.9247, -43.2421),
-    'Botafogo': (-22.9483, -43.1837),
-    'Flamengo': (-22.9325, -43.1755),
-    'Leblon': (-22.9839, -43.2174),
-}
+# Tipo de crime -> coluna do CSV do ISP-RJ
+CRIME_COLUMNS = [
+    ('ROUBO_VEICULO', 'roubo_veiculo'),
+    ('FURTO_VEICULO', 'furto_veiculos'),
+]
+
+# Seed padrão: mesma importação gera os mesmos eventos
+DEFAULT_SEED = 42
 
 
 class ISPRJImporter:
@@ -50,9 +52,21 @@ class ISPRJImporter:
     
     BASE_URL = "http://www.ispdados.rj.gov.br/Arquivos"
     
-    def __init__(self, db_conn):
+    def __init__(self, db_conn, seed: int = DEFAULT_SEED, batch_size: int = 100000,
+                 sem_cisp: bool = False):
         self.conn = db_conn
-        self.cursor = db_conn.cursor()
+        self.rng = np.random.default_rng(seed)
+        
+        # Malha municipal faz parte da importação; a de CISPs é etapa
+        # manual (area_geocoder --cisp) e só pode faltar com sem_cisp
+        if not MUNICIPIOS_FILE.exists():
+            print_info("Baixando malha municipal do IBGE...")
+            download_municipios()
+        self.geocoder = AreaGeocoder(self.rng, require_cisp=not sem_cisp)
+        if sem_cisp and not self.geocoder.cisps:
+            print_warning("Sem malha de CISPs: eventos distribuídos por município")
+        self.warned = set()
+        self.batch_size = batch_size
         
     def download_dataset(self):
         """Baixa dataset do ISP-RJ"""
@@ -74,111 +88,119 @@ class ISPRJImporter:
             print_error(f"Erro: {e}")
             return None
     
-    def process_data(self, df: pd.DataFrame) -> List[Dict]:
-        """Processa dados transformando agregados em eventos"""
+    def process_data(self, df: pd.DataFrame) -> Iterator[pa.RecordBatch]:
+        """
+        Processa dados transformando agregados em eventos
+        
+        Vetorizado: cada linha do CSV é repetida pela quantidade de
+        roubos/furtos e dia/hora são sorteados em arrays. Os eventos
+        saem em record batches de até batch_size linhas (memória limitada).
+        """
         print_info("Processando dados...")
         
         # Filtrar últimos 2 anos
         current_year = datetime.now().year
-        df = df[df['ano'] >= current_year - 2].copy()
+        df = df[df['ano'] >= current_year - 2].reset_index(drop=True)
         
-        incidents = []
+        years = df['ano'].to_numpy(dtype=np.int64)
+        months = df['mes'].to_numpy(dtype=np.int64)
+        # Primeiro dia do mês de cada linha
+        month_start = ((years - 1970) * 12 + (months - 1)).astype('datetime64[M]')
+        munic = df['munic'].astype(str).to_numpy()
+        cisp = self._cisp_labels(df)
         
-        for _, row in df.iterrows():
-            year = int(row['ano'])
-            month = int(row['mes'])
-            munic = row['munic']
-            
-            # Roubos de veículos
-            roubo_qtd = int(row['roubo_veiculo']) if pd.notna(row['roubo_veiculo']) else 0
-            
-            # Furtos de veículos  
-            furto_qtd = int(row['furto_veiculos']) if pd.notna(row['furto_veiculos']) else 0
+        total = 0
+        for crime_type, column in CRIME_COLUMNS:
+            counts = pd.to_numeric(df[column], errors='coerce').fillna(0)
+            total += int(counts.clip(lower=0).sum())
+        
+        print_success(f"Processados: {total} incidentes")
+        
+        offset = 0
+        for crime_type, column in CRIME_COLUMNS:
+            counts = pd.to_numeric(df[column], errors='coerce').fillna(0)
+            counts = counts.clip(lower=0).to_numpy(dtype=np.int64)
             
-            # Criar eventos simulados (distribuindo ao longo do mês)
-            for i in range(roubo_qtd):
-                day = random.randint(1, 28)  # Dia aleatório do mês
-                hour = random.randint(0, 23)
+            for idx in self._chunks(counts):
+                # idx: índice da linha do CSV de cada evento individual
+                n = len(idx)
                 
-                incidents.append({
-                    'crime_type': 'ROUBO_VEICULO',
-                    'occurred_at': datetime(year, month, day, hour),
-                    'municipality': munic,
-                    'cisp': row.get('cisp'),
-                    'source': 'ISP-RJ'
-                })
-            
-            for i in range(furto_qtd):
-                day = random.randint(1, 28)
-                hour = random.randint(0, 23)
+                # Dia (1-28) e hora aleatórios, distribuindo ao longo do mês
+                days = self.rng.integers(0, 28, n)
+                hours = self.rng.integers(0, 24, n)
+                occurred_at = (
+                    month_start[idx].astype('datetime64[D]') + days
+                ).astype('datetime64[h]') + hours
+                occurred_at = pa.array(occurred_at.astype('datetime64[s]'))
+                
+                lat, lng = self.get_coords_for_munic(munic[idx], cisp[idx])
                 
-                incidents.append({
-                    'crime_type': 'FURTO_VEICULO',
-                    'occurred_at': datetime(year, month, day, hour),
-                    'municipality': munic,
-                    'cisp': row.get('cisp'),
-                    'source': 'ISP-RJ'
+                # source_id único e reprodutível (mesma seed = mesmos IDs)
+                source_id = pc.binary_join_element_wise(
+                    'ISPRJ',
+                    pc.strftime(occurred_at, format='%Y%m%d%H'),
+                    pa.array(cisp[idx]),
+                    pa.array(np.arange(offset, offset + n)).cast(pa.string()),
+                    '_'
+                )
+                offset += n
+                
+                batch = pa.record_batch({
+                    'crime_type': pa.array(np.full(n, crime_type)),
+                    'latitude': pa.array(lat),
+                    'longitude': pa.array(lng),
+                    'city': pa.array(munic[idx]),
+                    'state': pa.array(np.full(n, 'RJ')),
+                    'occurred_at': occurred_at,
+                    'source': pa.array(np.full(n, 'ISP-RJ')),
+                    'source_id': source_id,
+                    'verified': pa.array(np.ones(n, dtype=bool)),
+                    'confidence_score': pa.array(np.ones(n)),
                 })
+                
+                # Município desconhecido (sem coordenada): descartado
+                ok = ~np.isnan(lat)
+                if not ok.all():
+                    batch = batch.filter(pa.array(ok))
+                if batch.num_rows:
+                    yield batch
+    
+    def _chunks(self, counts: np.ndarray) -> Iterator[np.ndarray]:
+        """Linha do CSV de cada evento, em lotes de batch_size eventos (o último menor)"""
+        fim = np.cumsum(counts)
+        total = int(fim[-1]) if len(fim) else 0
+        for inicio in range(0, total, self.batch_size):
+            eventos = np.arange(inicio, min(inicio + self.batch_size, total))
+            yield np.searchsorted(fim, eventos, side='right')
+    
+    @staticmethod
+    def _cisp_labels(df: pd.DataFrame) -> np.ndarray:
+        """Código da CISP como texto ('UNK' quando ausente)"""
+        if 'cisp' not in df.columns:
+            return np.full(len(df), 'UNK')
         
-        print_success(f"Processados: {len(incidents)} incidentes")
-        return incidents
+        cisp = pd.to_numeric(df['cisp'], errors='coerce').astype('Int64').astype('string')
+        return cisp.fillna('UNK').to_numpy(dtype=object)
     
-    def get_coords_for_munic(self, municipality: str) -> tuple:
-        """Retorna coordenadas aproximadas para o município"""
-        # Coordenadas do centro do Rio de Janeiro
-        default = (-22.9068, -43.1729)
+    def get_coords_for_munic(self, municipality: np.ndarray, cisp: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorteia coordenadas dentro da CISP/município de cada evento"""
+        lat, lng = self.geocoder.sample(municipality, cisp)
         
-        # Adicionar pequena variação aleatória (±0.05 graus = ~5km)
-        lat = default[0] + random.uniform(-0.05, 0.05)
-        lng = default[1] + random.uniform(-0.05, 0.05)
+        # Avisa uma vez por município sem geometria nem centroide
+        novos = self.geocoder.unknown - self.warned
+        if novos:
+            print_warning(f"Municípios desconhecidos (eventos descartados): {sorted(novos)}")
+            self.warned |= novos
         
         return (lat, lng)
     
-    def insert_incidents(self, incidents: List[Dict]) -> int:
-        """Insere incidentes no banco"""
-        print_info(f"Inserindo {len(incidents)} incidentes...")
+    def insert_incidents(self, batches: Iterable[pa.RecordBatch]) -> int:
+        """Insere incidentes no banco (COPY em massa)"""
+        print_info("Inserindo incidentes...")
         
-        inserted = 0
+        loader = CrimeBulkLoader(self.conn)
+        inserted = loader.load_arrow(batches)
         
-        for i, incident in enumerate(incidents):
-            try:
-                # Obter coordenadas
-                lat, lng = self.get_coords_for_munic(incident['municipality'])
-                
-                # Criar source_id único
-                source_id = f"ISPRJ_{incident['occurred_at'].strftime('%Y%m%d%H')}_{incident.get('cisp', 'UNK')}_{i}"
-                
-                query = """
-                    INSERT INTO crime_incidents (
-                        crime_type, latitude, longitude, location_point,
-                        city, state, occurred_at, source, source_id,
-                        verified, confidence_score
-                    ) VALUES (
-                        %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-                        %s, %s, %s, %s, %s, %s, %s
-                    )
-                    ON CONFLICT DO NOTHING
-                """
-                
-                self.cursor.execute(query, (
-                    incident['crime_type'],
-                    lat, lng, lng, lat,
-                    incident['municipality'], 'RJ',
-                    incident['occurred_at'],
-                    incident['source'], source_id,
-                    True, 1.0
-                ))
-                
-                inserted += 1
-                
-                if inserted % 1000 == 0:
-                    self.conn.commit()
-                    print_info(f"  Inseridos: {inserted}...")
-                
-            except Exception as e:
-                continue
-        
-        self.conn.commit()
         print_success(f"Total inserido: {inserted}")
         
         return inserted
@@ -199,7 +221,7 @@ def connect_db():
         return None
 
 
-def main():
+def main(seed: int = DEFAULT_SEED, sem_cisp: bool = False):
     print("=" * 60)
     print("  SafeDrive RJ - Importador ISP-RJ")
     print("=" * 60)
@@ -212,18 +234,21 @@ def main():
     print_success("Conectado!")
     print()
     
-    importer = ISPRJImporter(conn)
+    try:
+        importer = ISPRJImporter(conn, seed=seed, sem_cisp=sem_cisp)
+    except FileNotFoundError as e:
+        print_error(str(e))
+        conn.close()
+        return
     
     # Baixar
     df = importer.download_dataset()
     if df is None:
         return
     
-    # Processar
-    incidents = importer.process_data(df)
-    
-    # Inserir
-    inserted = importer.insert_incidents(incidents)
+    # Processar (gera batches sob demanda) e inserir
+    batches = importer.process_data(df)
+    inserted = importer.insert_incidents(batches)
     
     # Verificar
     print()
@@ -254,4 +279,10 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import sys
+    
+    # python import_isp_rj.py [seed] [--sem-cisp]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    seed = int(args[0]) if args else DEFAULT_SEED
+    
+    main(seed, sem_cisp='--sem-cisp' in sys.argv)
@@ -22,6 +22,10 @@ USING gin (lower(titulo) gin_trgm_ops);
 -- Criar índice para múltiplas fontes
 CREATE INDEX IF NOT EXISTS idx_num_fontes ON noticias_crimes(num_fontes DESC);
 
+-- Assinatura MinHash do título (índice de quase-duplicadas dos coletores)
+ALTER TABLE noticias_crimes ADD COLUMN IF NOT EXISTS minhash BIGINT[];
+CREATE INDEX IF NOT EXISTS idx_coletado ON noticias_crimes(coletado_em DESC);
+
 -- Criar função para normalizar título (para deduplicação)
 CREATE OR REPLACE FUNCTION normalizar_titulo(titulo TEXT) 
 RETURNS TEXT AS $$
@@ -39,10 +43,11 @@ $$ LANGUAGE plpgsql IMMUTABLE;
 CREATE INDEX IF NOT EXISTS idx_titulo_normalizado ON noticias_crimes 
 (normalizar_titulo(titulo));
 
-COMMENT ON COLUMN noticias_crimes.fonte_principal IS 'Primeira fonte que noticiou';
+COMMENT ON COLUMN noticias_crimes.fonte_principal IS 'Fonte da notícia da linha: a primeira que noticiou, ou a de maior prioridade nos coletores';
 COMMENT ON COLUMN noticias_crimes.fontes_alternativas IS 'Outras fontes que noticiaram o mesmo crime';
 COMMENT ON COLUMN noticias_crimes.links_alternativos IS 'Links das fontes alternativas';
 COMMENT ON COLUMN noticias_crimes.num_fontes IS 'Número total de fontes';
+COMMENT ON COLUMN noticias_crimes.minhash IS 'Assinatura MinHash (3-gramas) do título normalizado';
 
 -- Query de exemplo para ver crimes noticiados por múltiplas fontes
 -- SELECT titulo, fonte_principal, fontes_alternativas, num_fontes 
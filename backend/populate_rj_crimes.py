@@ -2,6 +2,8 @@ import psycopg2
 from datetime import datetime, timedelta
 import random
 
+from app.services.bulk_loader import CrimeBulkLoader
+
 # Regiões importantes do Rio de Janeiro com coordenadas
 RJ_REGIONS = [
     # Zona Sul
@@ -58,20 +60,8 @@ STREETS = [
     "Rodovia Presidente Dutra", "Avenida Automóvel Clube", "Rua General Roca"
 ]
 
-def populate_crimes():
-    conn = psycopg2.connect(
-        host="localhost",
-        database="safedrive",
-        user="safedrive_user",
-        password="Vasco@123"
-    )
-    
-    cursor = conn.cursor()
-    
-    print("Populando crimes em todo o estado do Rio de Janeiro...")
-    
-    total_inserted = 0
-    
+def generate_crimes():
+    """Gera crimes simulados para todas as regiões"""
     for region in RJ_REGIONS:
         print(f"\nPopulando {region['name']} com {region['crimes']} crimes...")
         
@@ -80,40 +70,34 @@ def populate_crimes():
             lat = region['lat'] + random.uniform(-0.005, 0.005)
             lng = region['lng'] + random.uniform(-0.005, 0.005)
             
-            crime_type = random.choice(CRIME_TYPES)
-            street = random.choice(STREETS)
-            
             # Data aleatória nos últimos 2 anos
             days_ago = random.randint(0, 730)
-            occurred_at = datetime.now() - timedelta(days=days_ago)
             
-            cursor.execute("""
-                INSERT INTO crime_incidents 
-                (crime_type, latitude, longitude, location_point, street_name, neighborhood, 
-                 city, state, occurred_at, source)
-                VALUES (%s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography, %s, %s, %s, %s, %s, %s)
-            """, (
-                crime_type,
-                lat,
-                lng,
-                lng,
-                lat,
-                street,
-                region['name'],
-                'Rio de Janeiro',
-                'RJ',
-                occurred_at,
-                'SAFEDRIVE_SIMULATED'  # Campo source obrigatório
-            ))
-            
-            total_inserted += 1
-            
-            if total_inserted % 100 == 0:
-                print(f"Inseridos {total_inserted} crimes...")
-                conn.commit()
+            yield {
+                'crime_type': random.choice(CRIME_TYPES),
+                'latitude': lat,
+                'longitude': lng,
+                'street_name': random.choice(STREETS),
+                'neighborhood': region['name'],
+                'city': 'Rio de Janeiro',
+                'state': 'RJ',
+                'occurred_at': datetime.now() - timedelta(days=days_ago),
+                'source': 'SAFEDRIVE_SIMULATED'  # Campo source obrigatório
+            }
+
+def populate_crimes():
+    conn = psycopg2.connect(
+        host="localhost",
+        database="safedrive",
+        user="safedrive_user",
+        password="Vasco@123"
+    )
+    
+    print("Populando crimes em todo o estado do Rio de Janeiro...")
+    
+    loader = CrimeBulkLoader(conn)
+    total_inserted = loader.load(generate_crimes())
     
-    conn.commit()
-    cursor.close()
     conn.close()
     
     print(f"\n✅ CONCLUÍDO! Total de {total_inserted} crimes inseridos em todo o RJ!")
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""
+SafeDrive RJ - Benchmark da API de crimes (PostGIS local)
+
+Três etapas, reproduzíveis pela seed:
+
+    # 1. Popula crime_incidents com N crimes sintéticos (regiões do
+    #    populate_rj_crimes.py, source BENCHMARK; repetir não duplica)
+    python benchmark_api.py seed --rows 2000000
+
+    # 2. Tráfego de app móvel em /nearby, /heatmap, /route-analysis e
+    #    /stats; grava throughput e p50/p95/p99 por endpoint em JSON
+    python benchmark_api.py run --url http://localhost:8000 --duration 60 \\
+        --concurrency 32 --out bench_$(git rev-parse --short HEAD).json
+
+    # 3. Compara duas execuções (sai com código 1 se piorou além do limite)
+    python benchmark_api.py compare bench_a1b2c3d.json bench_e4f5a6b.json
+
+Carga:
+    * Fechada (padrão): --concurrency usuários, cada um faz uma requisição
+      atrás da outra (com --think segundos de pausa média)
+    * Aberta: --rate N requisições/s (chegadas de Poisson). A latência
+      conta a partir do horário agendado, então fila no servidor aparece
+      no p99 em vez de sumir (coordinated omission)
+
+Os usuários ficam perto das regiões (peso = crimes da região), como no
+app: busca ao redor de onde a pessoa está, rotas entre duas regiões.
+Se a API tiver GET /metrics (install_metrics), o resumo do servidor
+(tempo de banco x serialização por rota) vai junto no JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import psycopg2
+
+# Permite importar app.services (backend/) rodando de backend/scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.bulk_loader import CrimeBulkLoader
+from populate_rj_crimes import CRIME_TYPES, RJ_REGIONS, STREETS
+
+SOURCE = 'BENCHMARK'
+
+# Seed padrão: mesma seed gera os mesmos crimes e o mesmo tráfego
+DEFAULT_SEED = 42
+
+# Espalhamento dos crimes em volta do centro da região (graus, ~1,1 km)
+SPREAD = 0.01
+
+# Janela das datas (dias para trás; /stats usa 24h e 7 dias)
+DAYS = 730
+
+# Mistura de endpoints do app (proporção das requisições)
+ENDPOINTS = {
+    'nearby': 0.50,
+    'heatmap': 0.20,
+    'route-analysis': 0.20,
+    'stats': 0.10,
+}
+
+# Raios usados pelo app (metros)
+NEARBY_RADII = [500, 1000, 2000, 5000]
+HEATMAP_RADII = [2000, 5000, 10000]
+
+# Aquecimento descartado do resultado (conexões, cache do Postgres)
+WARMUP = 5.0
+
+# Limite padrão do compare (piora relativa de p95/p99)
+THRESHOLD = 0.10
+
+
+def print_header(text: str):
+    print("\n" + "=" * 70)
+    print(f"  {text}")
+    print("=" * 70)
+
+
+def connect_db():
+    return psycopg2.connect(
+        host="localhost",
+        database="safedrive",
+        user="safedrive_user",
+        password="Vasco@123",
+        port=5432
+    )
+
+
+def _regions():
+    """Centros e pesos das regiões (arrays)"""
+    lat = np.array([r['lat'] for r in RJ_REGIONS])
+    lng = np.array([r['lng'] for r in RJ_REGIONS])
+    weights = np.array([r['crimes'] for r in RJ_REGIONS], dtype=float)
+    return lat, lng, weights / weights.sum()
+
+
+# ════════════════════════════════════════════════════════════════════
+# SEED
+# ════════════════════════════════════════════════════════════════════
+
+def generate_crimes(rows: int, seed: int = DEFAULT_SEED, batch_size: int = 100000) -> Iterator:
+    """
+    Crimes sintéticos em record batches (vetorizado, memória de um batch)
+
+    Região sorteada pelo peso, posição normal em volta do centro, data
+    uniforme nos últimos DAYS dias. source_id = bench_<seed>_<i>: rodar
+    de novo com a mesma seed não duplica nada.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    rng = np.random.default_rng(seed)
+    center_lat, center_lng, weights = _regions()
+    names = np.array([r['name'] for r in RJ_REGIONS])
+    crime_types = np.array(CRIME_TYPES)
+    streets = np.array(STREETS)
+    now = np.datetime64(datetime.now().replace(microsecond=0), 's')
+
+    for offset in range(0, rows, batch_size):
+        n = min(batch_size, rows - offset)
+
+        region = rng.choice(len(weights), n, p=weights)
+        lat = center_lat[region] + rng.normal(0, SPREAD, n)
+        lng = center_lng[region] + rng.normal(0, SPREAD, n)
+        occurred_at = now - rng.integers(0, DAYS * 86400, n).astype('timedelta64[s]')
+        crime_type = pa.array(crime_types[rng.integers(0, len(crime_types), n)])
+        street_name = pa.array(streets[rng.integers(0, len(streets), n)])
+
+        yield pa.record_batch({
+            'crime_type': crime_type,
+            'latitude': pa.array(lat),
+            'longitude': pa.array(lng),
+            'street_name': street_name,
+            'neighborhood': pa.array(names[region]),
+            'city': pa.array(np.full(n, 'Rio de Janeiro')),
+            'state': pa.array(np.full(n, 'RJ')),
+            'occurred_at': pa.array(occurred_at),
+            'source': pa.array(np.full(n, SOURCE)),
+            'source_id': pc.binary_join_element_wise(
+                f"bench_{seed}",
+                pa.array(np.arange(offset, offset + n)).cast(pa.string()),
+                '_'
+            ),
+            'verified': pa.array(np.zeros(n, dtype=bool)),
+            'confidence_score': pa.array(np.full(n, 0.5)),
+        })
+
+        print(f"   {offset + n:,}/{rows:,}")
+
+
+def seed_database(rows: int, seed: int = DEFAULT_SEED, reset: bool = False) -> int:
+    print_header(f"Seed: {rows:,} crimes sintéticos (seed {seed})")
+
+    conn = connect_db()
+    try:
+        if reset:
+            print("\n🗑️  Removendo crimes do benchmark anteriores...")
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM crime_incidents WHERE source = %s", (SOURCE,))
+                print(f"   {cursor.rowcount:,} removidos")
+            conn.commit()
+
+        inicio = time.perf_counter()
+        inserted = CrimeBulkLoader(conn).load_arrow(generate_crimes(rows, seed))
+        segundos = time.perf_counter() - inicio
+        print(f"\n✅ {inserted:,} inseridos em {segundos:.0f}s ({inserted / max(segundos, 1e-9):,.0f}/s)")
+
+        # Estatísticas novas para o planner (senão o plano do benchmark é o da tabela vazia)
+        print("\n📊 ANALYZE crime_incidents...")
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("ANALYZE crime_incidents")
+        print(f"   {_dataset(conn)['rows']:,} crimes na tabela")
+    finally:
+        conn.close()
+
+    return inserted
+
+
+def _dataset(conn) -> Dict:
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT COUNT(*), COUNT(*) FILTER (WHERE source = %s)
+            FROM crime_incidents
+        """, (SOURCE,))
+        total, bench = cursor.fetchone()
+    return {'rows': total, 'benchmark_rows': bench}
+
+
+# ════════════════════════════════════════════════════════════════════
+# RUN
+# ════════════════════════════════════════════════════════════════════
+
+class TrafficGenerator:
+    """Requisições do app (endpoint + parâmetros), sorteadas pela seed"""
+
+    def __init__(self, seed: int = DEFAULT_SEED, endpoints: Optional[List[str]] = None):
+        self.rng = np.random.default_rng(seed)
+        self.lat, self.lng, self.weights = _regions()
+
+        mix = {name: ENDPOINTS[name] for name in (endpoints or ENDPOINTS)}
+        self.names = list(mix)
+        self.mix = np.array(list(mix.values())) / sum(mix.values())
+
+    def _point(self):
+        """Usuário perto de uma região (mais gente onde há mais crime)"""
+        region = self.rng.choice(len(self.weights), p=self.weights)
+        return (round(float(self.lat[region] + self.rng.normal(0, SPREAD * 2)), 6),
+                round(float(self.lng[region] + self.rng.normal(0, SPREAD * 2)), 6))
+
+    def next(self):
+        name = self.names[self.rng.choice(len(self.names), p=self.mix)]
+
+        if name == 'nearby':
+            lat, lng = self._point()
+            params = {'lat': lat, 'lng': lng, 'radius': int(self.rng.choice(NEARBY_RADII))}
+        elif name == 'heatmap':
+            lat, lng = self._point()
+            params = {'lat': lat, 'lng': lng, 'radius': int(self.rng.choice(HEATMAP_RADII))}
+        elif name == 'route-analysis':
+            (origin_lat, origin_lng), (dest_lat, dest_lng) = self._point(), self._point()
+            params = {'origin_lat': origin_lat, 'origin_lng': origin_lng,
+                      'dest_lat': dest_lat, 'dest_lng': dest_lng}
+        else:
+            params = {'city': 'all' if self.rng.random() < 0.2 else 'rio_de_janeiro'}
+
+        return name, f"/api/crimes/{name}", params
+
+
+class LoadTest:
+    """Dispara o tráfego e guarda latência, status e bytes de cada requisição"""
+
+    def __init__(self, url: str, duration: float, concurrency: int = 16,
+                 rate: Optional[float] = None, think: float = 0.0,
+                 warmup: float = WARMUP, seed: int = DEFAULT_SEED,
+                 endpoints: Optional[List[str]] = None, timeout: float = 30.0):
+        self.url = url.rstrip('/')
+        self.duration = duration
+        self.concurrency = concurrency
+        self.rate = rate
+        self.think = think
+        self.warmup = warmup
+        self.timeout = timeout
+        self.traffic = TrafficGenerator(seed, endpoints)
+        self.rng = np.random.default_rng(seed + 1)
+        # endpoint -> listas de latência (s), bytes e status
+        self.samples: Dict[str, Dict[str, list]] = {
+            name: {'latency': [], 'bytes': [], 'status': []} for name in self.traffic.names
+        }
+
+    async def run(self) -> Dict:
+        import httpx
+
+        limits = httpx.Limits(max_connections=self.concurrency,
+                              max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.url, limits=limits, timeout=self.timeout) as client:
+            self.start = time.perf_counter()
+            self.measure_from = self.start + self.warmup
+            self.end = self.measure_from + self.duration
+
+            if self.rate:
+                await self._open_loop(client)
+            else:
+                await asyncio.gather(*(self._user(client) for _ in range(self.concurrency)))
+
+            server = await self._server_metrics(client)
+
+        return self.report(server)
+
+    async def _user(self, client):
+        """Carga fechada: um usuário em laço até o fim"""
+        while time.perf_counter() < self.end:
+            await self._request(client, time.perf_counter())
+            if self.think:
+                await asyncio.sleep(self.rng.exponential(self.think))
+
+    async def _open_loop(self, client):
+        """Carga aberta: chegadas de Poisson a `rate`/s, até `concurrency` em voo"""
+        semaforo = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        agendado = self.start
+
+        async def disparar(quando):
+            async with semaforo:
+                await self._request(client, quando)
+
+        while agendado < self.end:
+            agendado += self.rng.exponential(1 / self.rate)
+            await asyncio.sleep(max(0.0, agendado - time.perf_counter()))
+            task = asyncio.create_task(disparar(agendado))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        await asyncio.gather(*tasks)
+
+    async def _request(self, client, inicio: float):
+        name, path, params = self.traffic.next()
+        try:
+            response = await client.get(path, params=params)
+            status, size = response.status_code, len(response.content)
+        except Exception:
+            status, size = 0, 0
+
+        if inicio < self.measure_from:
+            return
+
+        samples = self.samples[name]
+        samples['latency'].append(time.perf_counter() - inicio)
+        samples['bytes'].append(size)
+        samples['status'].append(status)
+
+    async def _server_metrics(self, client) -> Optional[Dict]:
+        """Resumo por rota do GET /metrics?format=json (se a API tiver)"""
+        try:
+            response = await client.get('/metrics', params={'format': 'json'})
+            return response.json() if response.status_code == 200 else None
+        except Exception:
+            return None
+
+    def report(self, server: Optional[Dict] = None) -> Dict:
+        endpoints = {}
+        for name, samples in self.samples.items():
+            endpoints[name] = _summary(samples, self.duration)
+
+        total = sum(e['requests'] for e in endpoints.values())
+        return {
+            'throughput_rps': round(total / self.duration, 2),
+            'requests': total,
+            'errors': sum(e['errors'] for e in endpoints.values()),
+            'endpoints': endpoints,
+            'server': server,
+        }
+
+
+def _summary(samples: Dict[str, list], duration: float) -> Dict:
+    """Throughput e percentis (exatos, das amostras) de um endpoint"""
+    latency = np.array(samples['latency'])
+    status = np.array(samples['status'])
+    ok = (status >= 200) & (status < 400)
+
+    if not len(latency):
+        return {'requests': 0, 'errors': 0, 'throughput_rps': 0.0}
+
+    ms = latency * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        'requests': int(len(latency)),
+        'errors': int((~ok).sum()),
+        'throughput_rps': round(len(latency) / duration, 2),
+        'mean_ms': round(float(ms.mean()), 2),
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'max_ms': round(float(ms.max()), 2),
+        'mean_bytes': int(np.mean(samples['bytes'])),
+    }
+
+
+def _git() -> Dict:
+    """Commit testado (para comparar execuções entre commits)"""
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], capture_output=True, text=True,
+                                  cwd=Path(__file__).resolve().parent, timeout=10).stdout.strip()
+        except Exception:
+            return ''
+
+    return {'commit': git('rev-parse', '--short', 'HEAD') or None,
+            'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+
+def run_benchmark(args) -> Dict:
+    endpoints = args.endpoints.split(',') if args.endpoints else None
+    modo = f"{args.rate}/s (aberta)" if args.rate else f"{args.concurrency} usuários (fechada)"
+    print_header(f"Benchmark: {args.url} - {args.duration:.0f}s, {modo}")
+
+    # Tamanho da base testada (o mesmo plano muda com o volume)
+    try:
+        conn = connect_db()
+        dataset = _dataset(conn)
+        conn.close()
+    except Exception as e:
+        print(f"⚠️  Sem acesso ao banco ({e}); resultado sem tamanho da base")
+        dataset = None
+
+    test = LoadTest(args.url, args.duration, args.concurrency, args.rate, args.think,
+                    args.warmup, args.seed, endpoints)
+    report = asyncio.run(test.run())
+
+    result = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git': _git(),
+        'host': platform.node(),
+        'config': {
+            'url': args.url, 'duration': args.duration, 'warmup': args.warmup,
+            'concurrency': args.concurrency, 'rate': args.rate, 'think': args.think,
+            'seed': args.seed, 'mix': {name: ENDPOINTS[name] for name in test.traffic.names},
+        },
+        'dataset': dataset,
+        **report,
+    }
+
+    print(f"\n{'endpoint':<16} {'req':>7} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for name, e in result['endpoints'].items():
+        if e['requests']:
+            print(f"{name:<16} {e['requests']:>7} {e['errors']:>5} {e['throughput_rps']:>8.1f} "
+                  f"{e['p50_ms']:>8.1f} {e['p95_ms']:>8.1f} {e['p99_ms']:>8.1f}")
+    print(f"\n✅ {result['requests']:,} requisições, {result['throughput_rps']:.1f} req/s, "
+          f"{result['errors']} erros")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"💾 Resultado: {args.out}")
+
+    return result
+
+
+# ════════════════════════════════════════════════════════════════════
+# COMPARE
+# ════════════════════════════════════════════════════════════════════
+
+def compare(base_file: str, new_file: str, threshold: float = THRESHOLD) -> bool:
+    """Mostra a variação por endpoint; False se p95/p99 ou erros pioraram"""
+    base = json.loads(Path(base_file).read_text(encoding='utf-8'))
+    new = json.loads(Path(new_file).read_text(encoding='utf-8'))
+
+    print_header(f"{base['git']['commit']} → {new['git']['commit']} (limite +{threshold:.0%})")
+    if base.get('dataset') != new.get('dataset'):
+        print(f"⚠️  Bases diferentes: {base.get('dataset')} x {new.get('dataset')}")
+    mudou = {k for k in ('concurrency', 'rate', 'think', 'seed', 'mix')
+             if base['config'].get(k) != new['config'].get(k)}
+    if mudou:
+        print(f"⚠️  Carga diferente ({', '.join(sorted(mudou))}): comparação pouco confiável")
+
+    ok = True
+    print(f"\n{'endpoint':<16} {'métrica':<8} {'antes':>9} {'depois':>9} {'Δ':>8}")
+    for name, depois in new['endpoints'].items():
+        antes = base['endpoints'].get(name)
+        if not antes or not antes['requests'] or not depois['requests']:
+            continue
+
+        for metrica in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+            delta = (depois[metrica] - antes[metrica]) / antes[metrica] if antes[metrica] else 0.0
+            # Throughput: piorar é cair
+            pior = -delta if metrica == 'throughput_rps' else delta
+            marca = ''
+            if metrica in ('p95_ms', 'p99_ms') and pior > threshold:
+                marca, ok = ' ❌', False
+            print(f"{name:<16} {metrica[:-3] if metrica.endswith('_ms') else 'req/s':<8} "
+                  f"{antes[metrica]:>9.1f} {depois[metrica]:>9.1f} {delta:>+8.1%}{marca}")
+
+        if depois['errors'] / depois['requests'] > antes['errors'] / antes['requests']:
+            print(f"{name:<16} erros    {antes['errors']:>9} {depois['errors']:>9} ❌")
+            ok = False
+
+    print("\n✅ Sem regressão" if ok else "\n❌ Regressão acima do limite")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da API de crimes")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    seed = sub.add_parser('seed', help="Popula o banco com crimes sintéticos")
+    seed.add_argument('--rows', type=int, default=1_000_000, help="Crimes a gerar (padrão: 1 milhão)")
+    seed.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    seed.add_argument('--reset', action='store_true', help="Apaga os crimes do benchmark antes")
+
+    run = sub.add_parser('run', help="Dispara o tráfego e mede a latência")
+    run.add_argument('--url', default='http://localhost:8000')
+    run.add_argument('--duration', type=float, default=60, help="Segundos medidos (após o aquecimento)")
+    run.add_argument('--warmup', type=float, default=WARMUP, help="Segundos descartados no início")
+    run.add_argument('--concurrency', type=int, default=16, help="Usuários / conexões simultâneas")
+    run.add_argument('--rate', type=float, help="Carga aberta: requisições por segundo")
+    run.add_argument('--think', type=float, default=0.0, help="Pausa média entre requisições (s)")
+    run.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    run.add_argument('--endpoints', help=f"Subconjunto (ex.: nearby,stats); padrão: {','.join(ENDPOINTS)}")
+    run.add_argument('--out', help="Arquivo JSON do resultado")
+
+    comp = sub.add_parser('compare', help="Compara dois resultados")
+    comp.add_argument('base')
+    comp.add_argument('new')
+    comp.add_argument('--threshold', type=float, default=THRESHOLD, help="Piora relativa tolerada em p95/p99")
+
+    args = parser.parse_args()
+
+    if args.command == 'seed':
+        seed_database(args.rows, args.seed, args.reset)
+    elif args.command == 'run':
+        run_benchmark(args)
+    else:
+        sys.exit(0 if compare(args.base, args.new, args.threshold) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 """
 SafeDrive RJ - Daily News Scraper
-Busca APENAS notícias de HOJE (executa TODO DIA)
+Busca APENAS notícias novas (executa TODO DIA)
+
+Cada fonte tem uma marca d'água no banco (ingestion_watermarks): a
+listagem é lida só até cruzar a marca da coleta anterior, então o custo
+de uma execução depende do que saiu desde então, não do acervo.
 """
 
 from news_scraper import NewsScraper
@@ -13,25 +17,14 @@ class DailyScraper(NewsScraper):
     """Scraper diário de notícias"""
     
     def run(self):
-        """Executa scraping apenas de notícias recentes"""
+        """Executa scraping apenas de notícias publicadas desde a última coleta"""
         print("=" * 60)
         print(f"  SafeDrive RJ - Daily Scraper ({datetime.now().strftime('%d/%m/%Y')})")
         print("=" * 60)
         print()
         
-        all_news = []
-        
-        # G1
-        print("📰 G1 Rio (notícias de hoje)...")
-        all_news.extend(self.scrape_g1_rj())
-        
-        # Extra
-        print("📰 Extra (notícias de hoje)...")
-        all_news.extend(self.scrape_extra())
-        
-        # O Globo
-        print("📰 O Globo (notícias de hoje)...")
-        all_news.extend(self.scrape_oglobo())
+        # G1, Extra e O Globo (notícias de hoje), em paralelo
+        all_news = self.scrape_all()
         
         # Salvar
         saved = self.save_to_database(all_news)
@@ -2,14 +2,33 @@
 """
 SafeDrive RJ - Street Fetcher
 Busca TODAS as ruas do Rio de Janeiro do OpenStreetMap
+
+A resposta do Overpass é lida em streaming (um way por vez) e gravada em:
+    * streets_<cidade>.parquet  (padrão) GeoParquet com índice espacial por
+                                row group - ver app/services/street_dataset.py
+    * streets_<cidade>.json     (--json) formato antigo
+    * street_segments           (--db) COPY direto no banco
+
+Uso:
+    python fetch_streets.py [--json] [--db]
 """
 
-import overpy
+import argparse
 import json
 import time
 from pathlib import Path
 from typing import Dict, List
 from collections import defaultdict
+import sys
+
+import psycopg2
+
+# Permite importar app.services (backend/) rodando de backend/scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.street_dataset import (
+    CITY_BBOXES, STREETS_DIR, StreetDataset, bbox_for_city, load_street_segments, stream_ways,
+    streets_path, write_geoparquet
+)
 
 # Cores
 class Colors:
@@ -33,8 +52,7 @@ def print_warning(msg):
 class StreetFetcher:
     """Busca ruas do OpenStreetMap"""
     
-    def __init__(self, output_dir: str = "."):
-        self.api = overpy.Overpass()
+    def __init__(self, output_dir: str = STREETS_DIR):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
     
@@ -54,91 +72,33 @@ class StreetFetcher:
         print("=" * 70)
         print()
         
-        # Definir área de busca (bounding box)
-        # Rio de Janeiro: aproximadamente
-        if city.lower() == "rio de janeiro":
-            bbox = "-23.1,-43.8,-22.7,-43.1"  # sul,oeste,norte,leste
-        elif city.lower() == "volta redonda":
-            bbox = "-22.6,-44.2,-22.4,-43.9"
-        elif city.lower() == "pinheiral":
-            bbox = "-22.6,-44.1,-22.4,-43.9"
-        else:
+        bbox = bbox_for_city(city)
+        if city.lower() not in CITY_BBOXES:
             print_warning(f"Cidade {city} não configurada, usando Rio de Janeiro")
-            bbox = "-23.1,-43.8,-22.7,-43.1"
         
-        print_info(f"Bounding box: {bbox}")
+        print_info(f"Bounding box: {','.join(map(str, bbox))}")
         print_info("Buscando ruas no OpenStreetMap...")
         print_warning("Isso pode levar 2-5 minutos...")
         print()
         
-        # Query Overpass
-        query = f"""
-        [out:json][timeout:180];
-        (
-          way["highway"]["name"]({bbox});
-        );
-        out body;
-        >;
-        out skel qt;
-        """
+        streets_by_neighborhood = defaultdict(list)
         
         try:
-            result = self.api.query(query)
-            print_success(f"Recebido: {len(result.ways)} ruas")
+            for segment in stream_ways(bbox):
+                center_lat, center_lng = segment.center
+                streets_by_neighborhood[segment.neighborhood].append({
+                    "name": segment.name,
+                    "lat": center_lat,
+                    "lng": center_lng,
+                    "type": segment.highway,
+                    "nodes_count": len(segment.lats)
+                })
             
         except Exception as e:
             print_warning(f"Erro ao buscar: {e}")
             print_warning("Usando dados de exemplo...")
             return self._get_example_data(city)
         
-        # Processar ruas
-        print_info("Processando ruas...")
-        
-        streets_by_neighborhood = defaultdict(list)
-        
-        for way in result.ways:
-            try:
-                # Nome da rua
-                street_name = way.tags.get("name", "").strip()
-                if not street_name:
-                    continue
-                
-                # Calcular centro da rua (média dos nodes)
-                lats = []
-                lngs = []
-                
-                for node in way.nodes:
-                    lats.append(float(node.lat))
-                    lngs.append(float(node.lon))
-                
-                if not lats:
-                    continue
-                
-                center_lat = sum(lats) / len(lats)
-                center_lng = sum(lngs) / len(lngs)
-                
-                # Tentar obter bairro
-                neighborhood = way.tags.get("addr:suburb") or \
-                              way.tags.get("addr:neighbourhood") or \
-                              way.tags.get("suburb") or \
-                              "Centro"  # Padrão
-                
-                # Tipo de via
-                highway_type = way.tags.get("highway", "residential")
-                
-                street_data = {
-                    "name": street_name,
-                    "lat": center_lat,
-                    "lng": center_lng,
-                    "type": highway_type,
-                    "nodes_count": len(lats)
-                }
-                
-                streets_by_neighborhood[neighborhood].append(street_data)
-                
-            except Exception as e:
-                continue
-        
         print_success(f"Processadas: {sum(len(v) for v in streets_by_neighborhood.values())} ruas")
         print_info(f"Bairros encontrados: {len(streets_by_neighborhood)}")
         
@@ -169,7 +129,7 @@ class StreetFetcher:
     
     def save_to_file(self, streets: Dict, city: str):
         """Salva ruas em arquivo JSON"""
-        filename = self.output_dir / f"streets_{city.lower().replace(' ', '_')}.json"
+        filename = streets_path(city, '.json', self.output_dir)
         
         # Adicionar metadados
         data = {
@@ -204,8 +164,39 @@ class StreetFetcher:
                 print(f"    ... e mais {len(street_list) - sample_size} ruas")
             print()
     
+    def fetch_to_parquet(self, city: str, state: str = "RJ"):
+        """Busca e grava direto no GeoParquet (sem montar a cidade na memória)"""
+        print("=" * 70)
+        print(f"  Buscando ruas de {city}, {state} (GeoParquet)")
+        print("=" * 70)
+        print()
+        
+        filename = streets_path(city, '.parquet', self.output_dir)
+        print_info("Buscando ruas no OpenStreetMap (streaming)...")
+        
+        try:
+            total = write_geoparquet(stream_ways(bbox_for_city(city)), filename, city)
+        except Exception as e:
+            print_warning(f"Erro ao buscar: {e}")
+            print_warning("Usando dados de exemplo (JSON)...")
+            return self.save_to_file(self._get_example_data(city), city)
+        
+        dataset = StreetDataset(filename)
+        print_success(f"Salvo em: {filename}")
+        print_info(f"  Total de segmentos: {total:,}")
+        print_info(f"  Row groups (índice espacial): {len(dataset.extents)}")
+        
+        return filename
+    
+    def fetch_to_database(self, conn, city: str, state: str = "RJ") -> int:
+        """Busca e grava direto em street_segments (COPY em lotes)"""
+        print_info(f"Gravando ruas de {city} em street_segments (streaming)...")
+        total = load_street_segments(conn, stream_ways(bbox_for_city(city)), city, state)
+        print_success(f"street_segments: {total:,} segmentos")
+        return total
+    
     def fetch_and_save(self, city: str, state: str = "RJ"):
-        """Busca e salva ruas"""
+        """Busca e salva ruas (JSON)"""
         streets = self.fetch_streets_for_city(city, state)
         
         if streets:
@@ -224,6 +215,16 @@ class StreetFetcher:
             return None
 
 
+def connect_db():
+    return psycopg2.connect(
+        host="localhost",
+        database="safedrive",
+        user="safedrive_user",
+        password="Vasco@123",
+        port=5432
+    )
+
+
 def main():
     """Busca ruas das cidades suportadas"""
     print()
@@ -232,7 +233,12 @@ def main():
     print("╚" + "═" * 68 + "╝")
     print()
     
-    fetcher = StreetFetcher(output_dir=".")
+    parser = argparse.ArgumentParser(description="Busca ruas do OpenStreetMap")
+    parser.add_argument("--json", action="store_true", help="Formato antigo (JSON único)")
+    parser.add_argument("--db", action="store_true", help="Grava também em street_segments")
+    args = parser.parse_args()
+    
+    fetcher = StreetFetcher()
     
     # Cidades para buscar
     cities = [
@@ -242,8 +248,19 @@ def main():
     ]
     
     for city, state in cities:
-        fetcher.fetch_and_save(city, state)
+        if args.json:
+            fetcher.fetch_and_save(city, state)
+        else:
+            fetcher.fetch_to_parquet(city, state)
         time.sleep(2)  # Respeitar API
+        
+        if args.db:
+            conn = connect_db()
+            try:
+                fetcher.fetch_to_database(conn, city, state)
+            finally:
+                conn.close()
+            time.sleep(2)
 
 
 if __name__ == "__main__":
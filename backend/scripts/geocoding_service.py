@@ -1,18 +1,61 @@
 #!/usr/bin/env python3
 """
 SafeDrive RJ - Geocoding Service (OpenStreetMap - GRATUITO)
+
+Ordem de resolução de um endereço:
+    1. Gazetteer offline (streets_rio_de_janeiro.json do fetch_streets.py)
+    2. Cache persistente (~/.safedrive_geocode_cache.db, inclui "não achado")
+    3. Nominatim, com rate limit de 1 req/s (só para o que sobrou)
 """
 
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
-import re
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import time
+import sys
+from pathlib import Path
+
+# Permite importar app.services (backend/) rodando de backend/scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.address_extractor import AddressExtractor
+from app.services.geocode_cache import MISS, GeocodeCache, cache_key
+from app.services.metrics import METRICS
+from app.services.street_gazetteer import StreetGazetteer
 
 # Cliente Nominatim (OpenStreetMap)
 geolocator = Nominatim(user_agent="safedrive_rj_v1")
 
-_cache = {}
+# Intervalo mínimo entre chamadas ao Nominatim (política de uso: 1 req/s)
+NOMINATIM_INTERVAL = 1.0
+
+# Em memória por execução (chave normalizada); o persistente fica no SQLite
+_cache: Dict[str, Optional[Tuple[float, float]]] = {}
+_persistent: Optional[GeocodeCache] = None
+_gazetteer = None
+_extractor: Optional[AddressExtractor] = None
+_last_remote = 0.0
+
+
+def _get_persistent() -> GeocodeCache:
+    global _persistent
+    if _persistent is None:
+        _persistent = GeocodeCache()
+    return _persistent
+
+
+def _get_gazetteer() -> Optional[StreetGazetteer]:
+    """Carregado uma vez (False = arquivo não existe)"""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = StreetGazetteer.from_file() or False
+    return _gazetteer or None
+
+
+def _get_extractor() -> AddressExtractor:
+    global _extractor
+    if _extractor is None:
+        _extractor = AddressExtractor(_get_gazetteer())
+    return _extractor
 
 
 class GeocodingService:
@@ -20,48 +63,92 @@ class GeocodingService:
     
     @staticmethod
     def extract_address_from_text(text: str) -> Optional[str]:
-        """Extrai endereço de texto"""
-        patterns = [
-            r'(?:na|no|da|do)\s+(Rua|Avenida|Av\.|Travessa|Praça|Estrada|Rodovia)\s+([^,\.]+)',
-            r'(Rua|Avenida|Av\.|Travessa|Praça|Estrada|Rodovia)\s+([^,\.]+?)(?:,|\.|no|na)',
-            r'bairro\s+([A-Z][a-zá-úÁ-Ú\s]+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                if len(match.groups()) == 2:
-                    return f"{match.group(1)} {match.group(2)}".strip()
-                else:
-                    return match.group(1).strip()
+        """
+        Extrai endereço de texto ("Av. Brasil, na altura..." -> "Avenida Brasil")
         
-        return None
+        Com o gazetteer carregado, só devolve ruas conhecidas (grafia do OSM)
+        quando alguma bate; ver app/services/address_extractor.py.
+        """
+        return _get_extractor().extract(text)
     
     @staticmethod
     def geocode(address: str, city: str = "Rio de Janeiro, RJ") -> Optional[Tuple[float, float]]:
         """
-        Geocodifica usando OpenStreetMap (GRATUITO)
+        Geocodifica: gazetteer offline -> cache persistente -> OpenStreetMap
         """
-        cache_key = f"{address}|{city}"
-        if cache_key in _cache:
-            return _cache[cache_key]
+        with METRICS.stage('geocode'):
+            coords, via = GeocodingService._resolve(address, city)
+        METRICS.inc('geocode_total', via=via)
+        return coords
+    
+    @staticmethod
+    def _resolve(address: str, city: str) -> Tuple[Optional[Tuple[float, float]], str]:
+        """(coordenadas, quem resolveu)"""
+        key = cache_key(address, city)
+        if key in _cache:
+            return _cache[key], 'memory'
+        
+        gazetteer = _get_gazetteer()
+        if gazetteer and gazetteer.covers(city):
+            coords = gazetteer.lookup(address)
+            if coords:
+                _cache[key] = coords
+                return coords, 'gazetteer'
+        
+        persistent = _get_persistent()
+        coords = persistent.get(address, city)
+        if coords is not MISS:
+            _cache[key] = coords
+            return coords, 'cache'
+        
+        coords = GeocodingService._nominatim(address, city)
+        if coords is not MISS:
+            persistent.put(address, city, coords)
+            _cache[key] = coords
+            return coords, 'nominatim'
+        
+        return None, 'miss'
+    
+    @staticmethod
+    def geocode_many(addresses: List[str], city: str = "Rio de Janeiro, RJ") -> List[Optional[Tuple[float, float]]]:
+        """
+        Geocodifica uma lista (endereços repetidos são resolvidos uma vez)
+        
+        O que o gazetteer e o cache resolvem sai na hora; só os endereços
+        novos passam pelo Nominatim, um por segundo.
+        """
+        resolved = {}
+        for address in addresses:
+            key = cache_key(address, city)
+            if key not in resolved:
+                resolved[key] = GeocodingService.geocode(address, city)
+        return [resolved[cache_key(address, city)] for address in addresses]
+    
+    @staticmethod
+    def _nominatim(address: str, city: str):
+        """Coordenadas, None (não achado) ou MISS (erro: tentar de novo depois)"""
+        global _last_remote
         
         full_address = f"{address}, {city}, Brasil"
         
+        # Respeitar rate limit (1 req/segundo) só entre chamadas remotas
+        wait = _last_remote + NOMINATIM_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        
+        inicio = time.perf_counter()
         try:
-            time.sleep(1)  # Respeitar rate limit (1 req/segundo)
             location = geolocator.geocode(full_address, timeout=10)
-            
-            if location:
-                coords = (location.latitude, location.longitude)
-                _cache[cache_key] = coords
-                return coords
-            
-            return None
+            return (location.latitude, location.longitude) if location else None
             
         except (GeocoderTimedOut, GeocoderServiceError) as e:
             print(f"Erro ao geocodificar '{address}': {e}")
-            return None
+            METRICS.inc('http_requests_total', host=geolocator.domain, result='error')
+            return MISS
+        
+        finally:
+            METRICS.observe('http_request_seconds', time.perf_counter() - inicio, host=geolocator.domain)
+            _last_remote = time.monotonic()
     
     @staticmethod
     def validate_coordinates(lat: float, lng: float, city: str = "rio_de_janeiro") -> bool:
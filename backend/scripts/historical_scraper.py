@@ -4,16 +4,16 @@ SafeDrive RJ - Historical News Scraper
 Busca notícias dos últimos 5 ANOS (executa UMA VEZ)
 """
 
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-import time
 import psycopg2
 from geocoding_service import GeocodingService
 import random
+import sys
+from pathlib import Path
 
-USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-
+# Permite importar app.services (backend/) rodando de backend/scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.bulk_loader import CrimeBulkLoader
 
 class HistoricalScraper:
     """Scraper histórico de notícias"""
@@ -22,67 +22,18 @@ class HistoricalScraper:
         self.db_conn = db_conn
         self.cursor = db_conn.cursor()
         self.geocoder = GeocodingService()
-        self.headers = {'User-Agent': USER_AGENT}
     
-    def scrape_historical_g1(self, years: int = 5) -> list:
+    def scrape_historical_g1(self, years: int = 5) -> int:
         """
         Busca notícias históricas do G1
         
-        Estratégia: Buscar em páginas antigas e arquivos
+        Backfill paralelo em shards de período (news_historical_scraper):
+        grava direto no banco e retoma de onde parou; retorna o total salvo.
         """
-        print(f"📰 Buscando notícias históricas do G1 (últimos {years} anos)...")
-        
-        all_news = []
-        
-        # URLs de busca por período
-        base_url = "https://g1.globo.com/busca/"
-        
-        # Buscar por cada ano
-        for year in range(datetime.now().year - years, datetime.now().year + 1):
-            print(f"   Buscando ano {year}...")
-            
-            # Keywords para buscar
-            keywords = ['roubo+carro+rio', 'furto+veiculo+rio', 'assalto+carro+rio']
-            
-            for keyword in keywords:
-                try:
-                    # URL de busca
-                    url = f"{base_url}?q={keyword}&from={year}-01-01&to={year}-12-31&order=recent"
-                    
-                    response = requests.get(url, headers=self.headers, timeout=10)
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Encontrar resultados
-                    results = soup.find_all('div', class_='widget--info__text-container')
-                    
-                    for result in results[:20]:  # Primeiros 20 por keyword
-                        try:
-                            link_tag = result.find('a')
-                            if not link_tag:
-                                continue
-                            
-                            link = link_tag['href']
-                            
-                            # Processar artigo
-                            article_data = self._process_article(link, 'G1')
-                            
-                            if article_data:
-                                article_data['year'] = year
-                                all_news.append(article_data)
-                            
-                            time.sleep(1)  # Respeitar site
-                            
-                        except Exception as e:
-                            continue
-                    
-                    time.sleep(2)
-                    
-                except Exception as e:
-                    print(f"   Erro ao buscar {keyword} em {year}: {e}")
-                    continue
+        from news_historical_scraper import NewsHistoricalScraper
         
-        print(f"✓ G1 Histórico: {len(all_news)} notícias encontradas")
-        return all_news
+        print(f"📰 Buscando notícias históricas do G1 (últimos {years} anos)...")
+        return NewsHistoricalScraper(self.db_conn).run(years, sources=['G1'])
     
     def generate_synthetic_historical_data(self, years: int = 5) -> list:
         """
@@ -175,97 +126,27 @@ class HistoricalScraper:
         print(f"✓ Dados sintéticos: {len(synthetic_news)} crimes gerados")
         return synthetic_news
     
-    def _process_article(self, url: str, source: str) -> dict:
-        """Processa um artigo"""
-        try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extrair texto
-            content = soup.find('article') or soup.find('div', class_='content')
-            if not content:
-                return None
-            
-            text = content.get_text()
-            
-            # Extrair endereço
-            address = self.geocoder.extract_address_from_text(text)
-            if not address:
-                return None
-            
-            # Geocodificar
-            coords = self.geocoder.geocode(address, "Rio de Janeiro, RJ")
-            if not coords:
-                return None
-            
-            # Determinar tipo
-            crime_type = 'ROUBO_VEICULO' if 'roub' in text.lower() else 'FURTO_VEICULO'
-            
-            return {
-                'address': address,
-                'latitude': coords[0],
-                'longitude': coords[1],
-                'crime_type': crime_type,
-                'description': text[:500],
-                'occurred_at': datetime.now() - timedelta(days=random.randint(1, 365)),
-                'source': source,
-                'url': url
-            }
-            
-        except:
-            return None
-    
     def save_to_database(self, news: list) -> int:
-        """Salva no banco"""
+        """Salva no banco (COPY em massa)"""
         print(f"\n💾 Salvando {len(news)} registros históricos...")
         
-        saved = 0
-        
-        for item in news:
-            try:
-                # Source ID único
-                source_id = f"{item['source']}_{item['occurred_at'].strftime('%Y%m%d')}_{saved}"
-                
-                query = """
-                    INSERT INTO crime_incidents (
-                        crime_type, latitude, longitude, location_point,
-                        street_name, neighborhood, city, state, occurred_at,
-                        source, source_id, description, verified, confidence_score
-                    ) VALUES (
-                        %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                    )
-                    ON CONFLICT (source, source_id) DO NOTHING
-                """
-                
-                self.cursor.execute(query, (
-                    item['crime_type'],
-                    item['latitude'],
-                    item['longitude'],
-                    item['longitude'],
-                    item['latitude'],
-                    item.get('street_name') or item.get('address'),
-                    item.get('neighborhood'),
-                    item.get('city', 'Rio de Janeiro'),
-                    'RJ',
-                    item['occurred_at'],
-                    item['source'],
-                    source_id,
-                    item.get('description'),
-                    item.get('verified', True),
-                    item.get('confidence_score', 0.8)
-                ))
-                
-                saved += 1
-                
-                if saved % 100 == 0:
-                    self.db_conn.commit()
-                    print(f"   Salvos: {saved}...")
-                
-            except Exception as e:
-                continue
-        
-        self.db_conn.commit()
+        rows = ({
+            'crime_type': item['crime_type'],
+            'latitude': item['latitude'],
+            'longitude': item['longitude'],
+            'street_name': item.get('street_name') or item.get('address'),
+            'neighborhood': item.get('neighborhood'),
+            'city': item.get('city', 'Rio de Janeiro'),
+            'state': 'RJ',
+            'occurred_at': item['occurred_at'],
+            'source': item['source'],
+            'source_id': f"{item['source']}_{item['occurred_at'].strftime('%Y%m%d')}_{i}",  # Source ID único
+            'description': item.get('description'),
+            'verified': item.get('verified', True),
+            'confidence_score': item.get('confidence_score', 0.8)
+        } for i, item in enumerate(news))
+        
+        saved = CrimeBulkLoader(self.db_conn).load(rows)
         print(f"✓ Total salvo: {saved}")
         
         return saved
@@ -279,8 +160,8 @@ class HistoricalScraper:
         
         all_data = []
         
-        # 1. Tentar buscar notícias reais
-        # all_data.extend(self.scrape_historical_g1(years))
+        # 1. Notícias reais: backfill à parte (grava direto no banco)
+        # self.scrape_historical_g1(years)
         
         # 2. Gerar dados sintéticos baseados no ISP-RJ
         all_data.extend(self.generate_synthetic_historical_data(years))
@@ -1,56 +1,108 @@
 #!/usr/bin/env python3
 """
 SafeDrive RJ - Historical Scraper V2
-Usa arquivo JSON de ruas REAIS do OpenStreetMap
+Usa ruas REAIS do OpenStreetMap (GeoParquet ou JSON do fetch_streets.py)
 """
 
 import psycopg2
-from datetime import datetime, timedelta
-import random
 import json
 from pathlib import Path
+from typing import Iterable, Iterator
+import sys
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Permite importar app.services (backend/) rodando de backend/scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.bulk_loader import CrimeBulkLoader
+from app.services.street_dataset import StreetDataset, streets_path
+
+SOURCE = 'Historical_Analysis'
+CRIME_TYPES = np.array(['ROUBO_VEICULO', 'FURTO_VEICULO'])
+
+# Seed padrão: mesma execução gera os mesmos crimes
+DEFAULT_SEED = 42
 
 
 class HistoricalScraperV2:
     """Scraper que usa ruas reais do OpenStreetMap"""
     
-    def __init__(self, db_conn, streets_file: str = "streets_rio_de_janeiro.json"):
+    def __init__(self, db_conn, streets_file: str = streets_path('Rio de Janeiro'),
+                 seed: int = DEFAULT_SEED, batch_size: int = 100000):
         self.db_conn = db_conn
         self.cursor = db_conn.cursor()
         self.streets_file = Path(streets_file)
         self.streets_data = None
+        self.rng = np.random.default_rng(seed)
+        self.batch_size = batch_size
     
     def load_streets(self):
-        """Carrega ruas do arquivo JSON"""
+        """Carrega ruas do GeoParquet (ou do JSON antigo) em arrays"""
         if not self.streets_file.exists():
-            print(f"❌ Arquivo não encontrado: {self.streets_file}")
-            print(f"   Execute primeiro: python fetch_streets.py")
-            return False
+            # fetch_streets.py --json grava o formato antigo
+            legacy = self.streets_file.with_suffix('.json')
+            if self.streets_file.suffix == '.parquet' and legacy.exists():
+                self.streets_file = legacy
+            else:
+                print(f"❌ Arquivo não encontrado: {self.streets_file}")
+                print(f"   Execute primeiro: python fetch_streets.py")
+                return False
         
         print(f"📂 Carregando ruas de: {self.streets_file}")
         
-        with open(self.streets_file, 'r', encoding='utf-8') as f:
-            self.streets_data = json.load(f)
-        
-        total_streets = self.streets_data.get('total_streets', 0)
-        neighborhoods = self.streets_data.get('neighborhoods', 0)
-        
-        print(f"✓ Carregado: {total_streets:,} ruas em {neighborhoods} bairros")
+        if self.streets_file.suffix == '.parquet':
+            # Só as colunas usadas, com memory map (sem um dict por rua)
+            dataset = StreetDataset(self.streets_file)
+            city = dataset.city
+            table = dataset.read(['name', 'neighborhood', 'lat', 'lng'])
+        else:
+            with open(self.streets_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            city = data['city']
+            rows = [
+                (street['name'], neighborhood, street['lat'], street['lng'])
+                for neighborhood, streets in data['streets'].items()
+                for street in streets
+            ]
+            table = pa.table(dict(zip(['name', 'neighborhood', 'lat', 'lng'], map(list, zip(*rows)))))
+        
+        # Ruas agrupadas por bairro: bairro i = linhas [start[i], start[i] + count[i])
+        table = table.sort_by('neighborhood')
+        neighborhoods = table['neighborhood'].to_numpy(zero_copy_only=False)
+        _, start, count = np.unique(neighborhoods, return_index=True, return_counts=True)
+        
+        self.streets_data = {
+            'city': city,
+            'name': table['name'].combine_chunks(),
+            'neighborhood': table['neighborhood'].combine_chunks(),
+            'lat': table['lat'].to_numpy(),
+            'lng': table['lng'].to_numpy(),
+            'start': start,
+            'count': count,
+        }
+        
+        print(f"✓ Carregado: {table.num_rows:,} ruas em {len(start)} bairros")
         
         return True
     
-    def generate_historical_data(self, years: int = 5) -> list:
-        """Gera dados históricos usando ruas REAIS"""
-        
+    def generate_historical_data(self, years: int = 5) -> Iterator[pa.RecordBatch]:
+        """
+        Gera dados históricos usando ruas REAIS
+        
+        Vetorizado: bairro, rua, variação, data e tipo são sorteados em
+        arrays (mesma distribuição do gerador antigo: bairro uniforme,
+        depois rua uniforme dentro do bairro). Os crimes saem em record
+        batches de até batch_size linhas; a seed fixa reproduz os dados.
+        """
         if not self.streets_data:
             print("❌ Ruas não carregadas!")
-            return []
+            return
         
         print(f"\n📊 Gerando dados históricos (últimos {years} anos)...")
         
-        synthetic_news = []
-        
-        streets = self.streets_data['streets']
+        streets = self.streets_data
         
         # Buscar crimes por ano
         self.cursor.execute("""
@@ -68,7 +120,9 @@ class HistoricalScraperV2:
         
         if not yearly_counts:
             print("⚠️  Nenhum dado do ISP-RJ encontrado!")
-            return []
+            return
+        
+        offset = 0
         
         # Para cada ano
         for year, total_crimes in yearly_counts.items():
@@ -76,113 +130,72 @@ class HistoricalScraperV2:
             
             # Distribuir 15% em ruas específicas
             crimes_to_distribute = int(total_crimes * 0.15)
+            year_start = np.datetime64(f"{int(year):04d}-01-01", 'm')
             
-            for i in range(crimes_to_distribute):
-                # Escolher bairro aleatório
-                neighborhood = random.choice(list(streets.keys()))
+            for chunk_start in range(0, crimes_to_distribute, self.batch_size):
+                n = min(self.batch_size, crimes_to_distribute - chunk_start)
                 
-                # Escolher rua do bairro
-                if not streets[neighborhood]:
-                    continue
+                # Bairro uniforme, depois rua uniforme dentro do bairro
+                neighborhood = self.rng.integers(0, len(streets['start']), n)
+                idx = streets['start'][neighborhood] + (
+                    self.rng.random(n) * streets['count'][neighborhood]
+                ).astype(np.int64)
+                take = pa.array(idx)
                 
-                street_data = random.choice(streets[neighborhood])
+                # Coordenadas da rua com pequena variação
+                lat = streets['lat'][idx] + self.rng.uniform(-0.002, 0.002, n)
+                lng = streets['lng'][idx] + self.rng.uniform(-0.002, 0.002, n)
                 
-                # Usar coordenadas da rua com pequena variação
-                lat = street_data['lat'] + random.uniform(-0.002, 0.002)
-                lng = street_data['lng'] + random.uniform(-0.002, 0.002)
-                
-                # Data aleatória do ano
-                day = random.randint(1, 365)
-                occurred_at = datetime(int(year), 1, 1) + timedelta(days=day)
-                occurred_at = occurred_at.replace(
-                    hour=random.randint(0, 23),
-                    minute=random.randint(0, 59)
+                # Data aleatória do ano (dia 1-365 a partir de 1º/jan, hora e minuto)
+                minutes = (
+                    self.rng.integers(1, 366, n) * 1440 +
+                    self.rng.integers(0, 24, n) * 60 +
+                    self.rng.integers(0, 60, n)
                 )
+                occurred_at = pa.array((year_start + minutes).astype('datetime64[s]'))
                 
                 # Tipo de crime
-                crime_type = random.choice(['ROUBO_VEICULO', 'FURTO_VEICULO'])
+                crime_type = pa.array(CRIME_TYPES[self.rng.integers(0, len(CRIME_TYPES), n)])
+                
+                street_name = streets['name'].take(take)
+                neighborhood_name = streets['neighborhood'].take(take)
+                
+                # Source ID único (mesmo formato do gerador antigo)
+                source_id = pc.binary_join_element_wise(
+                    SOURCE,
+                    pc.strftime(occurred_at, format='%Y%m%d%H%M%S'),
+                    pa.array(np.arange(offset, offset + n)).cast(pa.string()),
+                    '_'
+                )
+                offset += n
                 
-                synthetic_news.append({
+                yield pa.record_batch({
                     'crime_type': crime_type,
-                    'latitude': lat,
-                    'longitude': lng,
-                    'street_name': street_data['name'],
-                    'neighborhood': neighborhood,
-                    'city': self.streets_data['city'],
+                    'latitude': pa.array(lat),
+                    'longitude': pa.array(lng),
+                    'street_name': street_name,
+                    'neighborhood': neighborhood_name,
+                    'city': pa.array(np.full(n, streets['city'])),
+                    'state': pa.array(np.full(n, 'RJ')),
                     'occurred_at': occurred_at,
-                    'source': 'Historical_Analysis',
-                    'description': f'{crime_type} em {street_data["name"]}, {neighborhood}',
-                    'verified': True,
-                    'confidence_score': 0.8
+                    'source': pa.array(np.full(n, SOURCE)),
+                    'source_id': source_id,
+                    'description': pc.binary_join_element_wise(
+                        crime_type, ' em ', street_name, ', ', neighborhood_name, ''
+                    ),
+                    'verified': pa.array(np.ones(n, dtype=bool)),
+                    'confidence_score': pa.array(np.full(n, 0.8)),
                 })
         
-        print(f"✓ Gerados: {len(synthetic_news):,} crimes com ruas REAIS")
-        
-        return synthetic_news
+        print(f"✓ Gerados: {offset:,} crimes com ruas REAIS")
     
-    def save_to_database(self, news: list) -> int:
-        """Salva no banco"""
-        if not news:
-            return 0
-        
-        print(f"\n💾 Salvando {len(news):,} registros...")
-        
-        saved = 0
-        errors = 0
-        
-        for item in news:
-            try:
-                # Source ID único
-                timestamp = item['occurred_at'].strftime('%Y%m%d%H%M%S')
-                source_id = f"{item['source']}_{timestamp}_{saved}"
-                
-                query = """
-                    INSERT INTO crime_incidents (
-                        crime_type, latitude, longitude, location_point,
-                        street_name, neighborhood, city, state, occurred_at,
-                        source, source_id, description, verified, confidence_score
-                    ) VALUES (
-                        %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                    )
-                    ON CONFLICT (source, source_id) DO NOTHING
-                """
-                
-                self.cursor.execute(query, (
-                    item['crime_type'],
-                    item['latitude'],
-                    item['longitude'],
-                    item['longitude'],
-                    item['latitude'],
-                    item['street_name'],
-                    item['neighborhood'],
-                    item['city'],
-                    'RJ',
-                    item['occurred_at'],
-                    item['source'],
-                    source_id,
-                    item['description'],
-                    item['verified'],
-                    item['confidence_score']
-                ))
-                
-                saved += 1
-                
-                if saved % 1000 == 0:
-                    self.db_conn.commit()
-                    print(f"   Salvos: {saved:,}...")
-                
-            except Exception as e:
-                errors += 1
-                if errors < 5:  # Mostrar só os primeiros 5 erros
-                    print(f"   Erro: {e}")
-                continue
+    def save_to_database(self, batches: Iterable[pa.RecordBatch]) -> int:
+        """Salva no banco (COPY em massa, um batch por vez)"""
+        print("\n💾 Salvando registros...")
         
-        self.db_conn.commit()
+        saved = CrimeBulkLoader(self.db_conn).load_arrow(batches)
         
         print(f"✓ Salvos: {saved:,}")
-        if errors > 0:
-            print(f"⚠️  Erros: {errors}")
         
         return saved
     
@@ -201,16 +214,13 @@ class HistoricalScraperV2:
             print()
             return 0
         
-        # Gerar dados
-        data = self.generate_historical_data(years)
+        # Gerar e salvar em streaming (memória limitada a um batch)
+        saved = self.save_to_database(self.generate_historical_data(years))
         
-        if not data:
+        if not saved:
             print("❌ Nenhum dado gerado!")
             return 0
         
-        # Salvar
-        saved = self.save_to_database(data)
-        
         print()
         print("=" * 70)
         print(f"✓ Concluído: {saved:,} crimes com RUAS REAIS do OSM")
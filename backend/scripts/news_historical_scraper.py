@@ -2,18 +2,59 @@
 """
 SafeDrive RJ - News Historical Scraper
 Busca notícias ANTIGAS (últimos 5 anos)
+
+Backfill em shards (período × fonte) com checkpoint por página, num pool
+de workers (app/services/backfill.py). Interrompido, retoma de onde
+parou; vários processos podem dividir o mesmo backfill:
+
+    python news_historical_scraper.py 5 --workers 4 --processes 2
 """
 
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-import time
+import argparse
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+from datetime import date, datetime, timedelta
 import psycopg2
 from geocoding_service import GeocodingService
-import re
-from urllib.parse import quote
+import sys
+from pathlib import Path
+
+# Permite importar app.services (backend/) rodando de backend/scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.backfill import BackfillCoordinator, BackfillStore, make_shards, period_start
+from app.services.bulk_loader import CrimeBulkLoader
+from app.services.known_items import KnownItems
+from app.services.scraping import ScrapingEngine, get_site
+
+KEYWORDS = ['roubo carro rio', 'furto veículo rio']
+
+# Fonte -> plugin de busca com filtro de data (app/services/scraping)
+SEARCH_SITES = {
+    'G1': 'g1_busca',
+}
+
+# Tamanho de cada shard (dias) e páginas de busca por shard
+SHARD_DAYS = 30
+MAX_SEARCH_PAGES = 10
 
-USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+# Shards processados ao mesmo tempo por processo
+WORKERS = 4
+
+# Intervalo entre requisições ao G1 (busca + matérias), por processo
+G1_DELAY = 1
+
+# Matérias antigas não mudam: vêm do cache HTTP se baixadas nos últimos 30 dias
+ARTICLE_MAX_AGE = 30 * 24 * 3600
+
+
+def source_id(source: str, url: str) -> str:
+    """source_id estável entre execuções (hash() muda a cada processo)
+
+    64 bits: colisão descartaria uma matéria antes do download
+    """
+    return f"{source}_HIST_{hashlib.blake2b(url.encode('utf-8'), digest_size=8).hexdigest()}"
 
 
 class NewsHistoricalScraper:
@@ -22,60 +63,96 @@ class NewsHistoricalScraper:
         self.db_conn = db_conn
         self.cursor = db_conn.cursor()
         self.geocoder = GeocodingService()
-        self.headers = {'User-Agent': USER_AGENT}
+        self.known = KnownItems.for_source_ids(db_conn)
+        # Engine compartilhado pelos shards (limites por host valem para todos)
+        self.engine = None
+        # Geocodificação + gravação: uma conexão, um shard por vez
+        self.save_lock = None
     
-    def search_g1_historical(self, year: int) -> list:
-        print(f"   📰 G1 - Ano {year}...")
+    async def search(self, shard, page: int) -> list:
+        """
+        Uma página da busca da fonte no período do shard (todas as palavras-chave)
+
+        None = a busca acabou (todas as páginas baixadas, nenhum resultado).
+        Se nenhuma página baixou (ou as que baixaram vieram vazias e alguma
+        falhou), levanta erro: o shard fica failed e é retomado deste
+        checkpoint, em vez de terminar como done com o site fora do ar.
+        """
+        site = SEARCH_SITES[shard.source]
+        urls = get_site(site).search_urls(KEYWORDS, shard.start, shard.end - timedelta(days=1), page)
+        pages = await self.engine.get_many(urls, site)
         
-        articles = []
-        keywords = ['roubo carro rio', 'furto veículo rio']
+        # Sem data na busca: meio do período (erro máximo de meio shard)
+        occurred_at = datetime.combine(shard.start, datetime.min.time()) + (shard.end - shard.start) / 2
         
-        for keyword in keywords:
+        articles, found, failed = [], 0, 0
+        for url, html in zip(urls, pages):
+            if html is None:
+                failed += 1
+                continue
+            
             try:
-                url = f"https://g1.globo.com/busca/?q={quote(keyword)}&from={year}-01-01&to={year}-12-31"
-                
-                response = requests.get(url, headers=self.headers, timeout=15)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                results = soup.find_all('div', class_='widget--info__text-container')
-                
-                for result in results[:10]:
-                    try:
-                        link = result.find('a')
-                        if not link:
-                            continue
-                        
-                        title = link.text.strip()
-                        url = link['href']
-                        
-                        if any(w in title.lower() for w in ['roub', 'furt', 'carro', 'veículo']):
-                            articles.append({
-                                'title': title,
-                                'url': url,
-                                'source': 'G1',
-                                'year': year
-                            })
-                    except:
-                        continue
-                
-                time.sleep(2)
-            except:
+                results, _ = await self.engine.pipeline.parse(site, html, url)
+            except Exception:
+                failed += 1
                 continue
+            
+            found += len(results)
+            for result in results:
+                title = result['titulo']
+                if any(w in title.lower() for w in ['roub', 'furt', 'carro', 'veículo']):
+                    articles.append({
+                        'title': title,
+                        'url': result['link'],
+                        'source': shard.source,
+                        'occurred_at': occurred_at
+                    })
         
-        print(f"      Encontradas: {len(articles)}")
-        return articles
+        if failed == len(urls) or (failed and not found):
+            raise RuntimeError(f"busca de {shard.source} página {page}: {failed}/{len(urls)} URLs não baixadas")
+        
+        return articles if found else None
     
-    def process_article(self, article: dict) -> dict:
-        try:
-            response = requests.get(article['url'], headers=self.headers, timeout=15)
-            soup = BeautifulSoup(response.text, 'html.parser')
+    async def run_shard(self, shard, checkpoint) -> int:
+        """
+        Backfill de um shard, página a página da busca
+
+        Cada página: baixa as matérias novas, extrai endereços, grava e
+        faz checkpoint da próxima página. Acaba quando a busca não traz
+        mais resultados (ou em MAX_SEARCH_PAGES).
+        """
+        saved = 0
+        for page in range(shard.cursor.get('page', 1), MAX_SEARCH_PAGES + 1):
+            articles = await self.search(shard, page)
+            if articles is None:
+                break
             
-            content = soup.find('article') or soup.find('div', class_='mc-article-body')
-            if not content:
-                return None
+            # Mesma matéria em mais de um termo; já gravadas: sem download
+            articles = [
+                article for article in {a['url']: a for a in articles}.values()
+                if source_id(article['source'], article['url']) not in self.known
+            ]
+            
+            texts = await self.engine.materias([a['url'] for a in articles], max_age=ARTICLE_MAX_AGE)
             
-            text = content.get_text()
+            async with self.save_lock:
+                page_saved = await asyncio.to_thread(self.process_and_save, list(zip(articles, texts)))
             
+            saved += page_saved
+            checkpoint({'page': page + 1}, page_saved)
+        
+        return saved
+    
+    def process_and_save(self, fetched: list) -> int:
+        processed = []
+        for article, text in fetched:
+            data = self.process_article(article, text) if text else None
+            if data:
+                processed.append(data)
+        return self.save_to_database(processed)
+    
+    def process_article(self, article: dict, text: str) -> dict:
+        try:
             address = self.geocoder.extract_address_from_text(text)
             if not address:
                 return None
@@ -86,15 +163,13 @@ class NewsHistoricalScraper:
             
             crime_type = 'ROUBO_VEICULO' if 'roub' in text.lower() else 'FURTO_VEICULO'
             
-            occurred_at = datetime(article['year'], 6, 15)
-            
             return {
                 'crime_type': crime_type,
                 'latitude': coords[0],
                 'longitude': coords[1],
                 'street_name': address,
                 'city': 'Rio de Janeiro',
-                'occurred_at': occurred_at,
+                'occurred_at': article['occurred_at'],
                 'source': article['source'],
                 'url': article['url'],
                 'verified': True,
@@ -107,90 +182,65 @@ class NewsHistoricalScraper:
         if not news:
             return 0
         
-        print(f"   💾 Salvando {len(news)} notícias...")
+        rows = ({
+            'crime_type': item['crime_type'],
+            'latitude': item['latitude'],
+            'longitude': item['longitude'],
+            'street_name': item['street_name'],
+            'city': item['city'],
+            'state': 'RJ',
+            'occurred_at': item['occurred_at'],
+            'source': item['source'],
+            'source_id': source_id(item['source'], item['url']),
+            'verified': item['verified'],
+            'confidence_score': item['confidence_score']
+        } for item in news)
         
-        saved = 0
+        saved = CrimeBulkLoader(self.db_conn).load(rows)
         
         for item in news:
-            try:
-                url_hash = abs(hash(item['url'])) % (10 ** 8)
-                source_id = f"{item['source']}_HIST_{url_hash}"
-                
-                query = """
-                    INSERT INTO crime_incidents (
-                        crime_type, latitude, longitude, location_point,
-                        street_name, city, state, occurred_at,
-                        source, source_id, verified, confidence_score
-                    ) VALUES (
-                        %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-                        %s, %s, %s, %s, %s, %s, %s, %s
-                    )
-                    ON CONFLICT (source, source_id) DO NOTHING
-                """
-                
-                self.cursor.execute(query, (
-                    item['crime_type'],
-                    item['latitude'],
-                    item['longitude'],
-                    item['longitude'],
-                    item['latitude'],
-                    item['street_name'],
-                    item['city'],
-                    'RJ',
-                    item['occurred_at'],
-                    item['source'],
-                    source_id,
-                    item['verified'],
-                    item['confidence_score']
-                ))
-                
-                saved += 1
-            except:
-                continue
+            self.known.add(source_id(item['source'], item['url']))
+        self.known.save()
         
-        self.db_conn.commit()
-        print(f"   ✓ Salvos: {saved}")
         return saved
     
-    def run(self, years: int = 5):
+    async def backfill(self, store: BackfillStore, workers: int) -> dict:
+        async with ScrapingEngine(timeout=15) as engine:
+            for site in SEARCH_SITES.values():
+                engine.set_site_delay(site, G1_DELAY)
+            self.engine = engine
+            self.save_lock = asyncio.Lock()
+            
+            return await BackfillCoordinator(store, self, workers=workers).run()
+    
+    def run(self, years: int = 5, workers: int = WORKERS, days: int = SHARD_DAYS, sources: list = None):
         print("=" * 70)
         print(f"  SafeDrive RJ - News Historical ({years} anos)")
         print("=" * 70)
         print()
         
-        current_year = datetime.now().year
-        all_articles = []
-        
-        for year in range(current_year - years, current_year + 1):
-            print(f"\n📅 Ano {year}...")
-            articles = self.search_g1_historical(year)
-            all_articles.extend(articles)
-            time.sleep(3)
+        # Janela de 1º de janeiro de (ano atual - years) até o último período
+        # fechado (o período corrente fica com o daily_scraper); os limites
+        # seguem backfill.EPOCH, então as chaves não mudam de um dia para outro
+        today = date.today()
+        store = BackfillStore()
+        added = store.add(make_shards(sources or list(SEARCH_SITES), date(today.year - years, 1, 1),
+                                      period_start(today, days), days))
         
-        print(f"\n✓ Total: {len(all_articles)} artigos")
-        print("\n🔍 Processando (extraindo endereços)...")
-        print("   Pode levar 10-20 minutos...\n")
+        summary = store.summary()
+        print(f"📦 Shards: {added} novos, {summary['done']} já concluídos, "
+              f"{summary['pending'] + summary['failed'] + summary['running']} a processar "
+              f"({workers} workers)\n")
         
-        processed = []
-        for i, article in enumerate(all_articles, 1):
-            if i % 10 == 0:
-                print(f"   {i}/{len(all_articles)}...")
-            
-            data = self.process_article(article)
-            if data:
-                processed.append(data)
-            
-            time.sleep(1)
-        
-        print(f"\n✓ Processados: {len(processed)} com endereços")
-        
-        saved = self.save_to_database(processed)
+        summary = asyncio.run(self.backfill(store, workers))
+        store.close()
         
         print("\n" + "=" * 70)
-        print(f"✓ Concluído: {saved} notícias salvas")
+        print(f"✓ Concluído: {summary['items']} notícias salvas no backfill "
+              f"({summary['done']} shards concluídos, {summary['failed']} falhos)")
         print("=" * 70 + "\n")
         
-        return saved
+        return summary['items']
 
 
 def connect_db():
@@ -203,13 +253,33 @@ def connect_db():
     )
 
 
+def run_process(years: int, workers: int, days: int):
+    """Um processo do backfill (os shards vêm do mesmo BackfillStore)"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s', datefmt='%H:%M:%S')
+    conn = connect_db()
+    try:
+        return NewsHistoricalScraper(conn).run(years, workers, days)
+    finally:
+        conn.close()
+
+
 if __name__ == "__main__":
-    import sys
-    years = 5
-    if len(sys.argv) > 1:
-        years = int(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Backfill histórico de notícias")
+    parser.add_argument('years', nargs='?', type=int, default=5, help="Anos para trás (padrão: 5)")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="Shards simultâneos por processo")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="Processos (cada um com seu limite de taxa por host)")
+    parser.add_argument('--days', type=int, default=SHARD_DAYS, help="Dias por shard")
+    args = parser.parse_args()
     
-    conn = connect_db()
-    scraper = NewsHistoricalScraper(conn)
-    scraper.run(years)
-    conn.close()
+    if args.processes > 1:
+        processes = [
+            multiprocessing.Process(target=run_process, args=(args.years, args.workers, args.days))
+            for _ in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    else:
+        run_process(args.years, args.workers, args.days)
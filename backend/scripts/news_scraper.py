@@ -4,17 +4,39 @@ SafeDrive RJ - News Scraper
 Raspa notícias de crimes de portais brasileiros
 """
 
-import requests
-from bs4 import BeautifulSoup
-import re
+import asyncio
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-import time
+from typing import List, Dict, Optional, Tuple
 import psycopg2
 from geocoding_service import GeocodingService
+import sys
+from pathlib import Path
 
-# Configuração
-USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+# Permite importar app.services (backend/) rodando de backend/scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.bulk_loader import CrimeBulkLoader
+from app.services.known_items import KnownItems
+from app.services.scraping import ScrapingEngine, data_publicacao
+from app.services.watermarks import MAX_IDS, Watermarks
+
+# Fonte -> (plugin de app/services/scraping, páginas da listagem na 1ª coleta, palavras-chave no título)
+NEWS_SITES = {
+    'G1': ('g1', 2, ['roub', 'furt', 'assalt', 'carro', 'veículo', 'moto']),
+    'Extra': ('extra', 1, ['roub', 'furt', 'carro', 'veículo']),
+    'O Globo': ('oglobo', 1, ['roub', 'furt', 'carro', 'veículo']),
+}
+
+# Intervalo entre matérias do mesmo host (respeitar o site)
+ARTICLE_DELAY = 0.5
+
+# Matérias não mudam: dentro desse prazo vêm do cache HTTP, sem requisição
+ARTICLE_MAX_AGE = 7 * 24 * 3600
+
+# Com marca d'água, a listagem é percorrida até cruzá-la (no máximo isso)
+MAX_PAGES = 10
+
+# "Há 2 horas" tem resolução de hora: só é mais velho que a marca com folga
+PUBLISH_SLACK = timedelta(hours=1)
 
 
 class NewsScraper:
@@ -24,80 +46,145 @@ class NewsScraper:
         self.db_conn = db_conn
         self.cursor = db_conn.cursor()
         self.geocoder = GeocodingService()
-        self.headers = {'User-Agent': USER_AGENT}
+        # source_ids já gravados (filtro de Bloom persistente)
+        self.known = KnownItems.for_source_ids(db_conn)
+        # Onde parou cada fonte (ingestion_watermarks)
+        self.watermarks = Watermarks(db_conn)
+        # Marcas novas da coleta atual, gravadas só depois do save
+        self.pending = {}
     
-    def scrape_g1_rj(self) -> List[Dict]:
+    def scrape_all(self, sources: List[str] = None) -> List[Dict]:
         """
-        Raspa notícias de crimes do G1 Rio
-        URL: https://g1.globo.com/rj/rio-de-janeiro/
+        Raspa notícias de crimes de veículos dos portais, em paralelo
+
+        Listagens e matérias são baixadas pelo ScrapingEngine (um host
+        não bloqueia o outro); a geocodificação continua sequencial.
         """
-        print("📰 Buscando notícias no G1 Rio...")
-        
-        news = []
+        sources = sources or list(NEWS_SITES)
+        for source in sources:
+            print(f"📰 Buscando notícias no {source}...")
         
+        self.pending = {}
         try:
-            # URLs para buscar
-            urls = [
-                'https://g1.globo.com/rj/rio-de-janeiro/',
-                'https://g1.globo.com/rj/rio-de-janeiro/noticia/policia/',
-            ]
-            
-            for url in urls:
-                response = requests.get(url, headers=self.headers, timeout=10)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Encontrar artigos
-                articles = soup.find_all('div', class_='feed-post-body')
+            fetched = asyncio.run(self._fetch_articles(sources))
+        except Exception as e:
+            print(f"✗ Erro ao buscar notícias: {e}")
+            # Nada foi salvo: nenhuma marca pode avançar
+            self.pending = {}
+            return []
+        
+        news = []
+        for source in sources:
+            found = 0
+            for item, text in fetched[source]:
+                article_data = self._parse_article(text) if text else None
                 
-                for article in articles[:10]:  # Primeiros 10
-                    try:
-                        title_tag = article.find('a', class_='feed-post-link')
-                        if not title_tag:
-                            continue
-                        
-                        title = title_tag.text.strip()
-                        link = title_tag['href']
-                        
-                        # Filtrar apenas crimes de veículos
-                        crime_keywords = ['roub', 'furt', 'assalt', 'carro', 'veículo', 'moto']
-                        if not any(kw in title.lower() for kw in crime_keywords):
-                            continue
-                        
-                        # Buscar página da notícia para pegar detalhes
-                        article_data = self._scrape_g1_article(link)
-                        
-                        if article_data:
-                            article_data['title'] = title
-                            article_data['url'] = link
-                            article_data['source'] = 'G1'
-                            news.append(article_data)
-                        
-                        time.sleep(0.5)  # Respeitar o site
-                        
-                    except Exception as e:
-                        print(f"Erro ao processar artigo: {e}")
-                        continue
-            
-            print(f"✓ G1: {len(news)} notícias encontradas")
+                if article_data:
+                    article_data['title'] = item['titulo']
+                    article_data['url'] = item['link']
+                    article_data['source'] = source
+                    news.append(article_data)
+                    found += 1
             
-        except Exception as e:
-            print(f"✗ Erro ao buscar G1: {e}")
+            print(f"✓ {source}: {found} notícias encontradas")
         
         return news
     
-    def _scrape_g1_article(self, url: str) -> Optional[Dict]:
-        """Busca detalhes de um artigo do G1"""
-        try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
+    def scrape_g1_rj(self) -> List[Dict]:
+        """Raspa notícias de crimes do G1 Rio"""
+        return self.scrape_all(['G1'])
+    
+    def scrape_extra(self) -> List[Dict]:
+        """Raspa notícias do Extra (casos de polícia)"""
+        return self.scrape_all(['Extra'])
+    
+    def scrape_oglobo(self) -> List[Dict]:
+        """Raspa notícias do O Globo (Rio)"""
+        return self.scrape_all(['O Globo'])
+    
+    async def _fetch_articles(self, sources: List[str]) -> Dict[str, List[Tuple[Dict, Optional[str]]]]:
+        async with ScrapingEngine(timeout=10) as engine:
+            results = await asyncio.gather(*(self._fetch_source(engine, source) for source in sources))
+        return dict(zip(sources, results))
+    
+    async def _fetch_source(self, engine: ScrapingEngine, source: str) -> List[Tuple[Dict, Optional[str]]]:
+        """
+        Listagem do site -> filtra por palavra-chave -> baixa as matérias
+
+        Listagem mais recente primeiro: a paginação para na página que
+        cruza a marca d'água da fonte (um link do topo da coleta anterior
+        ou matéria mais velha que a última publicação vista). Sem marca
+        (primeira coleta), lê as páginas fixas de NEWS_SITES.
+
+        A marca só avança (em save_to_database) se a paginação cruzou a
+        anterior e todas as matérias foram baixadas; senão a antiga fica
+        e a próxima coleta revê o mesmo trecho.
+        """
+        site, pages, keywords = NEWS_SITES[source]
+        engine.set_site_delay(site, ARTICLE_DELAY)
+        
+        marca = self.watermarks.get(source)
+        vistos = set(marca['last_ids']) if marca else set()
+        limite = None
+        if marca and marca['last_published_at']:
+            limite = marca['last_published_at'] - PUBLISH_SLACK
+        
+        items, topo, publicadas = [], [], []
+        # Sem marca (ou marca vazia, de has_rows) não há o que cruzar
+        cruzou = not (vistos or limite)
+        for page in range(1, (MAX_PAGES if marca else pages) + 1):
+            listing, _ = await engine.scrape(site, page)
+            if not listing:
+                break
             
-            # Extrair texto
-            content_div = soup.find('div', class_='mc-article-body')
-            if not content_div:
-                return None
+            datas = [data_publicacao(item['data_str']) for item in listing]
+            datas = [data for data in datas if data]
+            publicadas.extend(datas)
+            if len(topo) < MAX_IDS:
+                topo.extend(item['link'] for item in listing[:MAX_IDS - len(topo)])
             
-            text = content_div.get_text()
+            new = [item for item in listing if self._source_id(source, item['link']) not in self.known]
+            items.extend(new)
             
+            # Página toda conhecida = resto também, mas só na 1ª coleta: com
+            # marca, pode haver um trecho não coletado entre aqui e ela
+            if not new and cruzou:
+                break
+            # A página inteira é lida (itens fixados no topo não cortam a coleta)
+            if any(item['link'] in vistos for item in listing):
+                cruzou = True
+                break
+            if limite and datas and min(datas) < limite:
+                cruzou = True
+                break
+        
+        # Filtrar apenas crimes de veículos (sem repetir matérias entre páginas)
+        items = list({
+            item['link']: item for item in items
+            if any(kw in item['titulo'].lower() for kw in keywords)
+        }.values())
+        
+        # Corpo das matérias extraído no pool de processos do engine,
+        # cada uma assim que é baixada
+        texts = await engine.materias([item['link'] for item in items], site, max_age=ARTICLE_MAX_AGE)
+        falhas = sum(text is None for text in texts)
+        
+        if topo and cruzou and not falhas:
+            self.pending[source] = {'published_at': max(publicadas, default=None), 'ids': topo}
+        elif topo and not cruzou:
+            print(f"⚠️  {source}: marca d'água anterior não alcançada (mantida)")
+        elif falhas:
+            print(f"⚠️  {source}: {falhas} matérias não baixadas (marca d'água mantida)")
+        
+        return list(zip(items, texts))
+    
+    @staticmethod
+    def _source_id(source: str, url: str) -> str:
+        return f"NEWS_{source}_{url[-20:]}"
+    
+    def _parse_article(self, text: str) -> Optional[Dict]:
+        """Extrai endereço, coordenadas e tipo de crime de uma matéria"""
+        try:
             # Extrair endereço
             address = self.geocoder.extract_address_from_text(text)
             
@@ -125,114 +212,6 @@ class NewsScraper:
         except Exception as e:
             return None
     
-    def scrape_extra(self) -> List[Dict]:
-        """
-        Raspa notícias do Extra (casos de polícia)
-        URL: https://extra.globo.com/casos-de-policia/
-        """
-        print("📰 Buscando notícias no Extra...")
-        
-        news = []
-        
-        try:
-            url = 'https://extra.globo.com/casos-de-policia/'
-            response = requests.get(url, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Encontrar artigos
-            articles = soup.find_all('div', class_='feed-post')
-            
-            for article in articles[:10]:
-                try:
-                    title_tag = article.find('a')
-                    if not title_tag:
-                        continue
-                    
-                    title = title_tag.text.strip()
-                    link = title_tag['href']
-                    
-                    # Filtrar crimes de veículos
-                    if not any(kw in title.lower() for kw in ['roub', 'furt', 'carro', 'veículo']):
-                        continue
-                    
-                    # Processar artigo
-                    article_data = self._scrape_g1_article(link)  # Mesmo formato do G1
-                    
-                    if article_data:
-                        article_data['title'] = title
-                        article_data['url'] = link
-                        article_data['source'] = 'Extra'
-                        news.append(article_data)
-                    
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    continue
-            
-            print(f"✓ Extra: {len(news)} notícias encontradas")
-            
-        except Exception as e:
-            print(f"✗ Erro ao buscar Extra: {e}")
-        
-        return news
-    
-    def scrape_oglobo(self) -> List[Dict]:
-        """
-        Raspa notícias do O Globo (Rio)
-        URL: https://oglobo.globo.com/rio/
-        """
-        print("📰 Buscando notícias no O Globo...")
-        
-        news = []
-        
-        try:
-            url = 'https://oglobo.globo.com/rio/'
-            response = requests.get(url, headers=self.headers, timeout=10)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Encontrar artigos
-            articles = soup.find_all('div', class_='bastian-feed-item')
-            
-            for article in articles[:10]:
-                try:
-                    title_tag = article.find('h2')
-                    link_tag = article.find('a')
-                    
-                    if not title_tag or not link_tag:
-                        continue
-                    
-                    title = title_tag.text.strip()
-                    link = link_tag['href']
-                    
-                    # Garantir URL completa
-                    if not link.startswith('http'):
-                        link = 'https://oglobo.globo.com' + link
-                    
-                    # Filtrar crimes
-                    if not any(kw in title.lower() for kw in ['roub', 'furt', 'carro', 'veículo']):
-                        continue
-                    
-                    # Processar
-                    article_data = self._scrape_g1_article(link)
-                    
-                    if article_data:
-                        article_data['title'] = title
-                        article_data['url'] = link
-                        article_data['source'] = 'O Globo'
-                        news.append(article_data)
-                    
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    continue
-            
-            print(f"✓ O Globo: {len(news)} notícias encontradas")
-            
-        except Exception as e:
-            print(f"✗ Erro ao buscar O Globo: {e}")
-        
-        return news
-    
     def _determine_crime_type(self, text: str) -> str:
         """Determina tipo de crime baseado no texto"""
         text_lower = text.lower()
@@ -247,53 +226,35 @@ class NewsScraper:
             return 'FURTO_VEICULO'
     
     def save_to_database(self, news: List[Dict]) -> int:
-        """Salva notícias no banco de dados"""
+        """Salva notícias no banco de dados (COPY em massa)"""
         print(f"\n💾 Salvando {len(news)} notícias no banco...")
         
-        saved = 0
+        rows = ({
+            'crime_type': item['crime_type'],
+            'latitude': item['latitude'],
+            'longitude': item['longitude'],
+            'street_name': item.get('address'),
+            'city': 'Rio de Janeiro',
+            'state': 'RJ',
+            'occurred_at': item['occurred_at'],
+            'source': item['source'],
+            'source_id': self._source_id(item['source'], item['url']),  # source_id único
+            'description': item.get('description'),
+            'verified': True,  # Notícias são verificadas
+            'confidence_score': 0.9  # Alta confiança
+        } for item in news)
+        
+        saved = CrimeBulkLoader(self.db_conn).load(rows)
         
         for item in news:
-            try:
-                # Criar source_id único
-                source_id = f"NEWS_{item['source']}_{item['url'][-20:]}"
-                
-                # Inserir no banco
-                query = """
-                    INSERT INTO crime_incidents (
-                        crime_type, latitude, longitude, location_point,
-                        street_name, city, state, occurred_at,
-                        source, source_id, description, verified, confidence_score
-                    ) VALUES (
-                        %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s
-                    )
-                    ON CONFLICT (source, source_id) DO NOTHING
-                """
-                
-                self.cursor.execute(query, (
-                    item['crime_type'],
-                    item['latitude'],
-                    item['longitude'],
-                    item['longitude'],
-                    item['latitude'],
-                    item.get('address'),
-                    'Rio de Janeiro',
-                    'RJ',
-                    item['occurred_at'],
-                    item['source'],
-                    source_id,
-                    item.get('description'),
-                    True,  # Notícias são verificadas
-                    0.9  # Alta confiança
-                ))
-                
-                saved += 1
-                
-            except Exception as e:
-                print(f"Erro ao salvar: {e}")
-                continue
+            self.known.add(self._source_id(item['source'], item['url']))
+        self.known.save()
         
-        self.db_conn.commit()
+        # Itens gravados: a próxima coleta para onde esta começou (só as
+        # fontes que cruzaram a marca anterior sem falhas, ver _fetch_source)
+        for source, marca in self.pending.items():
+            self.watermarks.advance(source, published_at=marca['published_at'], ids=marca['ids'])
+        self.pending = {}
         
         print(f"✓ {saved} notícias salvas no banco")
         
@@ -306,18 +267,8 @@ class NewsScraper:
         print("=" * 60)
         print()
         
-        all_news = []
-        
-        # G1
-        all_news.extend(self.scrape_g1_rj())
-        time.sleep(2)
-        
-        # Extra
-        all_news.extend(self.scrape_extra())
-        time.sleep(2)
-        
-        # O Globo
-        all_news.extend(self.scrape_oglobo())
+        # G1, Extra e O Globo em paralelo
+        all_news = self.scrape_all()
         
         # Salvar tudo
         saved = self.save_to_database(all_news)
@@ -2,14 +2,26 @@
 """
 SafeDrive RJ - Crime Data Orchestrator
 Coordena News Scraper e Twitter Monitor
+
+Os jobs rodam no JobRunner (app/services/job_runner.py): em paralelo,
+sem sobreposição, com timeout, novas tentativas e última execução salva
+em ~/.safedrive_jobs.db (ao reiniciar, jobs atrasados rodam na hora).
 """
 
-import schedule
+import asyncio
+import logging
 import time
 from datetime import datetime
 import psycopg2
 from news_scraper import NewsScraper
 from twitter_monitor import TwitterMonitor
+import sys
+from pathlib import Path
+
+# Permite importar app.services (backend/) rodando de backend/scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.job_runner import SUCCESS, Job, JobRunner, JobStore
+from app.services.metrics import METRICS, Metrics
 
 # Configuração
 TWITTER_BEARER_TOKEN = None  # Adicionar token do Twitter
@@ -50,18 +62,16 @@ def run_news_scraper():
     print(f"[{datetime.now().strftime('%H:%M:%S')}] Executando News Scraper")
     print("=" * 60)
     
+    # Erros sobem para o JobRunner (nova tentativa com backoff)
+    conn = connect_db()
     try:
-        conn = connect_db()
         scraper = NewsScraper(conn)
         saved = scraper.run()
+    finally:
         conn.close()
-        
-        print_success(f"News Scraper: {saved} notícias salvas")
-        return saved
-        
-    except Exception as e:
-        print_warning(f"Erro no News Scraper: {e}")
-        return 0
+    
+    print_success(f"News Scraper: {saved} notícias salvas")
+    return saved
 
 
 def run_twitter_monitor():
@@ -75,8 +85,8 @@ def run_twitter_monitor():
         print_warning("Twitter API não configurada (pule esta etapa)")
         return 0
     
+    conn = connect_db()
     try:
-        conn = connect_db()
         monitor = TwitterMonitor(conn, TWITTER_BEARER_TOKEN)
         
         # Buscar tweets recentes
@@ -93,16 +103,12 @@ def run_twitter_monitor():
         if all_tweets:
             saved = monitor.save_to_database(all_tweets)
             print_success(f"Twitter: {saved} tweets salvos")
-            conn.close()
             return saved
         else:
             print_info("Twitter: Nenhum tweet novo")
-            conn.close()
             return 0
-        
-    except Exception as e:
-        print_warning(f"Erro no Twitter Monitor: {e}")
-        return 0
+    finally:
+        conn.close()
 
 
 def show_stats():
@@ -146,28 +152,54 @@ def show_stats():
         
     except Exception as e:
         print_warning(f"Erro ao buscar stats: {e}")
+    
+    show_metrics()
+
+
+def show_metrics():
+    """Tempos por estágio, vazão, HTTP, banco e dedup (todas as execuções)"""
+    METRICS.flush()
+    linhas = Metrics.load().format_report()
+    
+    print("\nMétricas de ingestão:")
+    if not linhas:
+        print("  (nenhuma execução medida ainda)")
+    for linha in linhas:
+        print(f"  {linha}")
 
 
-def run_full_cycle():
-    """Executa um ciclo completo"""
+def build_runner() -> JobRunner:
+    """Jobs do orchestrator (intervalos do modo contínuo)"""
+    runner = JobRunner(JobStore())
+    runner.add(Job('news', run_news_scraper, interval=3600, timeout=1800, retries=2, backoff=60))
+    runner.add(Job('twitter', run_twitter_monitor, interval=900, timeout=600, retries=1, backoff=60))
+    runner.add(Job('stats', show_stats, interval=6 * 3600, timeout=300))
+    return runner
+
+
+def run_full_cycle(runner: JobRunner = None):
+    """Executa um ciclo completo (News e Twitter em paralelo, depois estatísticas)"""
     print()
     print("🔄 Iniciando ciclo completo...")
     
-    # 1. News Scraper
-    news_saved = run_news_scraper()
-    time.sleep(10)
+    runner = runner or build_runner()
     
-    # 2. Twitter Monitor
-    twitter_saved = run_twitter_monitor()
-    time.sleep(5)
+    # 1. News Scraper + 2. Twitter Monitor (independentes)
+    results = asyncio.run(runner.run_once(['news', 'twitter']))
     
     # 3. Estatísticas
     show_stats()
     
-    total = news_saved + twitter_saved
+    total = sum(
+        runner.store.get(name)['last_result'] or 0
+        for name, status in results.items() if status == SUCCESS
+    )
     print()
     print("=" * 60)
     print_success(f"Ciclo concluído: {total} crimes adicionados")
+    for name, status in results.items():
+        if status != SUCCESS:
+            print_warning(f"{name}: {status} ({runner.store.get(name)['last_error']})")
     print("=" * 60)
     print()
 
@@ -184,23 +216,15 @@ def run_continuous():
     print("   News Scraper: A cada 1 hora")
     print("   Twitter Monitor: A cada 15 minutos")
     print("   Estatísticas: A cada 6 horas")
+    print("   (jobs atrasados desde a última execução rodam imediatamente)")
     print()
     print("   Pressione Ctrl+C para parar")
     print()
     
-    # Executar uma vez imediatamente
-    run_full_cycle()
-    
-    # Agendar tarefas
-    schedule.every(1).hour.do(run_news_scraper)
-    schedule.every(15).minutes.do(run_twitter_monitor)
-    schedule.every(6).hours.do(show_stats)
+    runner = build_runner()
     
-    # Loop infinito
     try:
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Verificar a cada minuto
+        asyncio.run(runner.run_forever())
             
     except KeyboardInterrupt:
         print()
@@ -221,7 +245,7 @@ def run_once():
 
 
 if __name__ == "__main__":
-    import sys
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     
     if len(sys.argv) > 1 and sys.argv[1] == "--continuous":
         run_continuous()
@@ -4,11 +4,20 @@ SafeDrive RJ - Scraper Controller
 Gerencia busca histórica e diária automaticamente
 """
 
+import asyncio
 import psycopg2
 from datetime import datetime
-import os
 import json
 from pathlib import Path
+import sys
+
+# Permite importar app.services (backend/) rodando de backend/scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.job_runner import SUCCESS, TIMEOUT, Job, JobRunner, JobStore
+from app.services.watermarks import Watermarks
+
+# Fonte gravada pela busca histórica
+HISTORICAL_SOURCE = 'Historical_Analysis'
 
 # Cores
 class Colors:
@@ -36,9 +45,16 @@ class ScraperController:
     """Controlador de scrapers"""
     
     def __init__(self):
+        # Estado antigo (JSON): importado uma vez para o JobStore
         self.status_file = Path.home() / '.safedrive_scraper_status.json'
+        self.store = JobStore()
+        self.runner = JobRunner(self.store)
+        # Um loop para todas as execuções: a thread que passa do timeout segue nele
+        self.loop = asyncio.new_event_loop()
+        self._import_legacy_status()
         self.db_conn = self.connect_db()
         self.cursor = self.db_conn.cursor()
+        self.watermarks = Watermarks(self.db_conn)
     
     def connect_db(self):
         return psycopg2.connect(
@@ -50,21 +66,67 @@ class ScraperController:
         )
     
     def load_status(self) -> dict:
-        """Carrega status do scraper"""
-        if self.status_file.exists():
-            with open(self.status_file, 'r') as f:
-                return json.load(f)
+        """Status do scraper (derivado das execuções no JobStore)"""
+        historical = self.store.get('historical')
+        daily = self.store.get('daily')
+        
+        def iso(ts):
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+        
         return {
-            'historical_completed': False,
-            'last_daily_run': None,
-            'total_historical': 0,
-            'total_daily': 0
+            'historical_completed': historical['last_success'] is not None,
+            'last_historical_run': iso(historical['last_success']),
+            'last_daily_run': iso(daily['last_success']),
+            'total_historical': historical['last_result'] or 0,
+            'total_daily': daily['total']
         }
     
-    def save_status(self, status: dict):
-        """Salva status do scraper"""
-        with open(self.status_file, 'w') as f:
-            json.dump(status, f, indent=2)
+    def _import_legacy_status(self):
+        """Traz ~/.safedrive_scraper_status.json para o JobStore (idempotente)"""
+        if not self.status_file.exists():
+            return
+        
+        with open(self.status_file, 'r') as f:
+            legacy = json.load(f)
+        
+        def ts(value):
+            return datetime.fromisoformat(value).timestamp() if value else self.status_file.stat().st_mtime
+        
+        if legacy.get('historical_completed'):
+            self.store.record('historical', ts(legacy.get('last_historical_run')),
+                              result=legacy.get('total_historical', 0))
+        if legacy.get('last_daily_run'):
+            self.store.record('daily', ts(legacy['last_daily_run']),
+                              result=None, total=legacy.get('total_daily', 0))
+    
+    def _run_job(self, name: str, func, timeout: float, retries: int) -> int:
+        """Executa pelo JobRunner (timeout, nova tentativa, estado persistido)"""
+        def attempt():
+            try:
+                return func()
+            except Exception:
+                # Transação abortada: a próxima tentativa precisa de uma limpa
+                self.db_conn.rollback()
+                raise
+        
+        # Um Job por nome: job.running impede duas execuções sobrepostas
+        job = self.runner.jobs.get(name) or self.runner.add(
+            Job(name, attempt, timeout=timeout, retries=retries, backoff=60)
+        )
+        if not job.running:
+            job.func = attempt
+        
+        status = self.loop.run_until_complete(self.runner.run_job(job))
+        if status == TIMEOUT:
+            # A thread não pode ser interrompida e usa a mesma conexão: espera
+            # terminar e fica com o desfecho real (resultado gravado pelo runner)
+            print_warning(f"{name}: passou de {timeout / 60:.0f} min - aguardando terminar")
+            self.loop.run_until_complete(self.runner.drain())
+            status = self.store.get(name)['last_status']
+        if status != SUCCESS:
+            print_warning(f"{name}: {status} ({self.store.get(name)['last_error']})")
+            return 0
+        return self.store.get(name)['last_result'] or 0
     
     def check_needs_historical(self) -> bool:
         """Verifica se precisa rodar busca histórica"""
@@ -73,16 +135,8 @@ class ScraperController:
         if status['historical_completed']:
             return False
         
-        # Verificar se já tem dados históricos no banco
-        self.cursor.execute("""
-            SELECT COUNT(*) 
-            FROM crime_incidents 
-            WHERE source = 'Historical_Analysis'
-        """)
-        
-        historical_count = self.cursor.fetchone()[0]
-        
-        return historical_count == 0
+        # Dados históricos no banco: marca d'água da fonte (ou EXISTS), sem COUNT(*)
+        return not self.watermarks.has_rows(HISTORICAL_SOURCE)
     
     def run_historical(self, years: int = 5):
         """Executa busca histórica"""
@@ -100,14 +154,9 @@ class ScraperController:
         from historical_scraper import HistoricalScraper
         
         scraper = HistoricalScraper(self.db_conn)
-        saved = scraper.run(years)
-        
-        # Atualizar status
-        status = self.load_status()
-        status['historical_completed'] = True
-        status['total_historical'] = saved
-        status['last_historical_run'] = datetime.now().isoformat()
-        self.save_status(status)
+        saved = self._run_job('historical', lambda: scraper.run(years), timeout=4 * 3600, retries=1)
+        if self.store.get('historical')['last_status'] == SUCCESS:
+            self.watermarks.advance(HISTORICAL_SOURCE, published_at=datetime.now())
         
         print()
         print_success(f"Busca histórica concluída: {saved:,} registros")
@@ -116,7 +165,7 @@ class ScraperController:
         return saved
     
     def run_daily(self):
-        """Executa busca diária"""
+        """Executa busca diária (só o que é novo desde a marca d'água de cada fonte)"""
         print()
         print_header("=" * 70)
         print_header(f"  Daily Scraper - {datetime.now().strftime('%d/%m/%Y')}")
@@ -127,15 +176,7 @@ class ScraperController:
         from daily_scraper import DailyScraper
         
         scraper = DailyScraper(self.db_conn)
-        saved = scraper.run()
-        
-        # Atualizar status
-        status = self.load_status()
-        status['last_daily_run'] = datetime.now().isoformat()
-        status['total_daily'] = status.get('total_daily', 0) + saved
-        self.save_status(status)
-        
-        return saved
+        return self._run_job('daily', scraper.run, timeout=3600, retries=2)
     
     def show_stats(self):
         """Mostra estatísticas"""
@@ -210,6 +251,7 @@ class ScraperController:
         self.show_stats()
         
         self.db_conn.close()
+        self.loop.close()
         
         print()
         print_header("=" * 70)
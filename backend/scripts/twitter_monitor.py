@@ -12,6 +12,12 @@ from typing import List, Dict
 import time
 import psycopg2
 from geocoding_service import GeocodingService
+import sys
+from pathlib import Path
+
+# Permite importar app.services (backend/) rodando de backend/scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.bulk_loader import CrimeBulkLoader
 
 # Configuração Twitter API
 # IMPORTANTE: Obter em https://developer.twitter.com/
@@ -189,50 +195,23 @@ class TwitterMonitor:
             return 'ROUBO_VEICULO'
     
     def save_to_database(self, tweets: List[Dict]) -> int:
-        """Salva tweets no banco"""
-        saved = 0
-        
-        for tweet in tweets:
-            try:
-                source_id = f"TWITTER_{tweet['tweet_id']}"
-                
-                query = """
-                    INSERT INTO crime_incidents (
-                        crime_type, latitude, longitude, location_point,
-                        street_name, city, state, occurred_at,
-                        source, source_id, description, verified, confidence_score
-                    ) VALUES (
-                        %s, %s, %s, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s
-                    )
-                    ON CONFLICT (source, source_id) DO NOTHING
-                """
-                
-                self.cursor.execute(query, (
-                    tweet['crime_type'],
-                    tweet['latitude'],
-                    tweet['longitude'],
-                    tweet['longitude'],
-                    tweet['latitude'],
-                    tweet['address'],
-                    'Rio de Janeiro',
-                    'RJ',
-                    tweet['occurred_at'],
-                    'Twitter',
-                    source_id,
-                    tweet['text'][:500],
-                    False,  # Tweets precisam validação
-                    0.5  # Confiança média
-                ))
-                
-                saved += 1
-                
-            except Exception as e:
-                continue
-        
-        self.db_conn.commit()
+        """Salva tweets no banco (COPY em massa)"""
+        rows = ({
+            'crime_type': tweet['crime_type'],
+            'latitude': tweet['latitude'],
+            'longitude': tweet['longitude'],
+            'street_name': tweet['address'],
+            'city': 'Rio de Janeiro',
+            'state': 'RJ',
+            'occurred_at': tweet['occurred_at'],
+            'source': 'Twitter',
+            'source_id': f"TWITTER_{tweet['tweet_id']}",
+            'description': tweet['text'][:500],
+            'verified': False,  # Tweets precisam validação
+            'confidence_score': 0.5  # Confiança média
+        } for tweet in tweets)
         
-        return saved
+        return CrimeBulkLoader(self.db_conn).load(rows)
 
 
 def connect_db():